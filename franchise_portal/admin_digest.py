@@ -0,0 +1,180 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Admin notifications for submitted applications, sent as a periodic digest
+
+`notify_admins` is the single entry point for "new application" mail to the
+administrators: the signup API and the controller both call it, and it queues
+at most one notification per application. In digest mode (the default) the
+notification is held in the outbox with status "Digest". The hourly
+`send_digest` job gathers every held notification into one summary email and
+marks them "Digested". Set `franchise_admin_digest` to 0 in site config to get
+one email per submission again.
+"""
+
+import frappe
+from frappe.utils import cint, escape_html, now_datetime
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.outbox import OUTBOX_DOCTYPE, enqueue_mail
+
+ADMIN_RECIPIENTS = ("admin@nexcharventures.com",)
+DIGEST_FIELDS = (
+	"name",
+	"company_name",
+	"contact_person",
+	"email",
+	"phone_number",
+	"project_name",
+	"project_city",
+	"project_state",
+	"primary_feedstock_category",
+	"annual_volume_available",
+)
+
+
+def is_digest_enabled():
+	return cint(frappe.conf.get("franchise_admin_digest", 1))
+
+
+def get_recipients():
+	recipients = frappe.conf.get("franchise_admin_digest_recipients") or ADMIN_RECIPIENTS
+	if isinstance(recipients, str):
+		recipients = recipients.split(",")
+	return [recipient.strip() for recipient in recipients]
+
+
+def notify_admins(doc):
+	"""Queue the "new application" notification for `doc`, once per application"""
+	recipients = get_recipients()
+	if frappe.db.exists(
+		OUTBOX_DOCTYPE,
+		{"reference_doctype": doc.doctype, "reference_name": doc.name, "recipients": "\n".join(recipients)},
+	):
+		return None
+
+	return enqueue_mail(
+		recipients=recipients,
+		subject=f"New Franchise Application: {doc.company_name}",
+		message=render_application(doc),
+		reference_doctype=doc.doctype,
+		reference_name=doc.name,
+		# held back from the drain worker until the next digest
+		status="Digest" if is_digest_enabled() else "Pending",
+	)
+
+
+def send_digest():
+	"""Send one summary of all held notifications; returns the number summarised"""
+	Outbox = frappe.qb.DocType(OUTBOX_DOCTYPE)
+	rows = (
+		frappe.qb.from_(Outbox)
+		.select(Outbox.name, Outbox.reference_name)
+		.where(Outbox.status == "Digest")
+		.orderby(Outbox.creation)
+		.for_update(skip_locked=True)
+		.run(as_dict=True)
+	)
+	if not rows:
+		return 0
+
+	applications = frappe.get_all(
+		APPLICATION_DOCTYPE,
+		filters={"name": ("in", [row.reference_name for row in rows])},
+		fields=list(DIGEST_FIELDS),
+		order_by="creation asc",
+	)
+	if applications:
+		count = len(applications)
+		enqueue_mail(
+			recipients=get_recipients(),
+			subject=f"{count} New Franchise Application{'s' if count > 1 else ''}",
+			message=render_digest(applications),
+		)
+
+	(
+		frappe.qb.update(Outbox)
+		.set(Outbox.status, "Digested")
+		.set(Outbox.sent_at, now_datetime())
+		.where(Outbox.name.isin([row.name for row in rows]))
+		.run()
+	)
+	frappe.db.commit()
+	return len(applications)
+
+
+def render_application(doc):
+	"""Notification body for a single application"""
+	rows = "".join(
+		f"""
+				<tr>
+					<td style="padding: 8px 0; font-weight: bold; width: 40%;">{label}:</td>
+					<td style="padding: 8px 0;">{escape_html(str(value or "N/A"))}</td>
+				</tr>"""
+		for label, value in (
+			("Application ID", doc.name),
+			("Company Name", doc.get("company_name")),
+			("Contact Person", doc.get("contact_person")),
+			("Email", doc.get("email")),
+			("Phone", doc.get("phone_number")),
+			("Project Name", doc.get("project_name")),
+			("Location", _location(doc)),
+			("Feedstock Category", doc.get("primary_feedstock_category")),
+			("Annual Volume", f"{doc.get('annual_volume_available') or 'N/A'} MT"),
+		)
+	)
+
+	return f"""
+	<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+		<h2 style="color: #667eea;">New Franchise Application Submitted</h2>
+
+		<div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+			<h3 style="margin-top: 0; color: #495057;">Application Details</h3>
+
+			<table style="width: 100%; border-collapse: collapse;">{rows}
+			</table>
+		</div>
+
+		<p style="color: #6c757d;">Please review this application in the ERP system and follow up with the applicant.</p>
+	</div>
+	"""
+
+
+def render_digest(applications):
+	"""Summary body listing several applications"""
+	cell = 'style="padding: 8px; border-bottom: 1px solid #dee2e6;"'
+	rows = "".join(
+		f"""
+				<tr>
+					<td {cell}>{escape_html(app.name)}</td>
+					<td {cell}>{escape_html(app.company_name or "N/A")}</td>
+					<td {cell}>{escape_html(app.contact_person or "N/A")}<br>{escape_html(app.email or "")}</td>
+					<td {cell}>{escape_html(_location(app) or "N/A")}</td>
+					<td {cell}>{escape_html(app.primary_feedstock_category or "N/A")}</td>
+					<td {cell}>{app.annual_volume_available or "N/A"} MT</td>
+				</tr>"""
+		for app in applications
+	)
+
+	return f"""
+	<div style="font-family: Arial, sans-serif; max-width: 900px; margin: 0 auto;">
+		<h2 style="color: #667eea;">{len(applications)} New Franchise Application(s) Submitted</h2>
+
+		<table style="width: 100%; border-collapse: collapse; background: #f8f9fa;">
+			<tr>
+				<th {cell} align="left">Application ID</th>
+				<th {cell} align="left">Company</th>
+				<th {cell} align="left">Contact</th>
+				<th {cell} align="left">Location</th>
+				<th {cell} align="left">Feedstock Category</th>
+				<th {cell} align="left">Annual Volume</th>
+			</tr>{rows}
+		</table>
+
+		<p style="color: #6c757d;">Please review these applications in the ERP system and follow up with the applicants.</p>
+	</div>
+	"""
+
+
+def _location(doc):
+	return ", ".join(part for part in (doc.get("project_city"), doc.get("project_state")) if part)
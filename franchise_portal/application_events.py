@@ -0,0 +1,110 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Application status changes, pushed to applicants and streamed to consumers
+
+When an application's status changes, `on_application_update` does three things
+after the transaction commits:
+
+- publishes a `franchise_application_status` realtime event to the applicant's
+  channel: a task room named by an HMAC of the email, which a guest socket
+  can join with `task_subscribe`. The channel is only handed out on
+  token-verified signup paths, so knowing an email alone is not enough to
+  listen in.
+- appends the event to a capped Redis stream. Downstream consumers read it
+  with `read_status_events`, or with their own `XREADGROUP` on `stream_key()`.
+- drops the cached `get_application_status` answer for the email.
+
+Pollers such as partner widgets hit the cache, so a poll no longer costs a
+query until the cached entry expires or the application changes.
+"""
+
+import hashlib
+import hmac
+
+import frappe
+from frappe.realtime import get_task_progress_room
+from frappe.utils import now
+from frappe.utils.password import get_encryption_key
+from redis.exceptions import RedisError
+
+from franchise_portal.application_store import get_application
+from franchise_portal.redis_keys import client, make_key
+
+EVENT = "franchise_application_status"
+# answered to any guest who knows an email, so nothing the applicant entered
+STATUS_FIELDS = ["name", "status", "current_step"]
+STATUS_CACHE_TTL_SECONDS = 5 * 60
+# roughly; trimmed with MAXLEN ~ so Redis can drop whole nodes
+STREAM_MAX_LENGTH = 100000
+
+
+def status_channel(email):
+	"""Realtime channel of the applicant with `email`; not derivable without the site's key"""
+	identity = (email or "").strip().lower()
+	digest = hmac.new(get_encryption_key().encode(), identity.encode(), hashlib.sha256).hexdigest()
+	return f"franchise_application:{digest[:32]}"
+
+
+def stream_key():
+	return make_key("application_status_stream")
+
+
+def status_cache_key(email):
+	return f"franchise_portal:application_status:{(email or '').strip().lower()}"
+
+
+def get_application_status(email):
+	"""Cached `STATUS_FIELDS` of the application for `email`, or None"""
+	key = status_cache_key(email)
+	application = frappe.cache().get_value(key)
+	if application is None:
+		application = get_application(email, STATUS_FIELDS)
+		if application:
+			frappe.cache().set_value(key, application, expires_in_sec=STATUS_CACHE_TTL_SECONDS)
+	return application
+
+
+def on_application_update(doc, method=None):
+	frappe.db.after_commit.add(lambda: frappe.cache().delete_value(status_cache_key(doc.email)))
+
+	before = doc.get_doc_before_save()
+	if before and before.status == doc.status:
+		return
+
+	event = {
+		"application": doc.name,
+		"status": doc.status,
+		"previous_status": before.status if before else None,
+		"timestamp": now(),
+	}
+	frappe.publish_realtime(EVENT, event, room=get_task_progress_room(status_channel(doc.email)), after_commit=True)
+	frappe.db.after_commit.add(lambda: append_to_stream({**event, "email": doc.email}))
+
+
+def on_application_trash(doc, method=None):
+	frappe.db.after_commit.add(lambda: frappe.cache().delete_value(status_cache_key(doc.email)))
+
+
+def append_to_stream(event):
+	try:
+		client().xadd(
+			stream_key(),
+			{field: "" if value is None else str(value) for field, value in event.items()},
+			maxlen=STREAM_MAX_LENGTH,
+			approximate=True,
+		)
+	except RedisError:
+		# the realtime push and the database are the source of truth; never fail the save
+		frappe.log_error("Could not append application status event", "Franchise Portal Stream Error")
+
+
+def read_status_events(after="0-0", count=100, block_ms=None):
+	"""Events after the stream id `after`, oldest first, as `[(id, event)]`"""
+	reply = client().xread({stream_key(): after}, count=count, block=block_ms)
+	if not reply:
+		return []
+	return [
+		(frappe.safe_decode(event_id), {frappe.safe_decode(k): frappe.safe_decode(v) for k, v in fields.items()})
+		for event_id, fields in reply[0][1]
+	]
@@ -0,0 +1,92 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Per-application write lock for the signup endpoints
+
+Autosave flushes, step saves and submissions for one applicant can arrive at
+the same time from several tabs. Each write path in the signup API takes a
+short Redis lock keyed by email around its load → apply → save → commit, so
+writers for one application queue up in Redis instead of in InnoDB lock waits,
+and each one loads the row the previous writer committed. A writer waits (with
+backoff) for the lock rather than failing. Saves from elsewhere, such as the
+desk, are not serialised by the lock; `save_application` merges over those on
+`TimestampMismatchError`.
+
+The lock is re-entrant within a request and fails open if Redis is down, like
+the throttle.
+"""
+
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+import frappe
+from redis.exceptions import RedisError
+
+from franchise_portal.redis_keys import RELEASE_LOCK, client, make_key
+
+# longer than any save takes; a lock left by a crashed worker expires after this
+LOCK_SECONDS = 10
+WAIT_SECONDS = 10
+MIN_POLL_SECONDS = 0.005
+MAX_POLL_SECONDS = 0.1
+
+
+class ApplicationLockTimeout(frappe.ValidationError):
+	pass
+
+
+def lock_key(email):
+	return make_key("application_lock", email.strip().lower())
+
+
+@contextmanager
+def application_lock(email, wait_seconds=WAIT_SECONDS):
+	"""Hold the write lock for the application of `email` for the duration of the block"""
+	identity = (email or "").strip().lower()
+	held = getattr(frappe.local, "franchise_application_locks", None)
+	if held is None:
+		held = frappe.local.franchise_application_locks = set()
+	if not identity or identity in held:
+		yield
+		return
+
+	key = lock_key(identity)
+	owner = str(uuid.uuid4())
+	if not acquire(key, owner, wait_seconds):
+		yield
+		return
+
+	held.add(identity)
+	try:
+		yield
+	finally:
+		held.discard(identity)
+		try:
+			client().eval(RELEASE_LOCK, 1, key, owner)
+		except RedisError:
+			# expires on its own after LOCK_SECONDS
+			pass
+
+
+def acquire(key, owner, wait_seconds):
+	"""Take the lock, waiting up to `wait_seconds`; False if Redis is unavailable"""
+	redis = client()
+	deadline = time.monotonic() + wait_seconds
+	delay = MIN_POLL_SECONDS
+
+	while True:
+		try:
+			if redis.set(key, owner, nx=True, ex=LOCK_SECONDS):
+				return True
+		except RedisError:
+			# never turn applicants away because the lock is unavailable
+			frappe.log_error("Application lock unavailable", "Franchise Portal Lock Error")
+			return False
+
+		if time.monotonic() >= deadline:
+			raise ApplicationLockTimeout("This application is being saved by another request. Please try again.")
+		# jittered exponential backoff, so waiting writers do not wake in lockstep
+		time.sleep(delay * random.uniform(0.5, 1.5))
+		delay = min(delay * 2, MAX_POLL_SECONDS)
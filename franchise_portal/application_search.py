@@ -0,0 +1,246 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Full-text search over signup applications for reviewers
+
+A Whoosh index (Frappe's `FullTextSearch`, stored under the site's `indexes`
+folder) covers company, contact, project, feedstock type and source. Queries
+are ranked by BM25F with earlier fields weighted higher. Each term also matches
+words within one or two edits, so "biomas" finds "Biomass". Results are
+paginated.
+
+Application doc events queue a background re-index of the one document, and
+only when a searchable field or the status changed. Saves made while that
+document's re-index is still queued share the job; a save made once it has
+started queues another. Hot queries are cached in Redis per index generation,
+so any index change invalidates them. Rebuild the whole index with
+`bench build-application-search`. If the index is missing, a rebuild is queued
+on the long queue and searches return no results until it finishes.
+"""
+
+import hashlib
+
+import frappe
+from frappe.search.full_text_search import FullTextSearch, FuzzyTermExtended
+from frappe.utils import cint
+from whoosh.fields import ID, TEXT, Schema
+from whoosh.index import EmptyIndexError, open_dir
+from whoosh.qparser import FieldsPlugin, MultifieldParser, OrGroup, WildcardPlugin
+from whoosh.query import Term
+from whoosh.writing import AsyncWriter
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.export import iter_pages
+from franchise_portal.redis_keys import client, make_key
+
+INDEX_NAME = "franchise_applications"
+# in ranking order: a match in an earlier field counts for more
+SEARCH_FIELDS = ("company_name", "contact_person", "project_name", "specific_feedstock_type", "source")
+INDEX_FIELDS = ("name", "status", *SEARCH_FIELDS)
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 100
+CACHE_TTL_SECONDS = 5 * 60
+BUILD_BATCH_SIZE = 2000
+# per-document job generations only need to outlive a queued job
+JOB_GENERATION_TTL_SECONDS = 24 * 60 * 60
+
+
+class ApplicationSearch(FullTextSearch):
+	def get_schema(self):
+		return Schema(
+			name=ID(stored=True, unique=True),
+			status=ID(stored=True),
+			**{field: TEXT(stored=True) for field in SEARCH_FIELDS},
+		)
+
+	def get_fields_to_search(self):
+		return list(SEARCH_FIELDS)
+
+	def get_id(self):
+		return "name"
+
+	def get_items_to_index(self):
+		for page in iter_pages(list(INDEX_FIELDS), page_size=BUILD_BATCH_SIZE):
+			for row in page:
+				yield to_document(dict(zip(INDEX_FIELDS, row, strict=True)))
+
+	def get_document_to_index(self, name):
+		row = frappe.db.get_value(APPLICATION_DOCTYPE, name, list(INDEX_FIELDS), as_dict=True)
+		return to_document(row) if row else None
+
+	def get_index(self):
+		"""Open the index, or queue a rebuild and return None if there is none yet"""
+		try:
+			return open_dir(self.index_path)
+		except (OSError, EmptyIndexError):
+			enqueue_build()
+			return None
+
+	def build(self, documents=None):
+		"""Recreate the index from `documents` (default: every application) in one writer"""
+		ix = self.create_index()
+		writer = ix.writer(limitmb=256)
+		count = 0
+		for document in documents if documents is not None else self.get_items_to_index():
+			writer.add_document(**document)
+			count += 1
+		writer.commit(optimize=True)
+		bump_generation(self.index_name)
+		return count
+
+	def update_index(self, document):
+		# unlike the base class, don't optimize (merge every segment) on each save
+		self.write(lambda writer: writer.update_document(**document))
+
+	def remove_document_from_index(self, name):
+		self.write(lambda writer: writer.delete_by_term(self.id, name))
+
+	def write(self, change):
+		ix = self.get_index()
+		if ix is None:
+			# the queued rebuild reads every application, this change included
+			return
+		# waits in a thread if another process holds the index lock
+		writer = AsyncWriter(ix)
+		change(writer)
+		writer.commit()
+		bump_generation(self.index_name)
+
+	def search(self, text, status=None, page=1, page_length=DEFAULT_PAGE_LENGTH):
+		"""Ranked, typo-tolerant search; returns one page of results"""
+		ix = self.get_index()
+		if ix is None:
+			return {**empty_result(page_length), "page": page, "indexing": True}
+		parser = MultifieldParser(
+			self.get_fields_to_search(),
+			ix.schema,
+			termclass=FuzzyTermExtended,
+			fieldboosts={field: 1.0 / rank for rank, field in enumerate(SEARCH_FIELDS, start=1)},
+			# rank documents matching more of the words higher, without requiring all of them
+			group=OrGroup.factory(0.9),
+		)
+		parser.remove_plugin_class(FieldsPlugin)
+		parser.remove_plugin_class(WildcardPlugin)
+		query = parser.parse(text)
+
+		with ix.searcher() as searcher:
+			results = searcher.search_page(
+				query, page, pagelen=page_length, filter=Term("status", status) if status else None
+			)
+			return {
+				"results": [self.parse_result(hit) for hit in results],
+				"page": results.pagenum,
+				"page_length": page_length,
+				"total": len(results),
+				"has_more": results.pagenum < results.pagecount,
+			}
+
+	def parse_result(self, hit):
+		return {**{field: hit.get(field) for field in INDEX_FIELDS}, "score": round(hit.score, 4)}
+
+
+def to_document(row):
+	return {field: row.get(field) or "" for field in INDEX_FIELDS}
+
+
+def empty_result(page_length=0):
+	return {"results": [], "page": 1, "page_length": page_length, "total": 0, "has_more": False}
+
+
+def get_search():
+	return ApplicationSearch(INDEX_NAME)
+
+
+def generation_key(index_name):
+	return make_key("search", index_name, "generation")
+
+
+def bump_generation(index_name):
+	client().incr(generation_key(index_name))
+
+
+@frappe.whitelist()
+def search_applications(text, status=None, page=1, page_length=DEFAULT_PAGE_LENGTH):
+	"""Reviewer search across applications, best matches first"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+	text = (text or "").strip()
+	if not text:
+		return empty_result()
+
+	page = max(cint(page), 1)
+	page_length = min(cint(page_length) or DEFAULT_PAGE_LENGTH, MAX_PAGE_LENGTH)
+	generation = cint(client().get(generation_key(INDEX_NAME)))
+	query_hash = hashlib.md5(f"{text.lower()}|{status}|{page}|{page_length}".encode()).hexdigest()
+	cache_key = f"franchise_portal:search:{INDEX_NAME}:{generation}:{query_hash}"
+
+	cached = frappe.cache().get_value(cache_key)
+	if cached is not None:
+		return cached
+
+	result = get_search().search(text, status=status, page=page, page_length=page_length)
+	if not result.get("indexing"):
+		frappe.cache().set_value(cache_key, result, expires_in_sec=CACHE_TTL_SECONDS)
+	return result
+
+
+def on_application_update(doc, method=None):
+	before = doc.get_doc_before_save()
+	if before and all(before.get(field) == doc.get(field) for field in INDEX_FIELDS):
+		return
+	enqueue_index_update(doc.name)
+
+
+def on_application_trash(doc, method=None):
+	enqueue_index_update(doc.name, remove=True)
+
+
+def enqueue_index_update(name, remove=False):
+	# after commit, so that a job that has already started is seen as started
+	frappe.db.after_commit.add(lambda: _enqueue_index_update(name, remove))
+
+
+def _enqueue_index_update(name, remove):
+	generation = cint(client().get(job_generation_key(name)))
+	frappe.enqueue(
+		"franchise_portal.application_search.update_application_index",
+		queue="short",
+		# a job only dedupes saves made before it starts; it bumps the generation first
+		job_id=f"application_search::{name}::{generation}",
+		deduplicate=True,
+		name=name,
+		remove=remove,
+	)
+
+
+def job_generation_key(name):
+	return make_key("search", INDEX_NAME, "job", name)
+
+
+def update_application_index(name, remove=False):
+	key = job_generation_key(name)
+	pipe = client().pipeline()
+	pipe.incr(key)
+	pipe.expire(key, JOB_GENERATION_TTL_SECONDS)
+	pipe.execute()
+
+	search = get_search()
+	# reads the committed row, so a burst of saves indexes only the latest state
+	document = None if remove else search.get_document_to_index(name)
+	if document:
+		search.update_index(document)
+	else:
+		search.remove_document_from_index(name)
+
+
+def enqueue_build():
+	frappe.enqueue(
+		"franchise_portal.application_search.build_index",
+		queue="long",
+		job_id=f"application_search::build::{INDEX_NAME}",
+		deduplicate=True,
+	)
+
+
+def build_index():
+	"""Rebuild the search index from every application; returns the number indexed"""
+	return get_search().build()
@@ -0,0 +1,154 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Dashboard counts of signup applications, maintained incrementally
+
+`Franchise Application Stat` holds one row per (dimension, value), e.g.
+("status", "Submitted"), with the number of applications and their summed
+annual volume, plus a ("total", "") row. Application doc events apply the
+difference between the document before and after the change as one upsert of a
+handful of rows, in the same transaction as the save, so dashboards never scan
+the application table.
+
+Writes that bypass the controller (`db.set_value`, raw SQL) are not seen;
+`rebuild_stats` recounts the table in batches and corrects any drift.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import flt, now
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+
+STATS_DOCTYPE = "Franchise Application Stat"
+TOTAL = "total"
+DIMENSIONS = ("status", "primary_feedstock_category", "project_state")
+CACHE_KEY = "franchise_portal:application_stats"
+CACHE_TTL_SECONDS = 300
+DEFAULT_REBUILD_BATCH_SIZE = 1000
+
+
+def on_application_update(doc, method=None):
+	apply_deltas(get_deltas(doc.get_doc_before_save(), doc))
+
+
+def on_application_trash(doc, method=None):
+	apply_deltas(get_deltas(doc, None))
+
+
+def get_contribution(doc):
+	"""`{(dimension, value): annual_volume}` an application adds to the stats"""
+	if not doc:
+		return {}
+
+	volume = flt(doc.get("annual_volume_available"))
+	contribution = {(TOTAL, ""): volume}
+	for dimension in DIMENSIONS:
+		contribution[(dimension, doc.get(dimension) or "")] = volume
+	return contribution
+
+
+def get_deltas(before, after):
+	"""`{(dimension, value): (count_delta, volume_delta)}` for a change, without no-ops"""
+	deltas = {key: (-1, -volume) for key, volume in get_contribution(before).items()}
+	for key, volume in get_contribution(after).items():
+		count, total = deltas.get(key, (0, 0.0))
+		deltas[key] = (count + 1, total + volume)
+
+	return {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+
+def apply_deltas(deltas):
+	"""Add the deltas to the stat rows in a single statement"""
+	if deltas:
+		_upsert(deltas, "`application_count` + VALUES(`application_count`)", "`annual_volume` + VALUES(`annual_volume`)")
+
+
+@frappe.whitelist()
+def get_dashboard_stats():
+	"""Application counts and volumes by status, feedstock category and state"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+
+	stats = frappe.cache().get_value(CACHE_KEY)
+	if stats is None:
+		stats = build_dashboard_stats()
+		frappe.cache().set_value(CACHE_KEY, stats, expires_in_sec=CACHE_TTL_SECONDS)
+	return stats
+
+
+def build_dashboard_stats():
+	stats = {TOTAL: {"count": 0, "annual_volume": 0.0}, **{dimension: {} for dimension in DIMENSIONS}}
+	for row in frappe.get_all(STATS_DOCTYPE, fields=["dimension", "value", "application_count", "annual_volume"]):
+		totals = {"count": row.application_count, "annual_volume": flt(row.annual_volume)}
+		if row.dimension == TOTAL:
+			stats[TOTAL] = totals
+		elif row.dimension in stats and row.application_count:
+			stats[row.dimension][row.value] = totals
+	return stats
+
+
+def clear_cache():
+	frappe.cache().delete_value(CACHE_KEY)
+
+
+def rebuild_stats(batch_size=None):
+	"""Recount every application in batches and correct the stat rows; returns rows fixed
+
+	Run it when the site is quiet: changes saved while the recount is running can
+	be overwritten by the recount.
+	"""
+	from franchise_portal.export import iter_pages
+
+	expected = {}
+	fields = ["annual_volume_available", *DIMENSIONS]
+	for page in iter_pages(fields, page_size=batch_size or DEFAULT_REBUILD_BATCH_SIZE):
+		for row in page:
+			for key, (count, volume) in get_deltas(None, dict(zip(fields, row, strict=True))).items():
+				current = expected.get(key, (0, 0.0))
+				expected[key] = (current[0] + count, current[1] + volume)
+	expected.setdefault((TOTAL, ""), (0, 0.0))
+
+	stored = {
+		(row.dimension, row.value or ""): (row.application_count, flt(row.annual_volume))
+		for row in frappe.get_all(STATS_DOCTYPE, fields=["dimension", "value", "application_count", "annual_volume"])
+	}
+	wrong = {
+		key: totals
+		for key, totals in expected.items()
+		if key not in stored or stored[key][0] != totals[0] or abs(stored[key][1] - totals[1]) > 1e-6
+	}
+	stale = [key for key in stored if key not in expected]
+
+	if wrong:
+		_upsert(wrong, "VALUES(`application_count`)", "VALUES(`annual_volume`)")
+	if stale:
+		frappe.db.delete(STATS_DOCTYPE, {"name": ("in", [stat_name(*key) for key in stale])})
+	frappe.db.commit()
+
+	return len(wrong) + len(stale)
+
+
+def stat_name(dimension, value):
+	return hashlib.md5(f"{dimension}\n{value}".encode()).hexdigest()
+
+
+def _upsert(totals, count_expression, volume_expression):
+	timestamp, user = now(), frappe.session.user
+	values = []
+	for (dimension, value), (count, volume) in totals.items():
+		values += [stat_name(dimension, value), dimension, value, count, volume, timestamp, timestamp, user, user]
+
+	placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(totals))
+	frappe.db.sql(
+		f"""insert into `tab{STATS_DOCTYPE}`
+			(`name`, `dimension`, `value`, `application_count`, `annual_volume`,
+			`creation`, `modified`, `owner`, `modified_by`)
+		values {placeholders}
+		on duplicate key update
+			`application_count` = {count_expression},
+			`annual_volume` = {volume_expression},
+			`modified` = values(`modified`)""",
+		values,
+	)
+	frappe.db.after_commit.add(clear_cache)
@@ -0,0 +1,105 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Persistence for `Franchise Signup Application`, keyed on the unique `email` column
+
+Every signup endpoint resolves an application by email. This module does that with
+one indexed SELECT that returns the whole row, builds the document from it and hands
+the same row to the controller as its pre-save snapshot, so a save does not read the
+row a second time. Inserts rely on the unique index on `email` instead of a lookup.
+
+Saves made here are applicant autosaves: they are flagged so the controller writes
+a Version row only when the status changes, not on every keystroke batch. Callers
+in the signup API hold `application_lock` for the email around the whole
+load → save → commit.
+"""
+
+import frappe
+
+from franchise_portal.field_map import apply_payload
+
+APPLICATION_DOCTYPE = "Franchise Signup Application"
+NAMING_SERIES = "FSA-.YYYY.-"
+SAVE_ATTEMPTS = 3
+# applications that are final as far as the signup flow is concerned
+SUBMITTED_STATUSES = frozenset(("Submitted", "Approved", "Rejected"))
+
+
+def get_application(email, fields="name"):
+	"""Return `fields` of the application for `email` as a dict, or None"""
+	if not email:
+		return None
+	return frappe.db.get_value(APPLICATION_DOCTYPE, {"email": email}, fields, as_dict=True)
+
+
+def load_application(email):
+	"""Load the application for `email` with a single SELECT, or return None"""
+	row = get_application(email, "*")
+	if not row:
+		return None
+	return doc_from_row(row)
+
+
+def doc_from_row(row):
+	"""Build an existing application document from a full table row without a query"""
+	doc = frappe.get_doc({**row, "doctype": APPLICATION_DOCTYPE})
+	doc.flags.doc_before_save = frappe.get_doc({**row, "doctype": APPLICATION_DOCTYPE})
+	return doc
+
+
+def upsert_application(email, values, status=None, create_status="Draft"):
+	"""Apply `values` to the application for `email`, creating it when missing
+
+	An existing application is moved to `status` (if given); a new one is created
+	with `create_status`. If another request creates the same email between our
+	lookup and insert, the unique index rejects the insert and the values are
+	applied to the row that won instead.
+	"""
+	doc = load_application(email)
+	if doc:
+		return save_application(doc, values, status)
+
+	doc = frappe.new_doc(APPLICATION_DOCTYPE)
+	doc.naming_series = NAMING_SERIES
+	doc.flags.autosave = True
+	apply_payload(doc, values)
+	doc.email = email
+	doc.status = create_status
+
+	# Ensure company_name is set for title generation
+	if not doc.company_name:
+		doc.company_name = "Untitled Application"
+
+	frappe.db.savepoint("application_upsert")
+	try:
+		doc.insert(ignore_permissions=True)
+	except frappe.UniqueValidationError:
+		frappe.db.rollback(save_point="application_upsert")
+		frappe.clear_last_message()
+		return save_application(load_application(email), values, status)
+
+	return doc
+
+
+def save_application(doc, values=None, status=None, from_statuses=None):
+	"""Apply `values` and `status` to a loaded application and save it
+
+	With `from_statuses`, the status only moves from one of those. If the row
+	changed since it was loaded (a desk edit, say), `values` and `status` are
+	applied to the latest version and the save is retried, so neither side's
+	fields are lost. Returns the saved document.
+	"""
+	for attempt in range(SAVE_ATTEMPTS):
+		if values:
+			apply_payload(doc, values)
+		if status and (from_statuses is None or doc.status in from_statuses):
+			doc.status = status
+		doc.flags.autosave = True
+		try:
+			doc.save(ignore_permissions=True)
+			return doc
+		except frappe.TimestampMismatchError:
+			if attempt == SAVE_ATTEMPTS - 1:
+				raise
+			frappe.clear_last_message()
+			doc = load_application(doc.email)
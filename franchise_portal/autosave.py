@@ -0,0 +1,137 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Coalesced autosave for signup applications
+
+The signup page sends only the fields that changed. They are buffered per
+application (keyed by the email, trimmed and lowercased) in a Redis hash, so repeated edits of a field
+overwrite each other in memory. Buffers are written to `Franchise Signup
+Application` in a single save when they are older than the flush interval, or
+straight away when the applicant moves between steps.
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint
+
+from franchise_portal.application_lock import WAIT_SECONDS, ApplicationLockTimeout, application_lock
+from franchise_portal.application_store import (
+	APPLICATION_DOCTYPE,
+	SUBMITTED_STATUSES,
+	load_application,
+	save_application,
+	upsert_application,
+)
+from franchise_portal.field_map import get_field_map
+from franchise_portal.redis_keys import client, decode_hash, dumps, make_key
+
+DEFAULT_FLUSH_SECONDS = 30
+# a buffer nobody flushes (Redis restart aside) should not live forever
+BUFFER_TTL_SECONDS = 24 * 60 * 60
+
+# Delete buffered fields that still hold the value that was written, so edits
+# arriving while the write was in flight stay buffered
+DISCARD_WRITTEN = """
+for i = 2, #ARGV, 2 do
+	if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+		redis.call('HDEL', KEYS[1], ARGV[i])
+	end
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+	redis.call('ZREM', KEYS[2], ARGV[1])
+end
+"""
+
+
+def buffer_key(email):
+	return make_key("autosave", dirty_member(email))
+
+
+def dirty_member(email):
+	# as `application_lock.lock_key`, so callers passing the raw form field agree
+	return (email or "").strip().lower()
+
+
+def dirty_key():
+	return make_key("autosave", "dirty")
+
+
+def buffer_changes(email, changes):
+	"""Merge `changes` into the buffer for `email`; returns the fields accepted"""
+	allowed = get_field_map(APPLICATION_DOCTYPE).allowed
+	accepted = {field: value for field, value in changes.items() if field in allowed}
+	if not accepted:
+		return []
+
+	key = buffer_key(email)
+	pipe = client().pipeline()
+	pipe.hset(key, mapping={field: dumps(value) for field, value in accepted.items()})
+	pipe.expire(key, BUFFER_TTL_SECONDS)
+	# keep the time of the first unflushed change, not the latest one
+	pipe.zadd(dirty_key(), {dirty_member(email): time.time()}, nx=True)
+	pipe.execute()
+
+	return list(accepted)
+
+
+def peek(email):
+	"""Return the buffered changes for `email` without removing them
+
+	Explicit step saves merge these under their own payload and `discard` them
+	after committing, so a stale buffer can never overwrite what the applicant
+	submitted afterwards and a failed save loses nothing.
+	"""
+	if not email:
+		return {}
+	return decode_hash(client().hgetall(buffer_key(email)))
+
+
+def discard(email, changes):
+	"""Drop buffered changes once they are committed to the database"""
+	args = [dirty_member(email)]
+	for field, value in changes.items():
+		args += [field, dumps(value)]
+	client().eval(DISCARD_WRITTEN, 2, buffer_key(email), dirty_key(), *args)
+
+
+def flush(email, lock_wait_seconds=WAIT_SECONDS):
+	"""Write the buffered changes for `email` to the application, unless it is already submitted"""
+	with application_lock(email, lock_wait_seconds):
+		changes = peek(email)
+		if not changes:
+			# buffer expired or already written; just clear the dirty marker
+			discard(email, changes)
+			return None
+
+		doc = load_application(email)
+		if doc and doc.status in SUBMITTED_STATUSES:
+			# edits buffered before the submission landed; the submitted application wins
+			discard(email, changes)
+			return None
+
+		if doc:
+			doc = save_application(doc, changes, status="In Progress", from_statuses=("Draft",))
+		else:
+			doc = upsert_application(email, changes, create_status="Draft")
+		frappe.db.commit()
+		discard(email, changes)
+		return doc.name
+
+
+def flush_due():
+	"""Flush every buffer that has been waiting longer than the flush interval"""
+	interval = cint(frappe.conf.get("franchise_autosave_flush_seconds")) or DEFAULT_FLUSH_SECONDS
+	emails = client().zrangebyscore(dirty_key(), "-inf", time.time() - interval)
+
+	for email in emails:
+		email = frappe.safe_decode(email)
+		try:
+			# a request writing this application right now folds the buffer in itself
+			flush(email, lock_wait_seconds=0)
+		except ApplicationLockTimeout:
+			continue
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(f"Error flushing autosave for {email}", "Franchise Portal Autosave Error")
+
@@ -0,0 +1,121 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Benchmarks for the signup flow
+
+Each module exposes a `run` function meant to be executed against a development
+site, e.g.
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.outbox.run
+
+Nothing here is imported by the app at runtime.
+"""
+
+import math
+import socketserver
+import threading
+import time
+
+
+def percentile(samples, pct):
+	"""Nearest-rank percentile of a list of numbers"""
+	if not samples:
+		return 0.0
+	ordered = sorted(samples)
+	rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+	return ordered[rank]
+
+
+def summarize(samples):
+	"""Latency summary in milliseconds for a list of durations in seconds"""
+	return {
+		"count": len(samples),
+		"mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+		"p50_ms": round(percentile(samples, 50) * 1000, 2),
+		"p95_ms": round(percentile(samples, 95) * 1000, 2),
+		"p99_ms": round(percentile(samples, 99) * 1000, 2),
+		"max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+	}
+
+
+def timed(fn, *args, **kwargs):
+	"""Call `fn` and return `(result, elapsed_seconds)`"""
+	started = time.perf_counter()
+	result = fn(*args, **kwargs)
+	return result, time.perf_counter() - started
+
+
+def print_table(title, rows):
+	"""Print `{label: summary}` rows as a fixed-width table"""
+	print(f"\n{title}")
+	print(f"{'':<32}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+	for label, summary in rows.items():
+		print(
+			f"{label:<32}{summary['count']:>8}{summary['mean_ms']:>10}{summary['p50_ms']:>10}"
+			f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}{summary['max_ms']:>10}"
+		)
+
+
+class _SlowSMTPHandler(socketserver.StreamRequestHandler):
+	"""Just enough SMTP for smtplib, with a configurable delay per message"""
+
+	def handle(self):
+		self.reply("220 localhost slow-smtp ready")
+		while True:
+			line = self.rfile.readline()
+			if not line:
+				break
+
+			command = line.decode(errors="replace").strip().upper()
+			if command.startswith(("EHLO", "HELO")):
+				self.reply("250 localhost")
+			elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+				self.reply("250 OK")
+			elif command == "DATA":
+				self.reply("354 End data with <CR><LF>.<CR><LF>")
+				while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+					pass
+				time.sleep(self.server.delay)
+				self.server.record_delivery()
+				self.reply("250 OK queued")
+			elif command == "QUIT":
+				self.reply("221 Bye")
+				break
+			else:
+				self.reply("502 Command not implemented")
+
+	def reply(self, text):
+		self.wfile.write(f"{text}\r\n".encode())
+
+
+class SlowSMTPServer(socketserver.ThreadingTCPServer):
+	"""Local SMTP stand-in that accepts everything and answers slowly
+
+	Use as a context manager; `port` is picked by the OS.
+	"""
+
+	daemon_threads = True
+	allow_reuse_address = True
+
+	def __init__(self, delay=0.2):
+		super().__init__(("127.0.0.1", 0), _SlowSMTPHandler)
+		self.delay = delay
+		self.delivered = 0
+		self._lock = threading.Lock()
+
+	@property
+	def port(self):
+		return self.server_address[1]
+
+	def record_delivery(self):
+		with self._lock:
+			self.delivered += 1
+
+	def __enter__(self):
+		threading.Thread(target=self.serve_forever, daemon=True).start()
+		return self
+
+	def __exit__(self, *exc):
+		self.shutdown()
+		self.server_close()
+
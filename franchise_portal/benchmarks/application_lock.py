@@ -0,0 +1,133 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Concurrent writers on one application
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.application_lock.run \\
+        --kwargs "{'url': 'http://mysite.localhost:8000', 'writers': 10}"
+
+Needs a running web server with several workers (gunicorn `-w`), and the
+`save_step` limits switched off in site config:
+
+    "franchise_signup_rate_limits": {"save_step": {}}
+
+Every writer saves its own field of the same application with `save_step` as
+fast as it can, each save carrying a new value. Reports the save throughput,
+latency and failures, and checks that every writer's last acknowledged value is
+in the row, i.e. that no write was lost.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+import requests as http
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE, get_application
+from franchise_portal.benchmarks import print_table, summarize
+from franchise_portal.throttle import get_limits
+
+SAVE_STEP = "/api/method/franchise_portal.www.signup.api.save_step"
+EMAIL = "lock-bench@example.com"
+# one field per writer, so a lost update shows up as a stale value
+FIELDS = (
+	"contact_person",
+	"phone_number",
+	"company_address",
+	"project_name",
+	"project_id",
+	"project_city",
+	"project_state",
+	"specific_feedstock_type",
+	"source",
+	"payment_details",
+	"other_contaminants",
+	"seasonal_months",
+	"current_use_disposal_method",
+)
+
+
+def run(url=None, writers=10, seconds=15):
+	url = (url or frappe.utils.get_url()).rstrip("/")
+	writers, seconds = int(writers), int(seconds)
+	if writers > len(FIELDS):
+		frappe.throw(f"At most {len(FIELDS)} writers are supported")
+	if get_limits("save_step"):
+		frappe.throw('Set "franchise_signup_rate_limits": {"save_step": {}} in site config first')
+
+	try:
+		result = _measure(url, writers, seconds)
+		frappe.db.rollback()
+		row = get_application(EMAIL, list(FIELDS[:writers]))
+	finally:
+		_cleanup()
+
+	print_table(
+		f"save_step on one application, {writers} concurrent writers for {seconds}s",
+		{"save_step": summarize(result["latency"])},
+	)
+	lost = [
+		field
+		for field, value in result["last_acknowledged"].items()
+		if row is None or row.get(field) != value
+	]
+	print(
+		f"\n{result['ok']}/{result['sent']} saves succeeded ({result['ok'] / seconds:.1f}/s), "
+		f"{result['sent'] - result['ok']} failed"
+	)
+	for message, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+		print(f"  {count:>6}  {message}")
+	print(f"lost writes: {', '.join(lost) if lost else 'none'}")
+
+
+def _measure(url, writers, seconds):
+	deadline = time.monotonic() + seconds
+	lock = threading.Lock()
+	result = {"latency": [], "sent": 0, "ok": 0, "errors": {}, "last_acknowledged": {}}
+
+	def writer(i):
+		session = http.Session()
+		# one IP per writer, as with separate browser tabs behind different networks
+		headers = {"X-Forwarded-For": f"198.51.100.{i + 1}"}
+		field = FIELDS[i]
+		n = 0
+		while time.monotonic() < deadline:
+			value = f"writer {i} save {n}"
+			n += 1
+			started = time.perf_counter()
+			error = _save_step(session, url, headers, {field: value})
+			elapsed = time.perf_counter() - started
+			with lock:
+				result["sent"] += 1
+				result["latency"].append(elapsed)
+				if error:
+					result["errors"][error] = result["errors"].get(error, 0) + 1
+				else:
+					result["ok"] += 1
+					result["last_acknowledged"][field] = value
+
+	with ThreadPoolExecutor(max_workers=writers) as executor:
+		for i in range(writers):
+			executor.submit(writer, i)
+
+	return result
+
+
+def _save_step(session, url, headers, values):
+	"""Save `values`; returns None on success or a short error description"""
+	data = {"email": EMAIL, "company_name": "Lock Benchmark", **values}
+	try:
+		response = session.post(f"{url}{SAVE_STEP}", data={"data": json.dumps(data)}, headers=headers, timeout=60)
+		message = response.json().get("message") or {}
+	except (http.RequestException, ValueError) as e:
+		return type(e).__name__
+	if response.ok and message.get("success"):
+		return None
+	return str(message.get("message") or response.status_code)[:80]
+
+
+def _cleanup():
+	frappe.db.delete(APPLICATION_DOCTYPE, {"email": EMAIL})
+	frappe.db.commit()
@@ -0,0 +1,90 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Reviewer search over a large synthetic index
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.application_search.run \\
+        --kwargs "{'applications': 100000}"
+
+Builds a throwaway index of generated applications (nothing is written to the
+database), then times exact, misspelt, multi-word and status-filtered queries
+against it. The `LIKE` baseline is a substring scan over the same rows in
+Python, roughly what `company_name like '%...%'` costs the database, without
+ranking or typo tolerance.
+"""
+
+import random
+import shutil
+
+from franchise_portal.application_search import ApplicationSearch
+from franchise_portal.benchmarks import print_table, summarize, timed
+
+INDEX_NAME = "franchise_applications_benchmark"
+TARGET_MS = 50
+WORDS = (
+	"green", "carbon", "biomass", "agro", "renewable", "energy", "farms", "rural", "solutions",
+	"husk", "straw", "bagasse", "char", "organic", "harvest", "valley", "sun", "river", "delta", "earth",
+)  # fmt: skip
+PEOPLE = ("Asha", "Ravi", "Meera", "Vikram", "Priya", "Arjun", "Kavya", "Rohan", "Nisha", "Sanjay")
+FEEDSTOCKS = ("Rice Husk", "Wheat Straw", "Sugarcane Bagasse", "Cotton Stalk", "Coconut Shell", "Corn Cob")
+STATUSES = ("Draft", "Submitted", "Under Review", "Approved", "Rejected")
+QUERIES = {
+	"exact word": "biomass",
+	"typo": "biomas",
+	"two typos": "bagase husc",
+	"multi-word": "green carbon farms",
+	"person": "Meera",
+}
+
+
+def run(applications=100000, repeat=50, seed=42):
+	applications, repeat = int(applications), int(repeat)
+	rng = random.Random(seed)
+	rows = [_application(rng, i) for i in range(applications)]
+	search = ApplicationSearch(INDEX_NAME)
+
+	try:
+		count, elapsed = timed(search.build, rows)
+		print(f"Indexed {count} applications in {elapsed:.1f}s")
+
+		results = {}
+		for label, text in QUERIES.items():
+			results[f"search: {label}"] = _time(repeat, search.search, text)
+			results[f"LIKE scan: {label}"] = _time(max(repeat // 10, 1), _scan, rows, text)
+		results["search: filtered by status"] = _time(repeat, search.search, "carbon", status="Under Review")
+		results["search: page 10"] = _time(repeat, search.search, "energy", page=10)
+	finally:
+		shutil.rmtree(search.index_path, ignore_errors=True)
+
+	summaries = {label: summarize(samples) for label, samples in results.items()}
+	print_table(f"Search over {applications} applications", summaries)
+	slow = [
+		label for label, summary in summaries.items() if label.startswith("search") and summary["p95_ms"] > TARGET_MS
+	]
+	print(f"\np95 over {TARGET_MS} ms: {', '.join(slow) if slow else 'none'}")
+
+
+def _time(repeat, fn, *args, **kwargs):
+	return [timed(fn, *args, **kwargs)[1] for _ in range(repeat)]
+
+
+def _scan(rows, text):
+	words = text.lower().split()
+	return [
+		row
+		for row in rows
+		if any(word in row["company_name"].lower() or word in row["contact_person"].lower() for word in words)
+	]
+
+
+def _application(rng, i):
+	company = " ".join(rng.sample(WORDS, 3)).title()
+	return {
+		"name": f"FSA-BENCH-{i:07d}",
+		"status": rng.choice(STATUSES),
+		"company_name": f"{company} Pvt Ltd",
+		"contact_person": f"{rng.choice(PEOPLE)} {rng.choice(PEOPLE)}an",
+		"project_name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Project {i}",
+		"specific_feedstock_type": rng.choice(FEEDSTOCKS),
+		"source": rng.choice(("Farm", "Mill", "Cooperative", "Aggregator")),
+	}
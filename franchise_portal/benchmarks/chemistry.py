@@ -0,0 +1,74 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Vectorized chemistry derivation against a per-row Python loop
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.chemistry.run \\
+        --kwargs "{'applications': 100000}"
+
+Generates `applications` sets of analyses in memory (a fifth of the values left
+blank) and derives them with `derive` over NumPy arrays and with `derive_row`
+in a loop, checking that both give the same results. With `from_site=True` it
+also times loading the site's real applications with `load_columns`.
+"""
+
+import random
+
+import numpy as np
+
+from franchise_portal.benchmarks import print_table, summarize, timed
+from franchise_portal.chemistry import (
+	FLOAT_DERIVED_FIELDS,
+	INPUT_FIELDS,
+	derive,
+	derive_row,
+	load_columns,
+)
+
+BLANK_RATE = 0.2
+# plausible dry-basis ranges for biomass, in %
+RANGES = {
+	"carbon_content": (40, 55),
+	"hydrogen_content": (4, 7),
+	"nitrogen_content": (0.1, 2),
+	"oxygen_content": (30, 45),
+	"sulfur_content": (0, 0.5),
+	"fixed_carbon": (10, 25),
+	"volatile_matter": (65, 85),
+	"ash_content": (0.5, 15),
+}
+
+
+def run(applications=100000, repeat=5, seed=42, from_site=False):
+	applications, repeat = int(applications), int(repeat)
+	rng = random.Random(seed)
+	rows = [
+		{field: 0.0 if rng.random() < BLANK_RATE else rng.uniform(*RANGES[field]) for field in INPUT_FIELDS}
+		for _ in range(applications)
+	]
+	columns = {field: np.array([row[field] for row in rows]) for field in INPUT_FIELDS}
+
+	vectorized, loop = [], []
+	for _ in range(repeat):
+		derived, elapsed = timed(derive, columns)
+		vectorized.append(elapsed)
+		expected, elapsed = timed(lambda: [derive_row(row) for row in rows])
+		loop.append(elapsed)
+	_compare(derived, expected)
+
+	results = {"NumPy derive": summarize(vectorized), "per-row loop": summarize(loop)}
+	if from_site:
+		results["load_columns (site)"] = summarize(
+			[timed(load_columns, list(INPUT_FIELDS))[1] for _ in range(repeat)]
+		)
+	print_table(f"Derived chemistry for {applications} applications", results)
+	speedup = results["per-row loop"]["p50_ms"] / max(results["NumPy derive"]["p50_ms"], 1e-3)
+	print(f"\nNumPy is {speedup:.0f}x faster at the median")
+
+
+def _compare(derived, expected):
+	for field in FLOAT_DERIVED_FIELDS:
+		if not np.allclose(derived[field], [row[field] for row in expected], rtol=0, atol=1e-9):
+			raise AssertionError(f"derive and derive_row disagree on {field}")
+	if list(derived["chemistry_check"]) != [row["chemistry_check"] for row in expected]:
+		raise AssertionError("derive and derive_row disagree on chemistry_check")
@@ -0,0 +1,94 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Applying a full signup payload: the old hasattr/setattr loop versus the field map
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.field_map.run \\
+        --kwargs "{'documents': 20000}"
+
+Both variants copy the same browser-style payload (every value a string) onto
+existing documents in memory; nothing is written to the database. Timings are
+per batch of `batch_size` documents.
+"""
+
+import frappe
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.benchmarks import print_table, summarize, timed
+from franchise_portal.field_map import apply_payload, get_field_map
+
+PAYLOAD = {
+	"company_name": "Benchmark Biomass Ltd",
+	"contact_person": "A. Tester",
+	"email": "bench@example.com",
+	"phone_number": "+91 90000 00000",
+	"company_address": "1 Mill Road",
+	"project_name": "Pellet Line 2",
+	"project_id": "PRJ-0001",
+	"project_city": "Surat",
+	"project_state": "Gujarat",
+	"gps_coordinates": "21.170240, 72.831062",
+	"project_start_date": "2025-01-15",
+	"specific_feedstock_type": "Rice husk",
+	"source": "Local mills",
+	"payment_details": "Per tonne",
+	"carbon_content": "48.5",
+	"hydrogen_content": "6.1",
+	"nitrogen_content": "0.4",
+	"oxygen_content": "44.2",
+	"sulfur_content": "0.1",
+	"fixed_carbon": "17.3",
+	"volatile_matter": "68.2",
+	"ash_content": "14.5",
+	"moisture_content": "9.8",
+	"heating_value": "15.2",
+	"r0_measurement": "0.8",
+	"annual_volume_available": "12000",
+	"seasonal_months": "Oct-Mar",
+	"current_use_disposal_method": "Open burning",
+	"current_step": "3",
+	"idempotency_key": "ignored",
+	"cmd": "ignored",
+}
+
+
+def run(documents=20000, batch_size=500):
+	documents, batch_size = int(documents), int(batch_size)
+	docs = [frappe.get_doc({"doctype": APPLICATION_DOCTYPE, "name": f"BENCH-{i}"}) for i in range(batch_size)]
+	field_map = get_field_map(APPLICATION_DOCTYPE)
+	batches = max(1, documents // batch_size)
+
+	def legacy_batch():
+		for doc in docs:
+			_legacy_apply(doc, PAYLOAD)
+
+	def field_map_batch():
+		for doc in docs:
+			apply_payload(doc, PAYLOAD, field_map)
+
+	# warm up both paths before measuring
+	legacy_batch()
+	field_map_batch()
+
+	print_table(
+		f"Applying a {len(PAYLOAD)}-key payload, per batch of {batch_size} documents",
+		{
+			"hasattr/setattr loop": summarize([timed(legacy_batch)[1] for _ in range(batches)]),
+			"field map": summarize([timed(field_map_batch)[1] for _ in range(batches)]),
+		},
+	)
+
+
+def _legacy_apply(doc, values):
+	"""The loop the save paths used before the field map (no coercion)"""
+	for key, value in values.items():
+		if key in ("name", "doctype"):
+			continue
+		if hasattr(doc, key):
+			setattr(doc, key, value)
+
+	if "project_city" in values or "project_state" in values:
+		city = doc.get("project_city") or ""
+		state = doc.get("project_state") or ""
+		if city or state:
+			doc.project_location = ", ".join(part for part in (city, state) if part)
@@ -0,0 +1,84 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Request latency with inline SMTP versus the mail outbox
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.outbox.run \\
+        --kwargs "{'requests': 50, 'smtp_delay_ms': 300}"
+
+Each simulated request sends the two mails `finalize_application` sends. The
+inline variant talks to a slow local SMTP stand-in the way `sendmail(now=True)`
+did; the outbox variant only inserts rows. The rows are then drained through
+the same stand-in to show background throughput.
+"""
+
+import smtplib
+import time
+from email.message import EmailMessage
+from unittest.mock import patch
+
+import frappe
+
+from franchise_portal import outbox
+from franchise_portal.benchmarks import SlowSMTPServer, print_table, summarize, timed
+
+MAILS_PER_REQUEST = 2
+SUBJECT_PREFIX = "[outbox benchmark]"
+
+
+def run(requests=50, smtp_delay_ms=300, batch_size=25):
+	requests, batch_size = int(requests), int(batch_size)
+
+	with SlowSMTPServer(delay=int(smtp_delay_ms) / 1000) as smtp:
+
+		def smtp_send(row):
+			message = EmailMessage()
+			message["From"] = "benchmark@localhost"
+			message["To"] = row.recipients.replace("\n", ", ")
+			message["Subject"] = row.subject
+			message.set_content(row.message)
+			with smtplib.SMTP("127.0.0.1", smtp.port) as client:
+				client.send_message(message)
+
+		def inline_request(i):
+			for n in range(MAILS_PER_REQUEST):
+				smtp_send(_fake_row(i, n))
+
+		def outbox_request(i):
+			for n in range(MAILS_PER_REQUEST):
+				row = _fake_row(i, n)
+				outbox.enqueue_mail(row.recipients, row.subject, row.message)
+			frappe.db.commit()
+
+		# the benchmark drains explicitly; don't let an RQ worker race it with real SMTP
+		with patch.object(outbox, "schedule_drain"), patch.object(outbox, "_send", smtp_send):
+			inline = [timed(inline_request, i)[1] for i in range(requests)]
+			queued = [timed(outbox_request, i)[1] for i in range(requests)]
+
+			started = time.perf_counter()
+			delivered = outbox.drain_outbox(batch_size=batch_size, max_batches=requests)
+			drain_seconds = time.perf_counter() - started
+
+	_cleanup()
+
+	print_table(
+		f"Request latency, {MAILS_PER_REQUEST} mails per request, SMTP delay {smtp_delay_ms} ms",
+		{"inline sendmail(now=True)": summarize(inline), "outbox enqueue": summarize(queued)},
+	)
+	print(
+		f"\nBackground drain: {delivered} mails in {drain_seconds:.2f} s "
+		f"({delivered / drain_seconds if drain_seconds else 0:.1f} mails/s, batch size {batch_size})"
+	)
+
+
+def _fake_row(i, n):
+	return frappe._dict(
+		recipients=f"applicant{i}@example.com",
+		subject=f"{SUBJECT_PREFIX} request {i} mail {n}",
+		message="<p>Benchmark message</p>",
+	)
+
+
+def _cleanup():
+	frappe.db.delete(outbox.OUTBOX_DOCTYPE, {"subject": ("like", f"{SUBJECT_PREFIX}%")})
+	frappe.db.commit()
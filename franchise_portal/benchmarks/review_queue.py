@@ -0,0 +1,89 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Review queue pagination: keyset cursor against LIMIT/OFFSET
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.review_queue.run \\
+        --kwargs "{'applications': 50000}"
+
+Inserts `applications` Submitted rows (removed again afterwards). It then walks
+the queue to page 1000 through `get_review_queue` cursors and times pages 1,
+10, 100 and 1000. The same pages are also read the old way, `get_all` with
+every column and `limit_start`.
+"""
+
+import random
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.benchmarks import print_table, summarize, timed
+from franchise_portal.review_queue import get_review_queue
+
+NAME_PREFIX = "QBENCH-"
+PAGES = (1, 10, 100, 1000)
+CATEGORIES = ("Agricultural Residues", "Forestry Thinnings", "Industrial Biomass Residues", "Urban Green Waste")
+BATCH_SIZE = 5000
+
+
+def run(applications=50000, page_length=20, repeat=5, seed=42):
+	applications, page_length, repeat = int(applications), int(page_length), int(repeat)
+	if applications < PAGES[-1] * page_length:
+		frappe.throw(f"Needs at least {PAGES[-1] * page_length} applications to reach page {PAGES[-1]}")
+
+	try:
+		_seed(applications, random.Random(seed))
+		keyset = {page: [] for page in PAGES}
+		offset = {page: [] for page in PAGES}
+		for _ in range(repeat):
+			cursor = None
+			for page in range(1, PAGES[-1] + 1):
+				result, elapsed = timed(get_review_queue, cursor=cursor, page_length=page_length)
+				cursor = result["next_cursor"]
+				if page in keyset:
+					keyset[page].append(elapsed)
+			for page in PAGES:
+				offset[page].append(timed(_offset_page, page, page_length)[1])
+	finally:
+		frappe.db.delete(APPLICATION_DOCTYPE, {"name": ["like", f"{NAME_PREFIX}%"]})
+		frappe.db.commit()
+
+	rows = {f"keyset page {page}": summarize(samples) for page, samples in keyset.items()}
+	rows.update({f"offset page {page}": summarize(samples) for page, samples in offset.items()})
+	print_table(f"Review queue over {applications} applications, {page_length} per page", rows)
+
+
+def _offset_page(page, page_length):
+	return frappe.get_all(
+		APPLICATION_DOCTYPE,
+		fields=["*"],
+		filters={"status": "Submitted"},
+		order_by="modified desc",
+		limit_start=(page - 1) * page_length,
+		limit_page_length=page_length,
+	)
+
+
+def _seed(applications, rng):
+	fields = ["name", "email", "company_name", "status", "primary_feedstock_category", "creation", "modified"]
+	start = add_to_date(now_datetime(), days=-365)
+	for batch in range(0, applications, BATCH_SIZE):
+		values = []
+		for i in range(batch, min(batch + BATCH_SIZE, applications)):
+			# whole seconds, so plenty of rows tie on modified
+			modified = add_to_date(start, seconds=rng.randrange(365 * 24 * 60 * 60))
+			values.append(
+				(
+					f"{NAME_PREFIX}{i:07d}",
+					f"queue-bench-{i}@example.com",
+					f"Queue Benchmark {i}",
+					"Submitted",
+					rng.choice(CATEGORIES),
+					modified,
+					modified,
+				)
+			)
+		frappe.db.bulk_insert(APPLICATION_DOCTYPE, fields, values)
+		frappe.db.commit()
+
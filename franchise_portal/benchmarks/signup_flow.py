@@ -0,0 +1,185 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Concurrent end-to-end load test of the verified signup flow
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.signup_flow.run \\
+        --kwargs "{'url': 'http://mysite.localhost:8000', 'users': 200, 'concurrency': 50}"
+
+Needs a running web server and workers. Every simulated applicant runs
+`send_verification_email` -> `verify_email` -> `save_step_with_verification`
+for steps 1 to 3, the last one finalizing the application, over HTTP with its
+own session and client IP (`X-Forwarded-For`, so the signup throttle sees
+separate clients). The verification token comes back in the API response, so no
+mailbox is read.
+
+Mail goes to a sink: the run refuses to start unless `mute_emails` is set in the
+site config, so the outbox rows the flow queues are processed by the workers as
+usual but never reach SMTP.
+
+The report has throughput, p50/p95/p99 per endpoint and the InnoDB row lock
+waits and deadlocks that happened during the run. Pass `save_baseline=True` to
+store the results in the site folder. Later runs are compared against it.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+import requests as http
+
+from franchise_portal.application_stats import rebuild_stats
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.benchmarks import print_table, summarize
+from franchise_portal.outbox import OUTBOX_DOCTYPE
+
+API = "/api/method/franchise_portal.www.signup.api."
+EMAIL_PREFIX = "loadtest-"
+BASELINE_FILE = "franchise_signup_flow_baseline.json"
+LOCK_STATUS = ("Innodb_row_lock_waits", "Innodb_row_lock_time", "Innodb_deadlocks")
+
+
+def run(url=None, users=100, concurrency=25, save_baseline=False):
+	if not frappe.conf.get("mute_emails"):
+		frappe.throw("Set mute_emails in site_config.json before running the load test")
+
+	url = (url or frappe.utils.get_url()).rstrip("/")
+	users, concurrency = int(users), int(concurrency)
+
+	timings = {}
+	errors = {}
+	lock = threading.Lock()
+
+	def record(endpoint, elapsed, ok):
+		with lock:
+			timings.setdefault(endpoint, []).append(elapsed)
+			if not ok:
+				errors[endpoint] = errors.get(endpoint, 0) + 1
+
+	locks_before = _lock_status()
+	started = time.perf_counter()
+	try:
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			completed = sum(executor.map(lambda i: _applicant(url, i, record), range(users)))
+		elapsed = time.perf_counter() - started
+		locks = {key: _lock_status().get(key, 0) - value for key, value in locks_before.items()}
+	finally:
+		_cleanup()
+
+	result = {
+		"users": users,
+		"concurrency": concurrency,
+		"completed": completed,
+		"seconds": round(elapsed, 2),
+		"flows_per_second": round(completed / elapsed, 2),
+		"requests_per_second": round(sum(map(len, timings.values())) / elapsed, 2),
+		"endpoints": {endpoint: summarize(samples) for endpoint, samples in timings.items()},
+		"errors": errors,
+		"locks": locks,
+	}
+	_report(result, _load_baseline())
+
+	if save_baseline:
+		with open(_baseline_path(), "w") as f:
+			json.dump(result, f, indent=1)
+		print(f"\nBaseline saved to {_baseline_path()}")
+
+	return result
+
+
+def _applicant(url, i, record):
+	"""Run the whole flow for one applicant; returns True if it was finalized"""
+	session = http.Session()
+	session.headers["X-Forwarded-For"] = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+	email = f"{EMAIL_PREFIX}{i}-{frappe.generate_hash(length=6)}@example.com"
+	steps = {
+		1: {"email": email, "company_name": f"Load Test {i}", "contact_person": "Load Tester"},
+		2: {"project_name": f"Project {i}", "project_city": "Pune", "project_state": "Maharashtra"},
+		3: {"primary_feedstock_category": "Agricultural Residues", "annual_volume_available": 1000 + i},
+	}
+
+	response = _call(session, url, "send_verification_email", record, email=email, data=steps[1])
+	token = response.get("verification_token")
+	if not token:
+		return False
+	if not _call(session, url, "verify_email", record, token=token).get("success"):
+		return False
+
+	for step, data in steps.items():
+		response = _call(
+			session, url, "save_step_with_verification", record, label=f"[{step}]", token=token, data=data, step=step
+		)
+		if not response.get("success"):
+			return False
+	return True
+
+
+def _call(session, url, method, record, label="", **data):
+	payload = {key: json.dumps(value) if isinstance(value, dict) else value for key, value in data.items()}
+	started = time.perf_counter()
+	message = {}
+	try:
+		response = session.post(f"{url}{API}{method}", data=payload, timeout=60)
+		if response.ok:
+			message = response.json().get("message") or {}
+	except (http.RequestException, ValueError):
+		pass
+	record(method + label, time.perf_counter() - started, bool(message.get("success")))
+	return message
+
+
+def _lock_status():
+	rows = frappe.db.sql("show global status where Variable_name in %s", [LOCK_STATUS])
+	return {name: int(value) for name, value in rows}
+
+
+def _report(result, baseline):
+	print_table(
+		f"{result['users']} applicants, {result['concurrency']} concurrent",
+		result["endpoints"],
+	)
+	print(
+		f"\n{result['completed']}/{result['users']} flows completed in {result['seconds']} s: "
+		f"{result['flows_per_second']} flows/s, {result['requests_per_second']} requests/s"
+	)
+	if result["errors"]:
+		print("Failed requests: " + ", ".join(f"{endpoint} {count}" for endpoint, count in result["errors"].items()))
+	print("Lock activity: " + ", ".join(f"{name} {value}" for name, value in result["locks"].items()))
+
+	if not baseline:
+		return
+
+	print(f"\nAgainst baseline ({baseline['users']} applicants, {baseline['concurrency']} concurrent)")
+	print(f"{'flows/s':<44}{baseline['flows_per_second']:>10} -> {result['flows_per_second']}")
+	for endpoint, summary in result["endpoints"].items():
+		previous = baseline["endpoints"].get(endpoint)
+		if previous:
+			print(f"{endpoint + ' p95 ms':<44}{previous['p95_ms']:>10} -> {summary['p95_ms']}")
+	for name, value in result["locks"].items():
+		print(f"{name:<44}{baseline['locks'].get(name, 0):>10} -> {value}")
+
+
+def _baseline_path():
+	return frappe.get_site_path(BASELINE_FILE)
+
+
+def _load_baseline():
+	if not os.path.exists(_baseline_path()):
+		return None
+	with open(_baseline_path()) as f:
+		return json.load(f)
+
+
+def _cleanup():
+	names = frappe.get_all(APPLICATION_DOCTYPE, filters={"email": ("like", f"{EMAIL_PREFIX}%")}, pluck="name")
+	if names:
+		frappe.db.delete("Version", {"ref_doctype": APPLICATION_DOCTYPE, "docname": ("in", names)})
+		frappe.db.delete(OUTBOX_DOCTYPE, {"reference_name": ("in", names)})
+		frappe.db.delete(APPLICATION_DOCTYPE, {"name": ("in", names)})
+	frappe.db.delete(OUTBOX_DOCTYPE, {"recipients": ("like", f"{EMAIL_PREFIX}%")})
+	frappe.db.commit()
+	# the rows were deleted behind the doc events
+	rebuild_stats()
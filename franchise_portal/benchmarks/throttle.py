@@ -0,0 +1,123 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Legitimate signup traffic with and without a scripted flood
+
+    bench --site mysite.localhost execute franchise_portal.benchmarks.throttle.run \\
+        --kwargs "{'url': 'http://mysite.localhost:8000', 'flood_clients': 20}"
+
+Needs a running web server. A few paced "applicants", each with their own IP
+and email, save steps first on their own and then while flood clients hammer
+`save_step` from one IP with random emails. Client IPs are set through
+`X-Forwarded-For`, which Frappe trusts for `request_ip`, so run this only
+against a development site.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+import requests as http
+
+from franchise_portal.application_events import status_cache_key
+from franchise_portal.application_search import enqueue_build
+from franchise_portal.application_stats import rebuild_stats
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.benchmarks import print_table, summarize
+
+SAVE_STEP = "/api/method/franchise_portal.www.signup.api.save_step"
+EMAIL_PREFIX = "throttle-bench-"
+
+
+def run(url=None, legit_clients=4, flood_clients=20, seconds=15, legit_interval_ms=2000):
+	url = (url or frappe.utils.get_url()).rstrip("/")
+	legit_clients, flood_clients, seconds = int(legit_clients), int(flood_clients), int(seconds)
+	interval = int(legit_interval_ms) / 1000
+
+	try:
+		baseline = _measure(url, legit_clients, 0, seconds, interval)
+		flooded = _measure(url, legit_clients, flood_clients, seconds, interval)
+	finally:
+		_cleanup()
+
+	print_table(
+		f"Paced save_step latency, {legit_clients} applicants, one save every {legit_interval_ms} ms",
+		{
+			"alone": summarize(baseline["legit_latency"]),
+			f"under flood ({flood_clients} clients)": summarize(flooded["legit_latency"]),
+		},
+	)
+	for label, result in (("alone", baseline), ("under flood", flooded)):
+		print(
+			f"\n{label}: applicants {result['legit_ok']}/{result['legit_sent']} saved, "
+			f"flood {result['flood_sent']} sent, {result['flood_throttled']} throttled "
+			f"({result['flood_sent'] / seconds:.0f} req/s)"
+		)
+
+
+def _measure(url, legit_clients, flood_clients, seconds, interval):
+	deadline = time.monotonic() + seconds
+	lock = threading.Lock()
+	result = {
+		"legit_latency": [],
+		"legit_sent": 0,
+		"legit_ok": 0,
+		"flood_sent": 0,
+		"flood_throttled": 0,
+	}
+
+	def applicant(i):
+		session = http.Session()
+		headers = {"X-Forwarded-For": f"198.51.100.{i + 1}"}
+		while time.monotonic() < deadline:
+			started = time.perf_counter()
+			ok = _save_step(session, url, headers, f"{EMAIL_PREFIX}applicant{i}@example.com")
+			elapsed = time.perf_counter() - started
+			with lock:
+				result["legit_sent"] += 1
+				result["legit_ok"] += ok
+				result["legit_latency"].append(elapsed)
+			time.sleep(max(0, interval - elapsed))
+
+	def flood(i):
+		session = http.Session()
+		headers = {"X-Forwarded-For": "203.0.113.66"}
+		n = 0
+		while time.monotonic() < deadline:
+			ok = _save_step(session, url, headers, f"{EMAIL_PREFIX}flood{i}-{n}@example.com")
+			n += 1
+			with lock:
+				result["flood_sent"] += 1
+				result["flood_throttled"] += not ok
+
+	with ThreadPoolExecutor(max_workers=legit_clients + flood_clients) as executor:
+		for i in range(legit_clients):
+			executor.submit(applicant, i)
+		for i in range(flood_clients):
+			executor.submit(flood, i)
+
+	return result
+
+
+def _save_step(session, url, headers, email):
+	data = {"email": email, "company_name": "Throttle Benchmark", "current_step": 1}
+	try:
+		response = session.post(f"{url}{SAVE_STEP}", data={"data": json.dumps(data)}, headers=headers, timeout=30)
+		return bool(response.ok and response.json().get("message", {}).get("success"))
+	except (http.RequestException, ValueError):
+		return False
+
+
+def _cleanup():
+	names = frappe.get_all(APPLICATION_DOCTYPE, filters={"email": ("like", f"{EMAIL_PREFIX}%")}, pluck="name")
+	if names:
+		frappe.db.delete("Version", {"ref_doctype": APPLICATION_DOCTYPE, "docname": ("in", names)})
+		frappe.db.delete(APPLICATION_DOCTYPE, {"name": ("in", names)})
+	frappe.db.commit()
+	# the rows were deleted behind the doc events
+	rebuild_stats()
+	frappe.cache().delete_keys(status_cache_key(EMAIL_PREFIX))
+	if names:
+		enqueue_build()
@@ -0,0 +1,236 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Feedstock chemistry derived from the ultimate and proximate analyses
+
+From the applicant's dry-basis percentages this derives:
+
+- the H/C and O/C molar ratios, i.e. where the feedstock sits on a van Krevelen
+  diagram
+- an estimated higher heating value (Channiwala & Parikh, 2002), to compare
+  with the heating value the applicant reports
+- the proximate total (fixed carbon + volatile matter + ash), which should be
+  about 100 %, and a `chemistry_check` summarising whether the analyses add up
+
+Float columns can't be NULL, so a blank percentage is stored as 0. It is treated
+as missing here, as `calculateCHRatio` does in the signup form.
+
+The controller derives one document's values on save with `derive_row`.
+`refresh_derived_values` recomputes the whole table: it loads every
+application's chemistry columns into NumPy arrays in one query, computes all the
+metrics at once with `derive`, and writes back only the rows that changed.
+`get_chemistry_distribution` summarises any metric per feedstock category the
+same way.
+"""
+
+import math
+
+import frappe
+import numpy as np
+from frappe.utils import cint, flt
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+
+ULTIMATE_FIELDS = ("carbon_content", "hydrogen_content", "nitrogen_content", "oxygen_content", "sulfur_content")
+PROXIMATE_FIELDS = ("fixed_carbon", "volatile_matter", "ash_content")
+INPUT_FIELDS = (*ULTIMATE_FIELDS, *PROXIMATE_FIELDS)
+FLOAT_DERIVED_FIELDS = ("hc_molar_ratio", "oc_molar_ratio", "estimated_heating_value", "proximate_total")
+DERIVED_FIELDS = (*FLOAT_DERIVED_FIELDS, "chemistry_check")
+METRICS = (*FLOAT_DERIVED_FIELDS, *INPUT_FIELDS, "heating_value", "moisture_content")
+
+ATOMIC_WEIGHTS = {"carbon_content": 12.011, "hydrogen_content": 1.008, "oxygen_content": 15.999}
+# MJ/kg per % of each component
+HHV_COEFFICIENTS = {
+	"carbon_content": 0.3491,
+	"hydrogen_content": 1.1783,
+	"sulfur_content": 0.1005,
+	"oxygen_content": -0.1034,
+	"nitrogen_content": -0.0151,
+	"ash_content": -0.0211,
+}
+# how far (in percentage points) the analyses may be from 100 %, for rounding and lab error
+TOLERANCE = 2.0
+CONSISTENT, INCONSISTENT, INCOMPLETE = "Consistent", "Inconsistent", "Incomplete"
+PERCENTILES = (10, 25, 50, 75, 90)
+CACHE_KEY = "franchise_portal:chemistry_distribution"
+CACHE_TTL_SECONDS = 300
+DEFAULT_REFRESH_BATCH_SIZE = 1000
+
+
+def derive_row(values):
+	"""Derived chemistry of one application from `{field: percentage}`"""
+	get = {field: flt(values.get(field)) for field in INPUT_FIELDS}
+	carbon, hydrogen, oxygen = get["carbon_content"], get["hydrogen_content"], get["oxygen_content"]
+	carbon_moles = carbon / ATOMIC_WEIGHTS["carbon_content"]
+
+	derived = dict.fromkeys(FLOAT_DERIVED_FIELDS, 0.0)
+	if carbon > 0 and hydrogen > 0:
+		derived["hc_molar_ratio"] = hydrogen / ATOMIC_WEIGHTS["hydrogen_content"] / carbon_moles
+	if carbon > 0 and oxygen > 0:
+		derived["oc_molar_ratio"] = oxygen / ATOMIC_WEIGHTS["oxygen_content"] / carbon_moles
+	if carbon > 0 and hydrogen > 0 and oxygen > 0:
+		hhv = sum(coefficient * max(get[field], 0.0) for field, coefficient in HHV_COEFFICIENTS.items())
+		derived["estimated_heating_value"] = max(hhv, 0.0)
+
+	proximate = [get[field] for field in PROXIMATE_FIELDS]
+	if all(value > 0 for value in proximate):
+		derived["proximate_total"] = sum(proximate)
+
+	derived["chemistry_check"] = _check(
+		any(get[field] > 0 for field in INPUT_FIELDS),
+		derived["proximate_total"],
+		sum(max(get[field], 0.0) for field in (*ULTIMATE_FIELDS, "ash_content")),
+	)
+	return derived
+
+
+def _check(has_any, proximate_total, ultimate_total):
+	if not has_any:
+		return ""
+	if ultimate_total > 100 + TOLERANCE or (proximate_total and abs(proximate_total - 100) > TOLERANCE):
+		return INCONSISTENT
+	if not proximate_total:
+		return INCOMPLETE
+	return CONSISTENT
+
+
+def set_derived_values(doc):
+	"""Keep the derived chemistry columns in step with the analyses on save"""
+	doc.update(derive_row(doc))
+
+
+def derive(columns):
+	"""Vectorized `derive_row`: `{field: array}` of inputs to `{field: array}` of derived values"""
+	get = {field: np.nan_to_num(np.asarray(columns[field], dtype=float)) for field in INPUT_FIELDS}
+	present = {field: get[field] > 0 for field in INPUT_FIELDS}
+	carbon, hydrogen, oxygen = get["carbon_content"], get["hydrogen_content"], get["oxygen_content"]
+	has_carbon = present["carbon_content"]
+	# avoid dividing by zero; rows without carbon are masked out below
+	carbon_moles = np.where(has_carbon, carbon, 1.0) / ATOMIC_WEIGHTS["carbon_content"]
+
+	hc = np.where(
+		has_carbon & present["hydrogen_content"], hydrogen / ATOMIC_WEIGHTS["hydrogen_content"] / carbon_moles, 0.0
+	)
+	oc = np.where(
+		has_carbon & present["oxygen_content"], oxygen / ATOMIC_WEIGHTS["oxygen_content"] / carbon_moles, 0.0
+	)
+	hhv = sum(coefficient * np.maximum(get[field], 0.0) for field, coefficient in HHV_COEFFICIENTS.items())
+	hhv = np.where(
+		has_carbon & present["hydrogen_content"] & present["oxygen_content"], np.maximum(hhv, 0.0), 0.0
+	)
+
+	proximate = np.stack([get[field] for field in PROXIMATE_FIELDS])
+	proximate_total = np.where((proximate > 0).all(axis=0), proximate.sum(axis=0), 0.0)
+	ultimate_total = sum(np.maximum(get[field], 0.0) for field in (*ULTIMATE_FIELDS, "ash_content"))
+
+	has_any = np.stack(list(present.values())).any(axis=0)
+	inconsistent = (ultimate_total > 100 + TOLERANCE) | (
+		(proximate_total != 0) & (np.abs(proximate_total - 100) > TOLERANCE)
+	)
+	check = np.select(
+		[~has_any, inconsistent, proximate_total == 0],
+		["", INCONSISTENT, INCOMPLETE],
+		default=CONSISTENT,
+	)
+	return {
+		"hc_molar_ratio": hc,
+		"oc_molar_ratio": oc,
+		"estimated_heating_value": hhv,
+		"proximate_total": proximate_total,
+		"chemistry_check": check.astype(object),
+	}
+
+
+def load_columns(fields, status=None, text_fields=("primary_feedstock_category",)):
+	"""`(names, {text_field: array}, {field: float array})` for every application, in one query"""
+	Application = frappe.qb.DocType(APPLICATION_DOCTYPE)
+	query = frappe.qb.from_(Application).select(
+		Application.name, *(Application[field] for field in (*text_fields, *fields))
+	)
+	if status:
+		query = query.where(Application.status == status)
+	table = np.array(query.run(), dtype=object).reshape(-1, 1 + len(text_fields) + len(fields))
+
+	texts = {
+		field: np.array([value or "" for value in table[:, 1 + i]], dtype=object)
+		for i, field in enumerate(text_fields)
+	}
+	values = table[:, 1 + len(text_fields) :].astype(float)
+	return table[:, 0], texts, {field: values[:, i] for i, field in enumerate(fields)}
+
+
+def refresh_derived_values(batch_size=None):
+	"""Recompute the derived chemistry of every application; returns the number of rows updated"""
+	names, texts, columns = load_columns([*INPUT_FIELDS, *FLOAT_DERIVED_FIELDS], text_fields=("chemistry_check",))
+	derived = derive(columns)
+	changed = texts["chemistry_check"] != derived["chemistry_check"]
+	for field in FLOAT_DERIVED_FIELDS:
+		# stored values are rounded to the column's precision
+		changed |= ~np.isclose(columns[field], derived[field], rtol=0, atol=1e-6)
+
+	indexes = np.flatnonzero(changed)
+	batch_size = cint(batch_size) or DEFAULT_REFRESH_BATCH_SIZE
+	for start in range(0, len(indexes), batch_size):
+		updates = {
+			names[i]: {field: _to_python(derived[field][i]) for field in DERIVED_FIELDS}
+			for i in indexes[start : start + batch_size]
+		}
+		frappe.db.bulk_update(APPLICATION_DOCTYPE, updates, update_modified=False)
+		frappe.db.commit()
+
+	clear_cache()
+	return len(indexes)
+
+
+def _to_python(value):
+	return value.item() if isinstance(value, np.generic) else value
+
+
+@frappe.whitelist()
+def get_chemistry_distribution(metric="hc_molar_ratio", status=None):
+	"""Distribution of `metric` per feedstock category: count, mean, std, min, percentiles, max"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+	if metric not in METRICS:
+		frappe.throw(f"Unknown chemistry metric: {metric}")
+
+	cache_key = f"{CACHE_KEY}:{metric}:{status or ''}"
+	distribution = frappe.cache().get_value(cache_key)
+	if distribution is None:
+		_names, texts, columns = load_columns([metric], status)
+		distribution = build_distribution(texts["primary_feedstock_category"], columns[metric])
+		frappe.cache().set_value(cache_key, distribution, expires_in_sec=CACHE_TTL_SECONDS)
+	return distribution
+
+
+def build_distribution(categories, values):
+	"""`{category: summary}` of the positive `values`; blanks (0) are left out"""
+	mask = values > 0
+	categories, values = categories[mask], values[mask]
+	if not len(values):
+		return {}
+
+	order = np.argsort(categories, kind="stable")
+	categories, values = categories[order], values[order]
+	labels, starts = np.unique(categories, return_index=True)
+
+	distribution = {}
+	for label, group in zip(labels, np.split(values, starts[1:]), strict=True):
+		percentiles = np.percentile(group, PERCENTILES)
+		distribution[label] = {
+			"count": len(group),
+			"mean": _round(group.mean()),
+			"std": _round(group.std()),
+			"min": _round(group.min()),
+			**{f"p{pct}": _round(value) for pct, value in zip(PERCENTILES, percentiles, strict=True)},
+			"max": _round(group.max()),
+		}
+	return distribution
+
+
+def _round(value):
+	value = float(value)
+	return round(value, 4) if math.isfinite(value) else None
+
+
+def clear_cache():
+	frappe.cache().delete_keys(CACHE_KEY)
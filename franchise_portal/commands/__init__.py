@@ -0,0 +1,87 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+import sys
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("export-applications")
+@click.option("--format", "export_format", type=click.Choice(["csv", "jsonl"]), default="csv")
+@click.option("--fields", help="Comma separated fieldnames to export (default: all)")
+@click.option("--status", help="Only applications with this status")
+@click.option("--from-date", help="Created on or after this date (YYYY-MM-DD)")
+@click.option("--to-date", help="Created on or before this date (YYYY-MM-DD)")
+@click.option("--page-size", type=int, help="Rows read per query")
+@click.option("--output", type=click.Path(dir_okay=False, writable=True), help="File to write (default: stdout)")
+@pass_context
+def export_applications(
+	context, export_format, fields=None, status=None, from_date=None, to_date=None, page_size=None, output=None
+):
+	"Stream Franchise Signup Applications to CSV or JSON Lines"
+	import frappe
+
+	from franchise_portal.export import iter_export
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		chunks = iter_export(
+			export_format,
+			fields=[field.strip() for field in fields.split(",")] if fields else None,
+			status=status,
+			from_date=from_date,
+			to_date=to_date,
+			page_size=page_size,
+		)
+		out = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+		try:
+			for chunk in chunks:
+				out.write(chunk)
+		finally:
+			if output:
+				out.close()
+	finally:
+		frappe.destroy()
+
+
+@click.command("rebuild-application-stats")
+@click.option("--batch-size", type=int, help="Applications read per query")
+@pass_context
+def rebuild_application_stats(context, batch_size=None):
+	"Recount the Franchise Application Stat dashboard aggregates"
+	import frappe
+
+	from franchise_portal.application_stats import rebuild_stats
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		fixed = rebuild_stats(batch_size=batch_size)
+		click.echo(f"Corrected {fixed} stat rows")
+	finally:
+		frappe.destroy()
+
+
+@click.command("build-application-search")
+@pass_context
+def build_application_search(context):
+	"Rebuild the reviewer search index over Franchise Signup Applications"
+	import frappe
+
+	from franchise_portal.application_search import build_index
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		count = build_index()
+		click.echo(f"Indexed {count} applications")
+	finally:
+		frappe.destroy()
+
+
+commands = [export_applications, rebuild_application_stats, build_application_search]
@@ -0,0 +1,138 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Streaming export of signup applications as CSV or JSON Lines
+
+Rows are read a page at a time with a keyset cursor on `name` (`name > last
+seen`, ordered by the primary key), so every page is an index range scan, no
+matter how deep into the table it is. Rows are written out as soon as their page
+is read and nothing accumulates, so memory stays flat however many rows there are.
+"""
+
+import csv
+import io
+import json
+
+import frappe
+from frappe.model import no_value_fields
+from frappe.utils import add_days, cint, getdate
+from werkzeug.wrappers import Response
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+
+DEFAULT_PAGE_SIZE = 1000
+FORMATS = {
+	"csv": "text/csv; charset=utf-8",
+	"jsonl": "application/x-ndjson; charset=utf-8",
+}
+EXPORTABLE_DEFAULT_FIELDS = ("name", "creation", "modified", "owner")
+
+
+@frappe.whitelist()
+def download(format="csv", fields=None, status=None, from_date=None, to_date=None):
+	"""Stream the export to the browser as a file download"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "export", throw=True)
+
+	if format not in FORMATS:
+		frappe.throw(f"Unsupported export format: {format}")
+
+	fields = get_export_fields(frappe.parse_json(fields) if isinstance(fields, str) else fields)
+	filters = {"status": status, "from_date": from_date, "to_date": to_date}
+	get_filters(**filters)  # validate before the response starts
+
+	site, user = frappe.local.site, frappe.session.user
+
+	def body():
+		# Werkzeug consumes the body after Frappe has torn down the request
+		# context, so the generator opens its own.
+		frappe.init(site=site)
+		try:
+			frappe.connect()
+			frappe.set_user(user)
+			yield from iter_export(format, fields, **filters)
+		finally:
+			frappe.destroy()
+
+	return Response(
+		body(),
+		content_type=FORMATS[format],
+		headers={"Content-Disposition": f'attachment; filename="franchise_applications.{format}"'},
+		direct_passthrough=True,
+	)
+
+
+def iter_export(format, fields=None, status=None, from_date=None, to_date=None, page_size=None):
+	"""Yield the export as chunks of text, one page of rows per chunk"""
+	fields = get_export_fields(fields)
+	pages = iter_pages(fields, get_filters(status, from_date, to_date), page_size)
+
+	if format == "jsonl":
+		for page in pages:
+			yield "".join(json.dumps(dict(zip(fields, row, strict=True)), default=str) + "\n" for row in page)
+		return
+
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	writer.writerow(fields)
+	for page in pages:
+		writer.writerows(page)
+		yield buffer.getvalue()
+		buffer.seek(0)
+		buffer.truncate()
+	yield buffer.getvalue()
+
+
+def iter_pages(fields, filters=None, page_size=None):
+	"""Yield pages of rows (tuples in `fields` order) ordered by name"""
+	page_size = cint(page_size) or DEFAULT_PAGE_SIZE
+	# the cursor column must be selected, even if it isn't exported
+	query_fields = fields if "name" in fields else ["name", *fields]
+	cursor_index = query_fields.index("name")
+	last = None
+
+	while True:
+		page = frappe.get_all(
+			APPLICATION_DOCTYPE,
+			fields=query_fields,
+			filters=[*(filters or []), *([["name", ">", last]] if last is not None else [])],
+			order_by="name asc",
+			limit_page_length=page_size,
+			as_list=True,
+		)
+		if not page:
+			return
+
+		last = page[-1][cursor_index]
+		yield page if query_fields is fields else [row[1:] for row in page]
+
+		if len(page) < page_size:
+			return
+
+
+def get_export_fields(fields=None):
+	"""Validate a field projection; defaults to every data field"""
+	meta = frappe.get_meta(APPLICATION_DOCTYPE)
+	exportable = [*EXPORTABLE_DEFAULT_FIELDS] + [
+		df.fieldname for df in meta.fields if df.fieldtype not in no_value_fields
+	]
+	if not fields:
+		return exportable
+
+	unknown = [field for field in fields if field not in exportable]
+	if unknown:
+		frappe.throw(f"Cannot export unknown fields: {', '.join(unknown)}")
+	return list(fields)
+
+
+def get_filters(status=None, from_date=None, to_date=None):
+	"""Status and creation date filters; dates are inclusive"""
+	filters = []
+	if status:
+		if status not in frappe.get_meta(APPLICATION_DOCTYPE).get_field("status").options.split("\n"):
+			frappe.throw(f"Unknown status: {status}")
+		filters.append(["status", "=", status])
+	if from_date:
+		filters.append(["creation", ">=", getdate(from_date)])
+	if to_date:
+		filters.append(["creation", "<", add_days(getdate(to_date), 1)])
+	return filters
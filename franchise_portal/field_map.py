@@ -0,0 +1,134 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Meta-driven mapping of signup payloads onto `Franchise Signup Application`
+
+`get_field_map` builds, once per process and doctype version, a dict from every
+field an applicant may set to a coercer for its fieldtype. `apply_payload` copies
+a payload onto a document in one pass: one dict lookup per key rejects unknown
+and protected keys, and values are coerced to the column type (Float fields
+arrive from the browser as strings). Fields derived from others, like
+`project_location`, are filled in afterwards.
+"""
+
+from dataclasses import dataclass
+
+import frappe
+from frappe.model import no_value_fields
+from frappe.utils import cint, cstr, flt
+
+# fields the applicant can never set, whatever the payload says
+PROTECTED_FIELDS = frozenset(
+	(
+		"name",
+		"doctype",
+		"status",
+		"naming_series",
+		"created_at",
+		"modified_at",
+		# derived from project_city and project_state
+		"project_location",
+		# derived from gps_coordinates on save
+		"latitude",
+		"longitude",
+		"geohash",
+		# derived from the chemical composition on save
+		"hc_molar_ratio",
+		"oc_molar_ratio",
+		"estimated_heating_value",
+		"proximate_total",
+		"chemistry_check",
+	)
+)
+
+FLOAT_TYPES = frozenset(("Float", "Currency", "Percent"))
+INT_TYPES = frozenset(("Int", "Check"))
+
+_field_maps = {}
+
+
+@dataclass(frozen=True)
+class FieldMap:
+	coercers: dict
+	modified: str
+
+	@property
+	def allowed(self):
+		return self.coercers.keys()
+
+
+def get_field_map(doctype):
+	"""Field map for `doctype`, rebuilt only when its meta changes (e.g. after migrate)"""
+	meta = frappe.get_meta(doctype)
+	cache_key = (frappe.local.site, doctype)
+	field_map = _field_maps.get(cache_key)
+	if field_map is None or field_map.modified != str(meta.modified):
+		field_map = _field_maps[cache_key] = build_field_map(meta)
+	return field_map
+
+
+def build_field_map(meta):
+	coercers = {
+		df.fieldname: get_coercer(df.fieldtype)
+		for df in meta.fields
+		if df.fieldtype not in no_value_fields and df.fieldname not in PROTECTED_FIELDS
+	}
+	return FieldMap(coercers=coercers, modified=str(meta.modified))
+
+
+def get_coercer(fieldtype):
+	if fieldtype in FLOAT_TYPES:
+		return _to_float
+	if fieldtype in INT_TYPES:
+		return _to_int
+	return _to_text
+
+
+def apply_payload(doc, values, field_map=None):
+	"""Coerce and copy `values` onto `doc`; returns the keys that were rejected
+
+	On a new document None values are skipped so field defaults survive.
+	"""
+	coercers = (field_map or get_field_map(doc.doctype)).coercers
+	is_new = doc.is_new()
+	rejected = []
+
+	for key, value in values.items():
+		coerce = coercers.get(key)
+		if coerce is None:
+			rejected.append(key)
+			continue
+		if value is None:
+			if is_new:
+				continue
+		else:
+			value = coerce(value)
+		setattr(doc, key, value)
+
+	if "project_city" in values or "project_state" in values:
+		set_project_location(doc)
+
+	return rejected
+
+
+def set_project_location(doc):
+	"""Combine city and state; read back from the document, as a payload may carry only one"""
+	location = ", ".join(part for part in (doc.get("project_city"), doc.get("project_state")) if part)
+	if location:
+		doc.project_location = location
+
+
+def _to_float(value):
+	if value == "":
+		return None
+	return flt(value)
+
+
+def _to_int(value):
+	if value == "":
+		return None
+	return cint(value)
+
+
+def _to_text(value):
+	return value if isinstance(value, str) else cstr(value)
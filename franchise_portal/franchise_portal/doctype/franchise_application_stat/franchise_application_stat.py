@@ -0,0 +1,8 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class FranchiseApplicationStat(Document):
+	pass
@@ -0,0 +1,28 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+
+class FranchiseMailOutbox(Document):
+	@frappe.whitelist()
+	def retry(self):
+		"""Put a dead-lettered message back in the delivery queue"""
+		if self.status != "Dead":
+			frappe.throw("Only dead-lettered messages can be retried.")
+
+		self.status = "Pending"
+		self.attempts = 0
+		self.next_attempt_at = now_datetime()
+		self.save()
+
+		from franchise_portal.outbox import schedule_drain
+
+		schedule_drain()
+
+
+def on_doctype_update():
+	"""Index the columns the drain worker filters and sorts on"""
+	frappe.db.add_index("Franchise Mail Outbox", ["status", "next_attempt_at"])
@@ -0,0 +1,65 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now_datetime
+
+from franchise_portal import outbox
+
+
+class TestFranchiseMailOutbox(FrappeTestCase):
+	def setUp(self):
+		patcher = patch.object(outbox, "schedule_drain")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.delete("Franchise Mail Outbox", {"subject": ("like", "Outbox test%")})
+		frappe.db.commit()
+
+	def test_enqueue_only_inserts_row(self):
+		"""Test that enqueueing does not talk to SMTP"""
+		with patch.object(outbox, "_send") as send:
+			name = outbox.enqueue_mail("test@example.com", "Outbox test enqueue", "<p>Hi</p>")
+
+		send.assert_not_called()
+		self.assertEqual(frappe.db.get_value("Franchise Mail Outbox", name, "status"), "Pending")
+
+	def test_drain_delivers_pending_rows(self):
+		"""Test that the worker marks delivered rows as sent"""
+		name = outbox.enqueue_mail("test@example.com", "Outbox test drain", "<p>Hi</p>")
+
+		with patch.object(outbox, "_send") as send:
+			outbox.drain_outbox(batch_size=10)
+
+		send.assert_called()
+		row = frappe.db.get_value("Franchise Mail Outbox", name, ["status", "attempts"], as_dict=True)
+		self.assertEqual(row.status, "Sent")
+		self.assertEqual(row.attempts, 1)
+
+	def test_failed_delivery_is_retried_then_dead_lettered(self):
+		"""Test backoff rescheduling and dead-lettering after the last attempt"""
+		name = outbox.enqueue_mail("test@example.com", "Outbox test failure", "<p>Hi</p>")
+
+		with patch.object(outbox, "_send", side_effect=outbox.OutboxDeliveryError("SMTP down")):
+			outbox.drain_outbox(batch_size=10)
+
+		row = frappe.db.get_value(
+			"Franchise Mail Outbox", name, ["status", "attempts", "next_attempt_at"], as_dict=True
+		)
+		self.assertEqual(row.status, "Pending")
+		self.assertEqual(row.attempts, 1)
+		self.assertGreater(row.next_attempt_at, now_datetime())
+
+		frappe.db.set_value(
+			"Franchise Mail Outbox",
+			name,
+			{"attempts": outbox.DEFAULT_MAX_ATTEMPTS - 1, "next_attempt_at": now_datetime()},
+		)
+		with patch.object(outbox, "_send", side_effect=outbox.OutboxDeliveryError("SMTP down")):
+			outbox.drain_outbox(batch_size=10)
+
+		self.assertEqual(frappe.db.get_value("Franchise Mail Outbox", name, "status"), "Dead")
@@ -5,6 +5,12 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import now
 
+from franchise_portal.admin_digest import notify_admins
+from franchise_portal.chemistry import set_derived_values
+from franchise_portal.field_map import apply_payload, set_project_location
+from franchise_portal.geo import set_coordinates
+from franchise_portal.review_queue import INDEXES
+
 
 class FranchiseSignupApplication(Document):
 	def before_save(self):
@@ -17,10 +23,32 @@ class FranchiseSignupApplication(Document):
 		# Set title if not set
 		if not getattr(self, 'title', None) and self.company_name:
 			self.title = self.company_name[:140]  # Ensure title fits within limit
+		
+		set_project_location(self)
+		set_coordinates(self)
+		set_derived_values(self)
+		self.set_version_mode()
+	
+	def set_version_mode(self):
+		"""Autosaves only write a Version row (a snapshot) when the status changes"""
+		if not self.flags.autosave:
+			return
+		
+		doc_before_save = self.get_doc_before_save()
+		self.flags.ignore_version = bool(doc_before_save) and doc_before_save.status == self.status
+	
+	def load_doc_before_save(self, *args, **kwargs):
+		"""Reuse the row the application store already read instead of selecting it again"""
+		doc_before_save = self.flags.pop("doc_before_save", None)
+		if doc_before_save is not None and not self.is_new():
+			self._doc_before_save = doc_before_save
+			return
+		super().load_doc_before_save(*args, **kwargs)
 	
 	def validate(self):
 		"""Validate the document before saving"""
-		if self.email:
+		# The unique index on email already rejects duplicates on insert/update
+		if self.email and not self.meta.get_field("email").unique:
 			self.validate_email_uniqueness()
 	
 	def validate_email_uniqueness(self):
@@ -39,36 +67,26 @@ class FranchiseSignupApplication(Document):
 		self.send_notification_email()
 	
 	def send_notification_email(self):
-		"""Send email notification to administrators"""
+		"""Queue email notification to administrators, unless the signup flow already did"""
 		try:
-			frappe.sendmail(
-				recipients=["admin@nexcharventures.com"],
-				subject=f"New Franchise Application: {self.company_name}",
-				message=f"""
-				<h3>New Franchise Signup Application Submitted</h3>
-				<p><strong>Company:</strong> {self.company_name}</p>
-				<p><strong>Contact Person:</strong> {self.contact_person}</p>
-				<p><strong>Email:</strong> {self.email}</p>
-				<p><strong>Phone:</strong> {self.phone_number}</p>
-				<p><strong>Project:</strong> {self.project_name}</p>
-				<p><strong>Location:</strong> {self.project_location}</p>
-				<p><strong>Application ID:</strong> {self.name}</p>
-				
-				<p>Please review the application in the system.</p>
-				""",
-				now=True
-			)
+			notify_admins(self)
 		except Exception as e:
 			frappe.log_error(f"Failed to send notification email: {str(e)}")
 	
 	@frappe.whitelist()
 	def update_step_data(self, step_data):
 		"""Update application data for a specific step"""
-		for field, value in step_data.items():
-			if hasattr(self, field):
-				setattr(self, field, value)
+		if isinstance(step_data, str):
+			step_data = frappe.parse_json(step_data)
+		apply_payload(self, step_data)
 		
 		self.save(ignore_permissions=True)
 		frappe.db.commit()
 		
-		return {"success": True, "message": "Step data saved successfully"} 
\ No newline at end of file
+		return {"success": True, "message": "Step data saved successfully"} 
+
+
+def on_doctype_update():
+	"""Composite indexes behind the review queue's keyset pagination"""
+	for fields in INDEXES:
+		frappe.db.add_index("Franchise Signup Application", list(fields))
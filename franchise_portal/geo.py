@@ -0,0 +1,184 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Geohash index over project GPS coordinates and nearby-project queries
+
+`gps_coordinates` stays the free-text "lat, lng" the signup map fills in. On
+every save the controller parses it into numeric `latitude`/`longitude` and an
+indexed `geohash`. A radius or bounding-box query is turned into the few
+geohash cells that cover the box, so MariaDB reads index ranges
+(`geohash LIKE 'cell%'`) instead of scanning the table. Candidates are then
+filtered exactly on latitude/longitude, and by great-circle distance for radius
+queries.
+"""
+
+import math
+import re
+
+import frappe
+from frappe.utils import cint, flt
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5 m cells
+# the most cells a query may expand to before falling back to coarser cells
+MAX_COVER_CELLS = 24
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+MAX_RADIUS_KM = 500
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+RESULT_FIELDS = (
+	"name",
+	"company_name",
+	"project_name",
+	"project_city",
+	"project_state",
+	"status",
+	"latitude",
+	"longitude",
+)
+
+_COORDINATES = re.compile(r"^\s*([-+]?\d+(?:\.\d+)?)\s*[,;\s]\s*([-+]?\d+(?:\.\d+)?)\s*$")
+
+
+def parse_coordinates(text):
+	"""(latitude, longitude) from "lat, lng" text, or None if it isn't a valid position"""
+	match = _COORDINATES.match(text or "")
+	if not match:
+		return None
+	latitude, longitude = float(match.group(1)), float(match.group(2))
+	if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+		return None
+	return latitude, longitude
+
+
+def set_coordinates(doc):
+	"""Keep `latitude`, `longitude` and `geohash` in step with `gps_coordinates`"""
+	position = parse_coordinates(doc.get("gps_coordinates"))
+	if position is None:
+		doc.latitude = doc.longitude = doc.geohash = None
+		return
+	doc.latitude, doc.longitude = position
+	doc.geohash = encode(*position)
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+	lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+	chars = []
+	bits = bit_count = 0
+	even = True  # geohash bits alternate longitude, latitude, longitude, ...
+
+	while len(chars) < precision:
+		value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+		middle = (interval[0] + interval[1]) / 2
+		bits <<= 1
+		if value >= middle:
+			bits |= 1
+			interval[0] = middle
+		else:
+			interval[1] = middle
+		even = not even
+		bit_count += 1
+		if bit_count == 5:
+			chars.append(BASE32[bits])
+			bits = bit_count = 0
+
+	return "".join(chars)
+
+
+def cell_size(precision):
+	"""(latitude, longitude) extent in degrees of a cell at `precision`"""
+	bits = 5 * precision
+	return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def cover(min_lat, min_lng, max_lat, max_lng):
+	"""Geohash prefixes whose cells together cover the bounding box"""
+	for precision in range(GEOHASH_PRECISION, 0, -1):
+		lat_step, lng_step = cell_size(precision)
+		rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+		columns = math.floor(max_lng / lng_step) - math.floor(min_lng / lng_step) + 1
+		if rows * columns <= MAX_COVER_CELLS or precision == 1:
+			break
+
+	cells = set()
+	for row in range(rows):
+		# the centre of each cell, clamped so the last row/column stays inside the world
+		lat = min(90.0, (math.floor(min_lat / lat_step) + row + 0.5) * lat_step)
+		for column in range(columns):
+			lng = min(180.0, (math.floor(min_lng / lng_step) + column + 0.5) * lng_step)
+			cells.add(encode(lat, lng, precision))
+	return sorted(cells)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+	lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+	a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+	return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+	"""(min_lat, min_lng, max_lat, max_lng) of the box around a circle"""
+	lat_delta = radius_km / KM_PER_DEGREE
+	# longitude degrees shrink towards the poles
+	lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+	return (
+		max(-90.0, latitude - lat_delta),
+		max(-180.0, longitude - lng_delta),
+		min(90.0, latitude + lat_delta),
+		min(180.0, longitude + lng_delta),
+	)
+
+
+@frappe.whitelist()
+def get_applications_nearby(latitude, longitude, radius_km=25, limit=DEFAULT_LIMIT):
+	"""Applications whose project lies within `radius_km` of a point, nearest first"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+	latitude, longitude, radius_km = flt(latitude), flt(longitude), flt(radius_km)
+	if not 0 < radius_km <= MAX_RADIUS_KM:
+		frappe.throw(f"Radius must be between 0 and {MAX_RADIUS_KM} km")
+
+	applications = []
+	for application in query_bbox(*bounding_box(latitude, longitude, radius_km)):
+		distance = haversine_km(latitude, longitude, application.latitude, application.longitude)
+		if distance <= radius_km:
+			application.distance_km = round(distance, 3)
+			applications.append(application)
+
+	applications.sort(key=lambda application: application.distance_km)
+	return applications[: get_limit(limit)]
+
+
+@frappe.whitelist()
+def get_applications_in_bbox(min_lat, min_lng, max_lat, max_lng, limit=DEFAULT_LIMIT):
+	"""Applications whose project lies inside a bounding box"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+	min_lat, min_lng, max_lat, max_lng = flt(min_lat), flt(min_lng), flt(max_lat), flt(max_lng)
+	if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+		frappe.throw("Invalid bounding box")
+
+	return query_bbox(min_lat, min_lng, max_lat, max_lng, limit=get_limit(limit))
+
+
+def query_bbox(min_lat, min_lng, max_lat, max_lng, limit=None):
+	"""Index-backed lookup: geohash prefix ranges, then exact latitude/longitude bounds"""
+	return frappe.get_all(
+		APPLICATION_DOCTYPE,
+		fields=list(RESULT_FIELDS),
+		filters=[
+			["latitude", ">=", min_lat],
+			["latitude", "<=", max_lat],
+			["longitude", ">=", min_lng],
+			["longitude", "<=", max_lng],
+		],
+		or_filters=[["geohash", "like", f"{cell}%"] for cell in cover(min_lat, min_lng, max_lat, max_lng)],
+		order_by="geohash asc",
+		limit_page_length=limit or 0,
+	)
+
+
+def get_limit(limit):
+	return min(cint(limit) or DEFAULT_LIMIT, MAX_LIMIT)
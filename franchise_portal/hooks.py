@@ -30,7 +30,7 @@ app_include_js = "/assets/franchise_portal/js/franchise_portal.js"
 
 # include js, css files in header of web template
 # web_include_css = "/assets/franchise_portal/css/franchise_portal.css"
-web_include_js = "/assets/franchise_portal/js/signup.js"
+# web_include_js = "/assets/franchise_portal/js/franchise_portal.js"
 
 # include custom scss in every website theme (without file extension ".scss")
 # website_theme_scss = "franchise_portal/public/scss/website"
@@ -64,6 +64,13 @@ web_include_js = "/assets/franchise_portal/js/signup.js"
 # 	"Role": "home_page"
 # }
 
+# Website
+# -------
+
+# serve the anonymous /signup shell from a Redis page cache with ETag revalidation
+page_renderer = ["franchise_portal.page_renderer.SignupPage"]
+website_clear_cache = "franchise_portal.page_renderer.clear_page_cache"
+
 # Generators
 # ----------
 
@@ -149,26 +156,40 @@ web_include_js = "/assets/franchise_portal/js/signup.js"
 # 	}
 # }
 
+doc_events = {
+	"Franchise Signup Application": {
+		"on_update": [
+			"franchise_portal.application_stats.on_application_update",
+			"franchise_portal.application_search.on_application_update",
+			"franchise_portal.application_events.on_application_update",
+		],
+		"on_trash": [
+			"franchise_portal.application_stats.on_application_trash",
+			"franchise_portal.application_search.on_application_trash",
+			"franchise_portal.application_events.on_application_trash",
+		],
+	}
+}
+
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"franchise_portal.tasks.all"
-# 	],
-# 	"daily": [
-# 		"franchise_portal.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"franchise_portal.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"franchise_portal.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"franchise_portal.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"cron": {
+		# outbox retries and missed drains; autosave buffers past their flush interval
+		"* * * * *": [
+			"franchise_portal.outbox.drain_outbox",
+			"franchise_portal.autosave.flush_due"
+		],
+	},
+	"hourly": [
+		"franchise_portal.admin_digest.send_digest"
+	],
+	"daily": [
+		"franchise_portal.outbox.purge_sent_mail",
+		"franchise_portal.version_compaction.compact_versions"
+	],
+}
 
 # Testing
 # -------
@@ -0,0 +1,96 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Idempotency keys for signup saves and submissions
+
+The signup page sends an `idempotency_key` (form field or `Idempotency-Key`
+header) with step saves and the final submission, and reuses it for
+double-clicks and for retries after a network error. The first request with a
+key runs the endpoint under a Redis lock and, if it succeeded, caches its
+response for `franchise_idempotency_ttl_seconds`. A replay gets the cached
+response back without touching the database or the mailer, and a duplicate that
+arrives while the first is still running waits for its result instead of racing
+it. A failed request (an error response or an exception) is not cached, so a
+retry with the same key runs again.
+
+Requests without a key are not affected.
+"""
+
+import time
+import uuid
+from functools import wraps
+
+import frappe
+from frappe.utils import cint
+
+from franchise_portal.redis_keys import RELEASE_LOCK, client, dumps, loads, make_key
+
+DEFAULT_TTL_SECONDS = 10 * 60
+# longer than any save takes; a lock left by a crashed worker expires after this
+LOCK_SECONDS = 30
+WAIT_SECONDS = 15
+POLL_SECONDS = 0.05
+MAX_KEY_LENGTH = 100
+
+
+def idempotent(action):
+	"""Replay the cached response for a repeated idempotency key; apply it below `@frappe.whitelist`"""
+
+	def decorator(fn):
+		@wraps(fn)
+		def wrapper(*args, **kwargs):
+			key = get_idempotency_key()
+			if not key:
+				return fn(*args, **kwargs)
+			return run_once(action, key, lambda: fn(*args, **kwargs))
+
+		return wrapper
+
+	return decorator
+
+
+def get_idempotency_key():
+	key = frappe.form_dict.get("idempotency_key") or frappe.get_request_header("Idempotency-Key")
+	if not key or len(key) > MAX_KEY_LENGTH:
+		return None
+	return key
+
+
+def run_once(action, key, call):
+	"""Run `call` once per (action, key) and return its (possibly cached) result"""
+	result_key = make_key("idempotency", action, key)
+	lock_key = make_key("idempotency", action, key, "lock")
+	redis = client()
+	deadline = time.monotonic() + WAIT_SECONDS
+
+	while True:
+		cached = redis.get(result_key)
+		if cached is not None:
+			return loads(cached)
+
+		owner = str(uuid.uuid4())
+		if redis.set(lock_key, owner, nx=True, ex=LOCK_SECONDS):
+			break
+
+		if time.monotonic() >= deadline:
+			return {"success": False, "message": "This request is still being processed. Please try again shortly."}
+		time.sleep(POLL_SECONDS)
+
+	try:
+		# the first request may have finished between our read and taking the lock
+		cached = redis.get(result_key)
+		if cached is not None:
+			return loads(cached)
+
+		result = call()
+		if succeeded(result):
+			ttl = cint(frappe.conf.get("franchise_idempotency_ttl_seconds")) or DEFAULT_TTL_SECONDS
+			redis.set(result_key, dumps(result), ex=ttl)
+		return result
+	finally:
+		redis.eval(RELEASE_LOCK, 1, lock_key, owner)
+
+
+def succeeded(result):
+	"""Whether an endpoint response is worth replaying; failures are left to be retried"""
+	return not isinstance(result, dict) or bool(result.get("success", True))
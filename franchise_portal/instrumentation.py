@@ -0,0 +1,290 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Per-endpoint latency, query and cache histograms for the signup API
+
+`instrumented` wraps an endpoint and records, per call:
+
+- `wall_ms`: wall time
+- `db_queries`, `db_ms`: number and total time of `frappe.db.sql` calls
+- `cache_gets`, `cache_sets`: Redis reads and writes (pipelines count as one write)
+- `mail_enqueue_ms`: time spent queueing mail (see `span`)
+
+Every call adds to a Redis hash per endpoint and minute, with counts per
+histogram bucket and running sums. That is one pipelined round trip per call,
+and the hashes expire after `RETENTION_MINUTES`. `get_metrics` merges the
+minutes asked for. Set `franchise_signup_instrumentation` to 0 in site config
+to turn recording off.
+
+Counters live on `frappe.local`, so they only see the request that is being
+measured. The query and Redis hooks are only installed while a measured call
+runs and are removed again when it returns or raises. Nested instrumented
+calls (e.g. `finalize_application` inside `save_step_with_verification`) are
+recorded on their own as well as inside their caller.
+"""
+
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+import frappe
+from frappe.utils import cint
+from redis import Redis
+from redis.client import Pipeline
+
+from franchise_portal.redis_keys import client, make_key
+
+RETENTION_MINUTES = 60
+DEFAULT_WINDOW_MINUTES = 15
+ENDPOINTS_KEY = ("metrics", "endpoints")
+
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+METRICS = {
+	"wall_ms": MS_BUCKETS,
+	"db_queries": COUNT_BUCKETS,
+	"db_ms": MS_BUCKETS,
+	"cache_gets": COUNT_BUCKETS,
+	"cache_sets": COUNT_BUCKETS,
+	"mail_enqueue_ms": MS_BUCKETS,
+}
+
+READ_COMMANDS = frozenset(
+	(
+		"GET",
+		"MGET",
+		"EXISTS",
+		"TTL",
+		"HGET",
+		"HGETALL",
+		"HMGET",
+		"HEXISTS",
+		"HKEYS",
+		"SMEMBERS",
+		"SISMEMBER",
+		"ZCARD",
+		"ZRANGE",
+		"ZRANGEBYSCORE",
+		"ZSCORE",
+		"MEMORY USAGE",
+	)
+)
+
+
+def instrumented(fn):
+	"""Record latency, query and cache counts of an endpoint; apply it below `@frappe.whitelist`"""
+
+	@wraps(fn)
+	def wrapper(*args, **kwargs):
+		if not is_enabled():
+			return fn(*args, **kwargs)
+
+		counters = getattr(frappe.local, "franchise_metrics", None)
+		outermost = counters is None
+		if outermost:
+			counters = frappe.local.franchise_metrics = dict.fromkeys(METRICS, 0)
+
+		start = dict(counters)
+		started = time.perf_counter()
+		try:
+			with ExitStack() as hooks:
+				if outermost:
+					hooks.enter_context(_count_queries(counters))
+					hooks.enter_context(_count_redis_commands())
+				return fn(*args, **kwargs)
+		finally:
+			elapsed = (time.perf_counter() - started) * 1000
+			sample = {metric: counters[metric] - start[metric] for metric in METRICS}
+			sample["wall_ms"] = elapsed
+
+			if outermost:
+				del frappe.local.franchise_metrics
+				record(fn.__name__, sample)
+			else:
+				# don't charge the caller for writing this call's sample
+				frappe.local.franchise_metrics = None
+				try:
+					record(fn.__name__, sample)
+				finally:
+					frappe.local.franchise_metrics = counters
+
+	return wrapper
+
+
+@contextmanager
+def span(metric):
+	"""Add the time spent in the block to `metric` of the call being measured"""
+	counters = getattr(frappe.local, "franchise_metrics", None)
+	if counters is None:
+		yield
+		return
+
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		counters[metric] += (time.perf_counter() - started) * 1000
+
+
+def is_enabled():
+	return cint(frappe.conf.get("franchise_signup_instrumentation", 1))
+
+
+def record(endpoint, sample):
+	"""Add one call's sample to the endpoint's histograms for the current minute"""
+	minute = int(time.time() // 60)
+	key = make_key("metrics", endpoint, minute)
+
+	pipe = client().pipeline(transaction=False)
+	pipe.hincrby(key, "calls", 1)
+	for metric, value in sample.items():
+		pipe.hincrby(key, f"{metric}:{bucket_index(METRICS[metric], value)}", 1)
+		pipe.hincrbyfloat(key, f"{metric}:sum", value)
+	pipe.expire(key, RETENTION_MINUTES * 60)
+	pipe.sadd(make_key(*ENDPOINTS_KEY), endpoint)
+	pipe.expire(make_key(*ENDPOINTS_KEY), RETENTION_MINUTES * 60)
+	try:
+		pipe.execute()
+	except Exception:
+		# metrics must never fail the request they measure
+		pass
+
+
+def bucket_index(bounds, value):
+	for index, bound in enumerate(bounds):
+		if value <= bound:
+			return index
+	return len(bounds)
+
+
+@frappe.whitelist()
+def get_metrics(minutes=DEFAULT_WINDOW_MINUTES):
+	"""Histograms per signup endpoint over the last `minutes` minutes"""
+	frappe.only_for("System Manager")
+
+	minutes = max(1, min(cint(minutes) or DEFAULT_WINDOW_MINUTES, RETENTION_MINUTES))
+	current = int(time.time() // 60)
+	redis = client()
+	endpoints = sorted(frappe.safe_decode(endpoint) for endpoint in redis.smembers(make_key(*ENDPOINTS_KEY)))
+
+	pipe = redis.pipeline(transaction=False)
+	for endpoint in endpoints:
+		for minute in range(current - minutes + 1, current + 1):
+			pipe.hgetall(make_key("metrics", endpoint, minute))
+	replies = pipe.execute() if endpoints else []
+
+	result = {}
+	for position, endpoint in enumerate(endpoints):
+		totals = {}
+		for reply in replies[position * minutes : (position + 1) * minutes]:
+			for field, value in reply.items():
+				field = frappe.safe_decode(field)
+				totals[field] = totals.get(field, 0) + float(value)
+		if totals.get("calls"):
+			result[endpoint] = summarize(totals)
+
+	return {"minutes": minutes, "endpoints": result}
+
+
+def summarize(totals):
+	"""Turn merged hash fields into `{calls, metrics: {metric: {mean, p50, ...}}}`"""
+	calls = int(totals["calls"])
+	metrics = {}
+	for metric, bounds in METRICS.items():
+		counts = [int(totals.get(f"{metric}:{index}", 0)) for index in range(len(bounds) + 1)]
+		labels = [f"<={bound}" for bound in bounds] + [f">{bounds[-1]}"]
+		metrics[metric] = {
+			"mean": round(totals.get(f"{metric}:sum", 0) / calls, 2),
+			# upper bound of the bucket holding the percentile
+			"p50": _percentile(bounds, counts, 50),
+			"p95": _percentile(bounds, counts, 95),
+			"p99": _percentile(bounds, counts, 99),
+			"buckets": {label: count for label, count in zip(labels, counts, strict=True) if count},
+		}
+	return {"calls": calls, "metrics": metrics}
+
+
+def _percentile(bounds, counts, pct):
+	target = pct / 100 * sum(counts)
+	seen = 0
+	for index, count in enumerate(counts):
+		seen += count
+		if count and seen >= target:
+			return bounds[index] if index < len(bounds) else f">{bounds[-1]}"
+	return None
+
+
+@contextmanager
+def _count_queries(counters):
+	"""Count queries of this request's connection while the block runs"""
+	db = frappe.db
+	if db is None:
+		yield
+		return
+
+	previous = db.__dict__.get("sql")
+	sql = db.sql
+
+	def counting_sql(*args, **kwargs):
+		started = time.perf_counter()
+		try:
+			return sql(*args, **kwargs)
+		finally:
+			counters["db_queries"] += 1
+			counters["db_ms"] += (time.perf_counter() - started) * 1000
+
+	db.sql = counting_sql
+	try:
+		yield
+	finally:
+		if previous is None:
+			del db.sql
+		else:
+			db.sql = previous
+
+
+_redis_hooks_lock = threading.Lock()
+_redis_hook_users = 0
+_redis_originals = {}
+
+
+@contextmanager
+def _count_redis_commands():
+	"""Count Redis commands issued while the block runs
+
+	Both `frappe.cache()` and the raw clients in `redis_keys` are `Redis`
+	instances, so one hook sees all of them. The hook is installed by the first
+	measured call in the process and removed when the last one finishes, and it
+	only counts commands of the request that is being measured.
+	"""
+	global _redis_hook_users
+	with _redis_hooks_lock:
+		if not _redis_hook_users:
+			_redis_originals.update(execute_command=Redis.execute_command, execute=Pipeline.execute)
+			Redis.execute_command = _counting_execute_command
+			Pipeline.execute = _counting_execute_pipeline
+		_redis_hook_users += 1
+	try:
+		yield
+	finally:
+		with _redis_hooks_lock:
+			_redis_hook_users -= 1
+			if not _redis_hook_users:
+				Redis.execute_command = _redis_originals["execute_command"]
+				Pipeline.execute = _redis_originals["execute"]
+
+
+def _counting_execute_command(self, *args, **options):
+	counters = getattr(frappe.local, "franchise_metrics", None)
+	if counters is not None and args:
+		command = str(args[0]).upper()
+		counters["cache_gets" if command in READ_COMMANDS else "cache_sets"] += 1
+	return _redis_originals["execute_command"](self, *args, **options)
+
+
+def _counting_execute_pipeline(self, *args, **kwargs):
+	counters = getattr(frappe.local, "franchise_metrics", None)
+	if counters is not None:
+		counters["cache_sets"] += 1
+	return _redis_originals["execute"](self, *args, **kwargs)
@@ -0,0 +1,71 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Resumable, chunked data migrations over the application table
+
+`migrate_in_chunks` walks the table in primary-key order, `batch_size` rows at a
+time (keyset on `name`, like the export). Each chunk is mapped to the updates
+it needs and written with one `bulk_update`, without touching `modified`. The
+chunk is then committed, so each transaction holds its row locks for one
+chunk only. The migration then pauses briefly so web requests get the table
+between chunks.
+
+The last migrated `name` is saved as a global default (`tabDefaultValue`) in
+the same commit as the chunk. If a `bench migrate` is interrupted, the next
+run resumes after the last committed chunk instead of starting over. The
+checkpoint is removed when the migration completes.
+
+    def execute():
+        migrate_in_chunks("backfill_x", ["x", "y"], lambda rows: {row.name: {"x": row.y} for row in rows})
+"""
+
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.export import iter_pages
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_SECONDS = 0.1
+
+
+def migrate_in_chunks(key, fields, get_updates, filters=None, batch_size=None, pause_seconds=None):
+	"""Apply `get_updates(rows) -> {name: {field: value}}` to every application; returns rows updated
+
+	`rows` are dicts of `name` and `fields`. `batch_size` and `pause_seconds`
+	default to the `franchise_migration_batch_size` and
+	`franchise_migration_pause_seconds` site config keys.
+	"""
+	batch_size = cint(batch_size or frappe.conf.get("franchise_migration_batch_size")) or DEFAULT_BATCH_SIZE
+	pause_seconds = flt(
+		pause_seconds
+		if pause_seconds is not None
+		else frappe.conf.get("franchise_migration_pause_seconds", DEFAULT_PAUSE_SECONDS)
+	)
+	checkpoint_key = get_checkpoint_key(key)
+	checkpoint = frappe.db.get_global(checkpoint_key)
+	fields = ["name", *(field for field in fields if field != "name")]
+
+	updated = 0
+	for page in iter_pages(
+		fields, [*(filters or []), *([["name", ">", checkpoint]] if checkpoint else [])], batch_size
+	):
+		updates = get_updates([frappe._dict(zip(fields, row, strict=True)) for row in page])
+		if updates:
+			frappe.db.bulk_update(APPLICATION_DOCTYPE, updates, update_modified=False)
+			updated += len(updates)
+
+		frappe.db.set_global(checkpoint_key, page[-1][0])
+		frappe.db.commit()
+		if pause_seconds:
+			time.sleep(pause_seconds)
+
+	frappe.db.set_global(checkpoint_key, None)
+	frappe.db.commit()
+	return updated
+
+
+def get_checkpoint_key(key):
+	return f"franchise_portal_migration:{key}"
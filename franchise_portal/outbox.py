@@ -0,0 +1,214 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Transactional mail outbox
+
+Request handlers call `enqueue_mail`, which only inserts a `Franchise Mail Outbox`
+row inside the caller's transaction. A background job (`drain_outbox`) claims due
+rows in batches, hands them to SMTP and reschedules failures with exponential
+backoff until they run out of attempts and are dead-lettered.
+"""
+
+import random
+
+import frappe
+from frappe.utils import add_to_date, cint, now_datetime
+
+from franchise_portal.instrumentation import span
+
+OUTBOX_DOCTYPE = "Franchise Mail Outbox"
+DRAIN_JOB_ID = "franchise_portal_outbox_drain"
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_BATCHES = 20
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 60
+MAX_BACKOFF_SECONDS = 6 * 60 * 60
+DEFAULT_RETENTION_DAYS = 30
+
+# Rows stuck in "Sending" for this long belong to a worker that died mid-batch
+STALE_CLAIM_MINUTES = 15
+
+
+class OutboxDeliveryError(Exception):
+	pass
+
+
+def enqueue_mail(recipients, subject, message, reference_doctype=None, reference_name=None, status="Pending"):
+	"""Queue an email for background delivery and return the outbox row name
+
+	Rows inserted with another status (e.g. "Digest") are held back from the
+	drain worker, so no drain job is scheduled for them.
+	"""
+	if isinstance(recipients, str):
+		recipients = [recipients]
+
+	with span("mail_enqueue_ms"):
+		row = frappe.get_doc(
+			{
+				"doctype": OUTBOX_DOCTYPE,
+				"status": status,
+				"recipients": "\n".join(recipients),
+				"subject": subject,
+				"message": message,
+				"reference_doctype": reference_doctype,
+				"reference_name": reference_name,
+				"next_attempt_at": now_datetime(),
+			}
+		)
+		row.insert(ignore_permissions=True)
+
+		if status == "Pending":
+			schedule_drain()
+	return row.name
+
+
+def schedule_drain():
+	"""Start a drain job once the current transaction commits
+
+	The job id is fixed, so a burst of submissions results in a single queued job.
+	Anything missed while a drain is already running is picked up by the
+	per-minute scheduler event.
+	"""
+	frappe.enqueue(
+		"franchise_portal.outbox.drain_outbox",
+		queue="short",
+		job_id=DRAIN_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def drain_outbox(batch_size=None, max_batches=DEFAULT_MAX_BATCHES):
+	"""Deliver due outbox rows, one committed batch at a time"""
+	batch_size = cint(batch_size) or cint(frappe.conf.get("franchise_outbox_batch_size")) or DEFAULT_BATCH_SIZE
+
+	release_stale_claims()
+
+	delivered = 0
+	for _ in range(max_batches):
+		names = claim_batch(batch_size)
+		for name in names:
+			delivered += deliver(name)
+
+		if len(names) < batch_size:
+			break
+
+	return delivered
+
+
+def claim_batch(batch_size):
+	"""Mark up to `batch_size` due rows as Sending and return their names
+
+	`SKIP LOCKED` lets several workers drain concurrently without handing the
+	same row to two of them.
+	"""
+	Outbox = frappe.qb.DocType(OUTBOX_DOCTYPE)
+	names = (
+		frappe.qb.from_(Outbox)
+		.select(Outbox.name)
+		.where((Outbox.status == "Pending") & (Outbox.next_attempt_at <= now_datetime()))
+		.orderby(Outbox.next_attempt_at)
+		.limit(batch_size)
+		.for_update(skip_locked=True)
+		.run(pluck=True)
+	)
+
+	if names:
+		(
+			frappe.qb.update(Outbox)
+			.set(Outbox.status, "Sending")
+			.set(Outbox.modified, now_datetime())
+			.where(Outbox.name.isin(names))
+			.run()
+		)
+
+	frappe.db.commit()
+	return names
+
+
+def deliver(name):
+	"""Send one claimed row and record the outcome; returns 1 when it was sent"""
+	row = frappe.get_doc(OUTBOX_DOCTYPE, name)
+
+	try:
+		_send(row)
+	except Exception as e:
+		frappe.db.rollback()
+		record_failure(row, e)
+		sent = 0
+	else:
+		frappe.db.set_value(
+			OUTBOX_DOCTYPE,
+			name,
+			{"status": "Sent", "sent_at": now_datetime(), "attempts": cint(row.attempts) + 1},
+		)
+		sent = 1
+
+	frappe.db.commit()
+	return sent
+
+
+def _send(row):
+	"""Hand the message to Frappe's mailer and wait for the SMTP result"""
+	queue = frappe.sendmail(
+		recipients=row.recipients.split("\n"),
+		subject=row.subject,
+		message=row.message,
+		now=True,
+	)
+
+	queue_name = getattr(queue, "name", None)
+	if queue_name and frappe.db.get_value("Email Queue", queue_name, "status") == "Error":
+		raise OutboxDeliveryError(f"Email Queue {queue_name} failed to send")
+
+
+def record_failure(row, error):
+	"""Reschedule a failed row with backoff, or dead-letter it"""
+	attempts = cint(row.attempts) + 1
+	max_attempts = cint(frappe.conf.get("franchise_outbox_max_attempts")) or DEFAULT_MAX_ATTEMPTS
+
+	values = {"attempts": attempts, "last_error": str(error)[:2000]}
+	if attempts >= max_attempts:
+		values["status"] = "Dead"
+		frappe.log_error(
+			f"Outbox message {row.name} to {row.recipients} dead-lettered after {attempts} attempts: {error}",
+			"Franchise Portal Outbox Error",
+		)
+	else:
+		values["status"] = "Pending"
+		values["next_attempt_at"] = add_to_date(now_datetime(), seconds=get_backoff(attempts))
+
+	frappe.db.set_value(OUTBOX_DOCTYPE, row.name, values)
+
+
+def get_backoff(attempts):
+	"""Exponential backoff in seconds with jitter, so retries of a burst spread out"""
+	base = cint(frappe.conf.get("franchise_outbox_backoff_seconds")) or DEFAULT_BACKOFF_SECONDS
+	delay = min(MAX_BACKOFF_SECONDS, base * 2 ** (attempts - 1))
+	return delay / 2 + random.uniform(0, delay / 2)
+
+
+def release_stale_claims():
+	"""Return rows claimed by a crashed worker to the queue"""
+	Outbox = frappe.qb.DocType(OUTBOX_DOCTYPE)
+	(
+		frappe.qb.update(Outbox)
+		.set(Outbox.status, "Pending")
+		.where(
+			(Outbox.status == "Sending")
+			& (Outbox.modified < add_to_date(now_datetime(), minutes=-STALE_CLAIM_MINUTES))
+		)
+		.run()
+	)
+	frappe.db.commit()
+
+
+def purge_sent_mail():
+	"""Delete delivered rows past the retention window"""
+	days = cint(frappe.conf.get("franchise_outbox_retention_days")) or DEFAULT_RETENTION_DAYS
+	frappe.db.delete(
+		OUTBOX_DOCTYPE,
+		{"status": ("in", ("Sent", "Digested")), "sent_at": ("<", add_to_date(now_datetime(), days=-days))},
+	)
+	frappe.db.commit()
@@ -0,0 +1,107 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Redis page cache for the public signup page
+
+Every anonymous visitor gets the same `/signup` shell: the form, the maps
+configuration and the hashed bundle URLs. `SignupPage` renders it once per
+build and serves it from Redis with an ETag and Last-Modified, so browsers
+revalidate with a 304 and campaign spikes skip the website render.
+
+Entries record the build version and are re-rendered after `bench build`; they
+are dropped on `bench migrate` and `bench clear-website-cache` (the
+`website_clear_cache` hook). Verification links (`?verify=`) carry an
+applicant's session and logged-in users get their own navbar, so both take the
+normal, uncached render.
+"""
+
+import hashlib
+import time
+
+import frappe
+from frappe.utils import get_build_version
+from frappe.website.page_renderers.template_page import TemplatePage
+from frappe.website.utils import can_cache
+from werkzeug.http import http_date
+
+from franchise_portal.redis_keys import client, decode_hash, dumps, make_key
+
+CACHED_PATHS = frozenset(("signup",))
+# upper bound only; entries are replaced as soon as the build changes
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+class SignupPage(TemplatePage):
+	def can_render(self):
+		return (
+			self.path in CACHED_PATHS
+			and frappe.request.method in ("GET", "HEAD")
+			and frappe.session.user == "Guest"
+			and not frappe.form_dict.get("verify")
+			and can_cache()
+			and super().can_render()
+		)
+
+	def render(self):
+		page = get_cached_page(self.path, self.get_html)
+		headers = {
+			"ETag": f'"{page["etag"]}"',
+			"Last-Modified": http_date(page["last_modified"]),
+			# always revalidate; a matching ETag costs one Redis read and a 304
+			"Cache-Control": "no-cache",
+		}
+		if is_not_modified(frappe.request, page):
+			return self.build_response("", 304, headers)
+
+		frappe.local.response.from_cache = True
+		return self.build_response(self.add_csrf_token(page["html"]), 200, headers)
+
+
+def get_cached_page(path, render):
+	"""The cached page for `path`, rendering and storing it if missing or from an older build"""
+	redis = client()
+	key = page_cache_key(path)
+	build_version = get_build_version()
+
+	page = decode_hash(redis.hgetall(key))
+	if page.get("build_version") == build_version:
+		return page
+
+	html = render()
+	page = {
+		"html": html,
+		"etag": hashlib.md5(f"{build_version}:{html}".encode()).hexdigest(),
+		"last_modified": int(time.time()),
+		"build_version": build_version,
+	}
+	pipe = redis.pipeline()
+	pipe.delete(key)
+	pipe.hset(key, mapping={field: dumps(value) for field, value in page.items()})
+	pipe.expire(key, CACHE_TTL_SECONDS)
+	pipe.execute()
+	return page
+
+
+def is_not_modified(request, page):
+	"""Conditional GET: If-None-Match wins; If-Modified-Since only applies without it"""
+	if request.if_none_match:
+		return request.if_none_match.contains_weak(page["etag"])
+	if request.if_modified_since:
+		return int(request.if_modified_since.timestamp()) >= page["last_modified"]
+	return False
+
+
+def page_cache_key(path):
+	return make_key("page_cache", path, frappe.local.lang)
+
+
+def clear_page_cache(path=None):
+	"""`website_clear_cache` hook; clears every cached page, or those for `path`"""
+	if path and path not in CACHED_PATHS:
+		return
+
+	redis = client()
+	for cached_path in [path] if path else CACHED_PATHS:
+		keys = list(redis.scan_iter(match=make_key("page_cache", cached_path, "*")))
+		if keys:
+			redis.delete(*keys)
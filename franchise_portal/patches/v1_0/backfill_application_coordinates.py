@@ -0,0 +1,20 @@
+from franchise_portal.geo import encode, parse_coordinates
+from franchise_portal.migration import migrate_in_chunks
+
+
+def execute():
+	migrate_in_chunks(
+		"backfill_application_coordinates",
+		["gps_coordinates"],
+		get_updates,
+		filters=[["gps_coordinates", "is", "set"]],
+	)
+
+
+def get_updates(rows):
+	updates = {}
+	for row in rows:
+		position = parse_coordinates(row.gps_coordinates)
+		if position is not None:
+			updates[row.name] = {"latitude": position[0], "longitude": position[1], "geohash": encode(*position)}
+	return updates
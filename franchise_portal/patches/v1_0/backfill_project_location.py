@@ -0,0 +1,16 @@
+from franchise_portal.field_map import set_project_location
+from franchise_portal.migration import migrate_in_chunks
+
+
+def execute():
+	migrate_in_chunks("backfill_project_location", ["project_city", "project_state", "project_location"], get_updates)
+
+
+def get_updates(rows):
+	updates = {}
+	for row in rows:
+		location = row.project_location
+		set_project_location(row)
+		if row.project_location != location:
+			updates[row.name] = {"project_location": row.project_location}
+	return updates
@@ -0,0 +1,5 @@
+from franchise_portal.application_search import build_index
+
+
+def execute():
+	build_index()
@@ -0,0 +1,5 @@
+from franchise_portal.application_stats import rebuild_stats
+
+
+def execute():
+	rebuild_stats()
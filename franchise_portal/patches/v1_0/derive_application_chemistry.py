@@ -0,0 +1,5 @@
+from franchise_portal.chemistry import refresh_derived_values
+
+
+def execute():
+	refresh_derived_values()
@@ -0,0 +1,29 @@
+from frappe.utils import flt
+
+from franchise_portal.migration import migrate_in_chunks
+
+
+def execute():
+	"""Make every `ch_ratio` a number before the column becomes a Float"""
+	migrate_in_chunks("normalize_ch_ratio", ["ch_ratio", "carbon_content", "hydrogen_content"], get_updates)
+
+
+def get_updates(rows):
+	updates = {}
+	for row in rows:
+		ratio = parse_ratio(row.ch_ratio)
+		if ratio is None:
+			# not a number: recompute it like the signup form does, or leave it blank (0)
+			carbon, hydrogen = flt(row.carbon_content), flt(row.hydrogen_content)
+			ratio = round(carbon / hydrogen, 2) if carbon > 0 and hydrogen > 0 else 0.0
+		if row.ch_ratio != str(ratio):
+			updates[row.name] = {"ch_ratio": str(ratio)}
+	return updates
+
+
+def parse_ratio(value):
+	try:
+		ratio = float(str(value).strip())
+	except ValueError:
+		return None
+	return ratio if ratio >= 0 and ratio != float("inf") else None
@@ -1,5 +1,8 @@
 // Franchise Portal Signup JavaScript
 // Version: 2.0 - Email Verification Workflow
+// Built by `bench build` into a minified, content-hashed bundle that only /signup loads
+
+import { DraftStore } from './signup/draft_store';
 
 let currentStep = 1;
 let applicationData = {};
@@ -7,6 +10,35 @@ let applicationId = null;
 let verificationToken = null;
 let emailVerified = false;
 
+// Autosave change tracking: field values the server already has. Edits not yet
+// sent wait in the draft store's queue (IndexedDB), so they survive reloads and
+// dropped connections, and are synced in one batched request.
+const AUTOSAVE_DELAY_MS = 1000;
+const SYNC_RETRY_BASE_MS = 1000;
+const SYNC_RETRY_MAX_MS = 60000;
+const draftStore = new DraftStore();
+let savedFieldValues = {};
+let autosaveTimer = null;
+let syncInFlight = false;
+let syncAttempts = 0;
+let flushRequested = false;
+let offlineNotified = false;
+
+// Application status after submission: pushed over the realtime socket to the
+// applicant's channel; polled with backoff only when there is no socket.
+const STATUS_EVENT = 'franchise_application_status';
+const FINAL_STATUSES = ['Approved', 'Rejected'];
+const STATUS_POLL_BASE_MS = 30000;
+const STATUS_POLL_MAX_MS = 300000;
+let statusChannel = null;
+let statusPollTimer = null;
+let statusPollDelay = STATUS_POLL_BASE_MS;
+
+// Idempotency keys by action. A key is reused while its save is in flight or
+// failed on the network with the same payload, so double-clicks and retries
+// replay the server's first response instead of saving twice.
+let idempotencyKeys = {};
+
 // Initialize the form when page loads
 if (typeof frappe !== 'undefined' && frappe.ready) {
     frappe.ready(() => {
@@ -21,15 +53,6 @@ if (typeof frappe !== 'undefined' && frappe.ready) {
     });
 }
 
-// Test function to verify button clicks work
-function testNextStep() {
-    console.log('Test button click works!');
-    alert('Button click registered successfully!');
-}
-
-// Ensure functions are available globally immediately
-window.testNextStep = testNextStep;
-
 function initializeForm() {
     console.log('Initializing form...');
     
@@ -44,9 +67,29 @@ function initializeForm() {
         verificationToken = 'test-token';
     }
     
-    if (verifyToken && !testMode) {
-        handleEmailVerification(verifyToken);
-    }
+    // Restore the draft kept on this device first; it needs no server round trip.
+    // The page renders the verification result for ?verify= links; only ask the
+    // server if this copy of the page came without it
+    const bootstrap = window.franchiseSignupBootstrap || {};
+    draftStore.load().then(({ draft, queue }) => {
+        if (verifyToken && !testMode) {
+            if (bootstrap.verification) {
+                applyVerificationResult(verifyToken, bootstrap.verification);
+            } else {
+                handleEmailVerification(verifyToken);
+            }
+        } else if (draft) {
+            restoreDraft(draft, queue);
+        }
+    }).catch((error) => {
+        console.error('Failed to restore draft:', error);
+    });
+    
+    window.addEventListener('online', () => {
+        offlineNotified = false;
+        syncAttempts = 0;
+        syncDrafts();
+    });
     
     // Force fix Step 3 if it's currently active
     const step3Element = document.getElementById('step3');
@@ -57,10 +100,13 @@ function initializeForm() {
     
     console.log('Form initialization complete');
     
-    // Add input listeners for auto-save
+    // Add input listeners for auto-save; only fields that actually changed are sent
     const inputs = document.querySelectorAll('input, select, textarea');
     inputs.forEach(input => {
-        input.addEventListener('blur', autoSaveStep);
+        if (input.name) {
+            savedFieldValues[input.name] = input.value;
+        }
+        input.addEventListener('blur', trackFieldChange);
     });
 }
 
@@ -72,43 +118,7 @@ function handleEmailVerification(token) {
         args: { token: token },
         callback: function(response) {
             console.log('Verification response:', response);
-            
-            if (response.message && response.message.success) {
-                verificationToken = token;
-                emailVerified = true;
-                
-                const sessionData = response.message.session_data;
-                currentStep = sessionData.current_step + 1; // Move to next unfilled step
-                applicationData = sessionData.data;
-                
-                // Populate form with saved data
-                populateFormData(applicationData);
-                
-                // Show current step
-                showStep(currentStep);
-                updateProgressIndicator();
-                
-                // Show success message
-                frappe.msgprint({
-                    title: 'Email Verified',
-                    message: 'Your email has been verified successfully! You can continue your application.',
-                    indicator: 'green'
-                });
-                
-                // Clean URL
-                history.replaceState({}, '', '/signup');
-                
-            } else {
-                frappe.msgprint({
-                    title: 'Verification Failed',
-                    message: response.message?.message || 'Invalid or expired verification link.',
-                    indicator: 'red'
-                });
-                
-                // Fallback to step 1
-                currentStep = 1;
-                updateProgressIndicator();
-            }
+            applyVerificationResult(token, response.message);
         },
         error: function(error) {
             console.error('Verification error:', error);
@@ -125,6 +135,83 @@ function handleEmailVerification(token) {
     });
 }
 
+function applyVerificationResult(token, result) {
+    if (result && result.success) {
+        verificationToken = token;
+        emailVerified = true;
+        statusChannel = result.status_channel || null;
+        
+        const sessionData = result.session_data;
+        currentStep = sessionData.current_step + 1; // Move to next unfilled step
+        applicationData = sessionData.data;
+        
+        // Populate form with saved data, then any edits this device has not synced yet
+        populateFormData(applicationData);
+        draftStore.load().then(({ queue }) => applyQueuedChanges(queue));
+        
+        // Show current step
+        showStep(currentStep);
+        updateProgressIndicator();
+        
+        // Show success message
+        frappe.msgprint({
+            title: 'Email Verified',
+            message: 'Your email has been verified successfully! You can continue your application.',
+            indicator: 'green'
+        });
+        
+        // Clean URL
+        history.replaceState({}, '', '/signup');
+        
+    } else {
+        frappe.msgprint({
+            title: 'Verification Failed',
+            message: result?.message || 'Invalid or expired verification link.',
+            indicator: 'red'
+        });
+        
+        // Fallback to step 1
+        currentStep = 1;
+        updateProgressIndicator();
+    }
+}
+
+function restoreDraft(draft, queue) {
+    console.log('Restoring local draft');
+    verificationToken = draft.verification_token || null;
+    emailVerified = Boolean(draft.email_verified && verificationToken);
+    currentStep = draft.current_step || 1;
+    applicationData = draft.data || {};
+    
+    // Fields still in the queue are not on the server yet, so they are not marked saved
+    const synced = Object.assign({}, applicationData);
+    Object.keys(queue).forEach(key => delete synced[key]);
+    populateFormData(synced);
+    applyQueuedChanges(queue);
+    
+    showStep(currentStep);
+    updateProgressIndicator();
+}
+
+function applyQueuedChanges(queue) {
+    if (Object.keys(queue).length === 0) {
+        return;
+    }
+    
+    Object.assign(applicationData, queue);
+    populateFormData(queue, false);
+    syncDrafts();
+}
+
+function saveDraft() {
+    draftStore.saveDraft({
+        data: applicationData,
+        current_step: currentStep,
+        verification_token: verificationToken,
+        email_verified: emailVerified
+    }).catch((error) => console.error('Failed to save draft:', error));
+}
+
 function nextStep(step) {
     console.log(`Next step clicked for step ${step}`);
     console.log(`Current emailVerified status: ${emailVerified}`);
@@ -159,6 +246,7 @@ function nextStep(step) {
 window.nextStep = nextStep;
 
 function previousStep(step) {
+    flushAutosave();
     currentStep = step - 1;
     showStep(currentStep);
     updateProgressIndicator();
@@ -227,6 +315,9 @@ function showStep(stepNumber) {
     
     // Update progress indicator
     updateProgressIndicator();
+    
+    // Remember the step, so a reload returns here
+    saveDraft();
 }
 
 function updateProgressIndicator() {
@@ -410,6 +501,8 @@ function saveStepData(step, callback) {
     
     console.log('Saving step data:', stepData);
     
+    const idempotencyAction = `step-${step}`;
+    
     if (emailVerified && verificationToken && verificationToken !== 'test-token') {
         // Use verified session API (but not for test mode)
         frappe.call({
@@ -417,11 +510,14 @@ function saveStepData(step, callback) {
             args: { 
                 token: verificationToken,
                 data: stepData,
-                step: step
+                step: step,
+                idempotency_key: getIdempotencyKey(idempotencyAction, stepData)
             },
             callback: function(response) {
+                releaseIdempotencyKey(idempotencyAction);
                 console.log('Verified API Response:', response);
                 if (response.message && response.message.success) {
+                    markFieldsSaved(stepData);
                     if (response.message.application_id) {
                         applicationId = response.message.application_id;
                     }
@@ -448,11 +544,7 @@ function saveStepData(step, callback) {
                 console.error('XHR responseJSON:', xhr.responseJSON);
                 console.error('Text Status:', textStatus);
                 console.error('Error Thrown:', errorThrown);
-                frappe.msgprint({
-                    title: 'Network Error',
-                    message: 'Failed to save step data. Please check your connection and try again.',
-                    indicator: 'red'
-                });
+                queueUnsavedStep(stepData);
             }
         });
     } else {
@@ -461,11 +553,14 @@ function saveStepData(step, callback) {
         frappe.call({
             method: 'franchise_portal.www.signup.api.save_step',
             args: { 
-                data: stepData 
+                data: stepData,
+                idempotency_key: getIdempotencyKey(idempotencyAction, stepData)
             },
             callback: function(response) {
+                releaseIdempotencyKey(idempotencyAction);
                 console.log('Fallback API Response:', response);
                 if (response.message && response.message.success) {
+                    markFieldsSaved(stepData);
                     if (response.message.application_id) {
                         applicationId = response.message.application_id;
                     }
@@ -483,30 +578,156 @@ function saveStepData(step, callback) {
             },
             error: function(error) {
                 console.error('Network Error saving step:', error);
-                frappe.msgprint({
-                    title: 'Network Error',
-                    message: 'Failed to save step data. Please check your connection and try again.',
-                    indicator: 'red'
-                });
+                queueUnsavedStep(stepData);
             }
         });
     }
 }
 
-function autoSaveStep() {
-    if (currentStep <= 3) {
-        const stepData = getStepData(currentStep);
-        Object.assign(applicationData, stepData);
+function queueUnsavedStep(stepData) {
+    // Keep the step on this device; it syncs with the next batch once the connection is back
+    draftStore.enqueue(stepData).then(() => scheduleSync(AUTOSAVE_DELAY_MS));
+    if (navigator.onLine && typeof frappe !== 'undefined' && frappe.show_alert) {
+        frappe.show_alert({
+            message: 'Could not reach the server. Your answers are saved on this device; please try again shortly.',
+            indicator: 'orange'
+        });
+    } else if (!navigator.onLine) {
+        notifyOffline();
+    }
+}
+
+function getIdempotencyKey(action, payload) {
+    const fingerprint = JSON.stringify(payload);
+    const existing = idempotencyKeys[action];
+    if (existing && existing.fingerprint === fingerprint) {
+        return existing.key;
+    }
+    
+    const key = (window.crypto && crypto.randomUUID)
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    idempotencyKeys[action] = { key: key, fingerprint: fingerprint };
+    return key;
+}
+
+function releaseIdempotencyKey(action) {
+    // The server answered, so the next save of this action is a new request
+    delete idempotencyKeys[action];
+}
+
+function trackFieldChange(event) {
+    const field = event.target;
+    if (!field.name) {
+        return;
+    }
+    
+    if (savedFieldValues[field.name] === field.value) {
+        draftStore.dequeue([field.name]);
+        return;
+    }
+    
+    applicationData[field.name] = field.value;
+    saveDraft();
+    
+    // Batch edits made in quick succession into one request
+    draftStore.enqueue({ [field.name]: field.value })
+        .then(() => scheduleSync(AUTOSAVE_DELAY_MS))
+        .catch((error) => console.error('Failed to queue change:', error));
+}
+
+function markFieldsSaved(data) {
+    Object.keys(data).forEach(key => {
+        savedFieldValues[key] = data[key];
+    });
+    draftStore.acknowledge(data);
+}
+
+function scheduleSync(delay) {
+    clearTimeout(autosaveTimer);
+    autosaveTimer = setTimeout(syncDrafts, delay);
+}
+
+// Send every queued change in one request. A flush (step navigation) also
+// writes the server-side buffer to the application straight away.
+function syncDrafts(flush) {
+    flushRequested = flushRequested || flush === true;
+    clearTimeout(autosaveTimer);
+    
+    const email = applicationData.email;
+    if (!email || syncInFlight) {
+        // an in-flight sync checks the queue again when it finishes
+        return;
+    }
+    if (!navigator.onLine) {
+        // resumed by the 'online' listener
+        notifyOffline();
+        return;
+    }
+    
+    draftStore.load().then(({ queue }) => {
+        const flushing = flushRequested;
+        if (!flushing && Object.keys(queue).length === 0) {
+            return;
+        }
         
-        // Auto-save without showing loading
+        syncInFlight = true;
         frappe.call({
-            method: 'franchise_portal.www.signup.api.save_step',
-            args: { data: stepData },
-            no_spinner: true
+            method: flushing
+                ? 'franchise_portal.www.signup.api.flush_autosave'
+                : 'franchise_portal.www.signup.api.autosave_fields',
+            args: { email: email, changes: queue },
+            no_spinner: true,
+            callback: function(response) {
+                syncInFlight = false;
+                if (response.message && response.message.success) {
+                    syncAttempts = 0;
+                    if (flushing) {
+                        flushRequested = false;
+                    }
+                    markFieldsSaved(queue);
+                    draftStore.load().then(({ queue }) => {
+                        if (flushRequested || Object.keys(queue).length > 0) {
+                            scheduleSync(AUTOSAVE_DELAY_MS);
+                        }
+                    });
+                } else {
+                    retrySync();
+                }
+            },
+            error: function() {
+                syncInFlight = false;
+                retrySync();
+            }
+        });
+    });
+}
+
+function retrySync() {
+    // Exponential backoff with jitter, so a server under load is not hammered
+    const delay = Math.min(SYNC_RETRY_MAX_MS, SYNC_RETRY_BASE_MS * Math.pow(2, syncAttempts));
+    syncAttempts += 1;
+    scheduleSync(delay * (0.8 + Math.random() * 0.4));
+}
+
+function notifyOffline() {
+    // One notice per offline spell instead of an error dialog per failed save
+    if (offlineNotified) {
+        return;
+    }
+    offlineNotified = true;
+    if (typeof frappe !== 'undefined' && frappe.show_alert) {
+        frappe.show_alert({
+            message: 'You are offline. Your answers are saved on this device and will sync when you reconnect.',
+            indicator: 'orange'
         });
     }
 }
 
+function flushAutosave() {
+    syncDrafts(true);
+}
+
 function submitApplication() {
     if (!validateStep(3)) {
         return;
@@ -526,13 +747,15 @@ function submitApplication() {
             args: { 
                 token: verificationToken,
                 data: finalData,
-                step: 3
+                step: 3,
+                idempotency_key: getIdempotencyKey('submit', finalData)
             },
             callback: function(response) {
+                releaseIdempotencyKey('submit');
                 showLoading(false);
                 
                 if (response.message && response.message.success) {
-                    showSuccessMessage(response.message.application_id);
+                    showSuccessMessage(response.message.application_id, response.message.status_channel);
                 } else {
                     frappe.msgprint({
                         title: 'Submission Error',
@@ -558,9 +781,11 @@ function submitApplication() {
             method: 'franchise_portal.www.signup.api.submit_application',
             args: { 
                 email: applicationData.email,
-                data: applicationData
+                data: applicationData,
+                idempotency_key: getIdempotencyKey('submit', applicationData)
             },
             callback: function(response) {
+                releaseIdempotencyKey('submit');
                 showLoading(false);
                 console.log('Fallback submit response:', response);
                 
@@ -605,7 +830,7 @@ function showLoading(show) {
     }
 }
 
-function showSuccessMessage(appId) {
+function showSuccessMessage(appId, channel) {
     const formContainer = document.querySelector('.form-container');
     const successDiv = document.getElementById('success');
     const applicationIdSpan = document.getElementById('application-id');
@@ -622,28 +847,87 @@ function showSuccessMessage(appId) {
     }
     successDiv.style.display = 'block';
     
+    // The application is on the server now; nothing left to keep on this device
+    draftStore.clear();
+    
     // Update progress to show completion
     document.querySelectorAll('.progress-step').forEach(step => {
         step.className = 'progress-step completed';
     });
+    
+    watchApplicationStatus(channel || statusChannel, applicationData.email);
+}
+
+function watchApplicationStatus(channel, email) {
+    const realtime = typeof frappe !== 'undefined' ? frappe.realtime : null;
+    if (channel && realtime && realtime.socket && typeof realtime.task_subscribe === 'function') {
+        // Only this applicant's events are published to the channel's room
+        realtime.on(STATUS_EVENT, (event) => showApplicationStatus(event.status));
+        realtime.task_subscribe(channel);
+        // Catch up on anything published while the socket was reconnecting
+        realtime.socket.on('connect', () => {
+            realtime.task_subscribe(channel);
+            pollApplicationStatus(email, false);
+        });
+        return;
+    }
+    
+    if (email) {
+        scheduleStatusPoll(email);
+    }
+}
+
+function scheduleStatusPoll(email) {
+    clearTimeout(statusPollTimer);
+    statusPollTimer = setTimeout(() => pollApplicationStatus(email, true), statusPollDelay);
+    // Reviews take days; back off so an open tab costs next to nothing
+    statusPollDelay = Math.min(statusPollDelay * 2, STATUS_POLL_MAX_MS);
+}
+
+function pollApplicationStatus(email, reschedule) {
+    frappe.call({
+        method: 'franchise_portal.www.signup.api.get_application_status',
+        args: { email: email },
+        callback: function(response) {
+            const application = response.message && response.message.application;
+            if (application) {
+                showApplicationStatus(application.status);
+            }
+            if (reschedule && !(application && FINAL_STATUSES.includes(application.status))) {
+                scheduleStatusPoll(email);
+            }
+        },
+        error: function() {
+            if (reschedule) {
+                scheduleStatusPoll(email);
+            }
+        }
+    });
+}
+
+function showApplicationStatus(status) {
+    const statusSpan = document.getElementById('application-status');
+    if (statusSpan && status) {
+        statusSpan.textContent = status;
+    }
+    if (FINAL_STATUSES.includes(status)) {
+        clearTimeout(statusPollTimer);
+    }
 }
 
 // Utility function to populate form if returning user
-function populateFormData(data) {
+function populateFormData(data, markSaved = true) {
     Object.keys(data).forEach(key => {
         const field = document.getElementById(key);
         if (field) {
             field.value = data[key] || '';
+            if (markSaved) {
+                savedFieldValues[key] = field.value;
+            }
         }
     });
 }
 
-// Google Maps Variables
-let map;
-let selectedMarker;
-let selectedCoordinates = null;
-let searchBox;
-
 // Project ID Generation
 function generateProjectId() {
     const companyName = applicationData.company_name || document.getElementById('company_name')?.value || '';
@@ -660,350 +944,39 @@ function generateProjectId() {
     }
 }
 
-// Google Maps Functions
-function initMap() {
-    console.log('initMap called');
-    
-    try {
-        // Check if Google Maps is loaded
-        if (typeof google === 'undefined' || !google.maps) {
-            console.error('Google Maps API not loaded');
-            return;
-        }
-        
-        console.log('Google Maps API loaded successfully');
-        
-        // Initialize map centered on India
-        const mapElement = document.getElementById('map');
-        if (!mapElement) {
-            console.error('Map element not found');
-            return;
-        }
-        
-        map = new google.maps.Map(mapElement, {
-            center: { lat: 20.5937, lng: 78.9629 }, // India center
-            zoom: 5,
-            mapTypeControl: true,
-            streetViewControl: true,
-            fullscreenControl: true
-        });
-        
-        console.log('Map initialized successfully');
-        
-        // Initialize Places search
-        const searchInput = document.getElementById('mapSearchInput');
-        if (searchInput && google.maps.places) {
-            searchBox = new google.maps.places.SearchBox(searchInput);
-            
-            // Bias search results to current map viewport
-            map.addListener('bounds_changed', () => {
-                searchBox.setBounds(map.getBounds());
-            });
-            
-            // Listen for place search results
-            searchBox.addListener('places_changed', () => {
-                const places = searchBox.getPlaces();
-                if (places.length === 0) return;
-                
-                const place = places[0];
-                if (!place.geometry || !place.geometry.location) return;
-                
-                // Center map on selected place
-                map.setCenter(place.geometry.location);
-                map.setZoom(15);
-                
-                // Add marker at selected place
-                addMarkerAtLocation(place.geometry.location);
-            });
-            
-            console.log('Places search initialized');
-        } else {
-            console.warn('Places API not available or search input not found');
-        }
-        
-        // Add click listener to map
-        map.addListener('click', (event) => {
-            console.log('Map clicked at:', event.latLng.toString());
-            addMarkerAtLocation(event.latLng);
-        });
-        
-    } catch (error) {
-        console.error('Error initializing map:', error);
-    }
-}
-
-// Fallback initialization function
-function initMapFallback() {
-    console.log('Fallback map initialization');
-    if (typeof google !== 'undefined' && google.maps) {
-        initMap();
-    } else {
-        console.log('Google Maps not ready, retrying in 500ms...');
-        setTimeout(initMapFallback, 500);
-    }
-}
+// Map modal: Google Maps code lives in signup_map.bundle.js and is loaded the
+// first time the modal is opened
+let mapBundlePromise = null;
 
-function addMarkerAtLocation(location) {
-    // Remove existing marker
-    if (selectedMarker) {
-        selectedMarker.setMap(null);
+function loadMapBundle() {
+    if (!mapBundlePromise) {
+        mapBundlePromise = new Promise((resolve, reject) => {
+            // hashed bundle URL, resolved server-side by www/signup/index.py
+            const assets = (window.franchiseSignupBootstrap || {}).assets || {};
+            const script = document.createElement('script');
+            script.src = assets.map_bundle;
+            script.onload = () => resolve(window.franchiseSignupMap);
+            script.onerror = () => {
+                mapBundlePromise = null;
+                reject(new Error('Failed to load the map'));
+            };
+            document.head.appendChild(script);
+        });
     }
-    
-    // Add new marker
-    selectedMarker = new google.maps.Marker({
-        position: location,
-        map: map,
-        title: 'Selected Location'
-    });
-    
-    // Store coordinates
-    selectedCoordinates = {
-        lat: location.lat(),
-        lng: location.lng()
-    };
-    
-    // Update coordinates display
-    const coordinatesText = `${selectedCoordinates.lat.toFixed(6)}, ${selectedCoordinates.lng.toFixed(6)}`;
-    document.getElementById('coordinatesDisplay').textContent = `Selected: ${coordinatesText}`;
+    return mapBundlePromise;
 }
 
 function openMapModal() {
-    console.log('Opening map modal');
-    
-    const modal = document.getElementById('mapModal');
-    const modalContent = document.querySelector('.map-modal-content');
-    const mapElement = document.getElementById('map');
-    
-    modal.style.display = 'block';
-    
-    // Force modal to be within viewport and fix button visibility
-    setTimeout(() => {
-        if (modalContent) {
-            // Ensure modal fits in viewport
-            const viewportHeight = window.innerHeight;
-            const modalMaxHeight = Math.min(600, viewportHeight - 100); // Leave 100px margin
-            
-            modalContent.style.maxHeight = modalMaxHeight + 'px';
-            modalContent.style.top = '50px';
-            modalContent.style.position = 'relative';
-            modalContent.style.overflow = 'hidden';
-            
-            // Adjust content area height to make room for buttons
-            const contentArea = document.querySelector('.map-content-area');
-            if (contentArea) {
-                contentArea.style.height = (modalMaxHeight - 120) + 'px'; // Reserve space for header + buttons
-                contentArea.style.overflow = 'auto';
-            }
-            
-            // Ensure buttons are visible
-            const buttons = document.querySelector('.map-buttons');
-            if (buttons) {
-                buttons.style.position = 'absolute';
-                buttons.style.bottom = '0';
-                buttons.style.left = '0';
-                buttons.style.right = '0';
-                buttons.style.zIndex = '1000';
-                buttons.style.backgroundColor = '#f8f9fa';
-                buttons.style.borderTop = '2px solid #667eea';
-                buttons.style.padding = '10px 15px';
-            }
-            
-            const rect = modalContent.getBoundingClientRect();
-            console.log('Modal dimensions after adjustment:', {
-                width: rect.width,
-                height: rect.height,
-                top: rect.top,
-                bottom: rect.bottom,
-                windowHeight: window.innerHeight,
-                modalMaxHeight: modalMaxHeight
-            });
-            
-            // Check button visibility
-            if (buttons) {
-                const buttonRect = buttons.getBoundingClientRect();
-                console.log('Buttons position after adjustment:', {
-                    top: buttonRect.top,
-                    bottom: buttonRect.bottom,
-                    visible: buttonRect.bottom <= window.innerHeight
-                });
-            }
-        }
-    }, 100);
-    
-    // Load Google Maps API - implement direct API loading if the HTML function isn't available
-    if (mapElement) {
-        mapElement.innerHTML = '<div style="padding: 20px; text-align: center;"><p>Loading Google Maps...</p></div>';
-    }
-    
-    // More robust Google Maps loading
-    const loadGoogleMaps = () => {
-        return new Promise((resolve, reject) => {
-            // Check if Google Maps is already loaded
-            if (typeof google !== 'undefined' && google.maps) {
-                console.log('Google Maps already available');
-                resolve();
-                return;
-            }
-            
-            // Try to use the HTML function first
-            if (typeof window.loadGoogleMapsAPI === 'function') {
-                console.log('Using HTML loadGoogleMapsAPI function');
-                window.loadGoogleMapsAPI()
-                    .then(resolve)
-                    .catch((error) => {
-                        console.log('HTML loadGoogleMapsAPI failed, trying direct method:', error);
-                        loadGoogleMapsDirectly().then(resolve).catch(reject);
-                    });
-            } else {
-                console.log('HTML loadGoogleMapsAPI not available, using direct method');
-                loadGoogleMapsDirectly().then(resolve).catch(reject);
-            }
-        });
-    };
-    
-    // Direct Google Maps loading function
-    const loadGoogleMapsDirectly = () => {
-        return new Promise((resolve, reject) => {
-            // First get the API key
-            frappe.call({
-                method: 'franchise_portal.www.signup.api.get_google_maps_api_key',
-                callback: function(response) {
-                    if (response.message && response.message.success) {
-                        const apiKey = response.message.api_key;
-                        console.log('API key retrieved for direct loading');
-                        
-                        // Check if script already exists
-                        const existingScript = document.querySelector('script[src*="maps.googleapis.com"]');
-                        if (existingScript) {
-                            console.log('Google Maps script already exists, waiting for load...');
-                            // Wait for existing script to load
-                            const checkGoogleMaps = setInterval(() => {
-                                if (typeof google !== 'undefined' && google.maps) {
-                                    clearInterval(checkGoogleMaps);
-                                    resolve();
-                                }
-                            }, 100);
-                            
-                            setTimeout(() => {
-                                clearInterval(checkGoogleMaps);
-                                reject(new Error('Google Maps loading timeout'));
-                            }, 10000);
-                            return;
-                        }
-                        
-                        // Create callback function
-                        window.directMapCallback = function() {
-                            console.log('Direct Google Maps callback triggered');
-                            resolve();
-                        };
-                        
-                        // Create and load script
-                        const script = document.createElement('script');
-                        script.async = true;
-                        script.defer = true;
-                        script.src = `https://maps.googleapis.com/maps/api/js?key=${apiKey}&libraries=places&callback=directMapCallback`;
-                        script.onerror = () => reject(new Error('Failed to load Google Maps script'));
-                        
-                        document.head.appendChild(script);
-                        
-                    } else {
-                        reject(new Error('Failed to get API key: ' + (response.message?.message || 'Unknown error')));
-                    }
-                },
-                error: function(error) {
-                    reject(new Error('Error fetching API key: ' + error.message));
-                }
-            });
-        });
-    };
-    
-    // Load Google Maps
-    loadGoogleMaps()
-        .then(() => {
-            console.log('Google Maps loaded successfully, initializing map...');
-            
-            // Initialize map if not already done
-            if (!map && typeof google !== 'undefined' && google.maps) {
-                console.log('Initializing map on modal open');
-                initMap();
-            } else if (!map) {
-                console.log('Google Maps not ready, using fallback');
-                initMapFallback();
-            }
-            
-            // Trigger map resize to ensure proper display
-            setTimeout(() => {
-                if (map && typeof google !== 'undefined') {
-                    console.log('Triggering map resize');
-                    google.maps.event.trigger(map, 'resize');
-                    
-                    // Re-center the map
-                    map.setCenter({ lat: 20.5937, lng: 78.9629 });
-                } else {
-                    console.warn('Map not available for resize');
-                }
-            }, 300);
-        })
+    loadMapBundle()
+        .then((signupMap) => signupMap.openMapModal())
         .catch((error) => {
-            console.error('Failed to load Google Maps:', error);
-            if (mapElement) {
-                mapElement.innerHTML = '<div style="padding: 20px; text-align: center; color: #dc3545;">' +
-                    '<h4>📍 Map Loading Issue</h4>' +
-                    '<p>' + error.message + '</p>' +
-                    '<div style="background: #f8f9fa; padding: 15px; border-radius: 5px; margin: 10px 0;">' +
-                    '<strong>✅ Alternative: Manual Entry</strong><br>' +
-                    'You can enter coordinates directly in the GPS field below:<br>' +
-                    '<code style="background: white; padding: 2px 5px;">28.6139, 77.2090</code> (latitude, longitude)<br>' +
-                    '<small>💡 Get coordinates from Google Maps by right-clicking any location</small>' +
-                    '</div>' +
-                    '</div>';
-            }
-        });
-}
-
-function closeMapModal() {
-    document.getElementById('mapModal').style.display = 'none';
-}
-
-function confirmLocation() {
-    if (selectedCoordinates) {
-        const coordinatesText = `${selectedCoordinates.lat.toFixed(6)}, ${selectedCoordinates.lng.toFixed(6)}`;
-        document.getElementById('gps_coordinates').value = coordinatesText;
-        closeMapModal();
-        
-        // Show success message
-        if (typeof frappe !== 'undefined' && frappe.show_alert) {
-            frappe.show_alert({
-                message: 'Location selected successfully!',
-                indicator: 'green'
-            });
-        }
-    } else {
-        if (typeof frappe !== 'undefined' && frappe.msgprint) {
+            console.error('Failed to load map bundle:', error);
             frappe.msgprint({
-                title: 'No Location Selected',
-                message: 'Please click on the map to select a location first.',
-                indicator: 'red'
+                title: 'Map Unavailable',
+                message: 'The map could not be loaded. You can enter coordinates manually in the GPS field (latitude, longitude).',
+                indicator: 'orange'
             });
-        } else {
-            alert('Please click on the map to select a location first.');
-        }
-    }
-}
-
-function enableManualEntry() {
-    const coordinatesField = document.getElementById('gps_coordinates');
-    coordinatesField.removeAttribute('readonly');
-    coordinatesField.focus();
-    coordinatesField.placeholder = 'Enter coordinates manually (e.g., 28.6139, 77.2090)';
-    
-    // Show help message
-    if (typeof frappe !== 'undefined' && frappe.show_alert) {
-        frappe.show_alert({
-            message: 'You can now enter coordinates manually. Format: latitude, longitude',
-            indicator: 'blue'
         });
-    }
 }
 
 // Step 3 Conditional Logic Functions
@@ -1063,75 +1036,9 @@ function calculateCHRatio() {
 }
 
 // Export functions for global access
-window.nextStep = nextStep;
-window.previousStep = previousStep;
-window.submitApplication = submitApplication;
-window.testNextStep = testNextStep;
 window.generateProjectId = generateProjectId;
-window.initMap = initMap;
-window.initMapFallback = initMapFallback;
 window.openMapModal = openMapModal;
-window.closeMapModal = closeMapModal;
-window.confirmLocation = confirmLocation;
-window.enableManualEntry = enableManualEntry;
 window.togglePaymentDetails = togglePaymentDetails;
 window.toggleOtherContaminants = toggleOtherContaminants;
 window.toggleSeasonalMonths = toggleSeasonalMonths;
 window.calculateCHRatio = calculateCHRatio;
-window.forceFixStep3Layout = forceFixStep3Layout;
-
-// Add debugging function
-window.debugStep3 = function() {
-    const step3 = document.getElementById('step3');
-    console.log('=== Step 3 Debug Info ===');
-    console.log('Step 3 element:', step3);
-    console.log('Step 3 computed styles:', step3 ? window.getComputedStyle(step3) : 'Not found');
-    console.log('Step 3 inline styles:', step3 ? step3.style.cssText : 'Not found');
-    console.log('Step 3 classes:', step3 ? step3.classList : 'Not found');
-    console.log('Form container:', document.querySelector('.form-container'));
-    console.log('========================');
-};
-
-// Add a manual function to force fix Step 3 layout
-function forceFixStep3Layout() {
-    console.log('Manually forcing Step 3 layout fix...');
-    const step3Element = document.getElementById('step3');
-    if (step3Element) {
-        // Apply the same fixes as in showStep function
-        step3Element.style.cssText = `
-            display: block !important;
-            max-height: none !important;
-            overflow-y: visible !important;
-            overflow-x: visible !important;
-            padding: 30px 50px 30px 50px !important;
-            margin: 0 !important;
-            margin-left: 0 !important;
-            box-sizing: border-box !important;
-            width: 100% !important;
-            position: relative !important;
-            left: 0 !important;
-            transform: none !important;
-            border: none !important;
-            background-color: transparent !important;
-        `;
-        
-        // Fix parent container
-        const formContainer = document.querySelector('.form-container');
-        if (formContainer) {
-            formContainer.style.overflow = 'visible';
-            formContainer.style.maxHeight = 'none';
-            formContainer.style.paddingLeft = '50px';
-        }
-        
-        // Fix all child elements
-        const step3Elements = step3Element.querySelectorAll('*');
-        step3Elements.forEach(element => {
-            element.style.marginLeft = '0';
-            element.style.paddingLeft = '0';
-            element.style.position = 'relative';
-            element.style.left = '0';
-        });
-        
-        console.log('Step 3 layout manually fixed');
-    }
-} 
\ No newline at end of file
@@ -0,0 +1,159 @@
+// Franchise Portal Signup - client-side draft store
+// Keeps the application draft and the queue of unsynced field changes in
+// IndexedDB, so a reload or a dropped connection never loses an applicant's
+// answers. The queue is keyed by field name: editing a field again replaces
+// its queued value, so a sync sends each field once. Falls back to memory
+// when IndexedDB is unavailable (e.g. some private browsing modes).
+
+const DB_NAME = 'franchise_signup';
+const DB_VERSION = 1;
+const DRAFT_STORE = 'draft';
+const QUEUE_STORE = 'queue';
+const DRAFT_KEY = 'current';
+
+function promisify(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function openDatabase() {
+    if (typeof indexedDB === 'undefined') {
+        return Promise.resolve(null);
+    }
+
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+    request.onupgradeneeded = () => {
+        const db = request.result;
+        if (!db.objectStoreNames.contains(DRAFT_STORE)) {
+            db.createObjectStore(DRAFT_STORE);
+        }
+        if (!db.objectStoreNames.contains(QUEUE_STORE)) {
+            db.createObjectStore(QUEUE_STORE);
+        }
+    };
+    return promisify(request).catch((error) => {
+        console.warn('IndexedDB unavailable, keeping the draft in memory:', error);
+        return null;
+    });
+}
+
+export class DraftStore {
+    constructor() {
+        this.dbPromise = null;
+        this.memory = { draft: null, queue: {} };
+    }
+
+    db() {
+        if (!this.dbPromise) {
+            this.dbPromise = openDatabase();
+        }
+        return this.dbPromise;
+    }
+
+    // Run `fn(stores)` in one transaction; resolves once it has committed
+    transaction(mode, fn) {
+        return this.db().then((db) => {
+            if (!db) {
+                return fn(null);
+            }
+
+            const tx = db.transaction([DRAFT_STORE, QUEUE_STORE], mode);
+            const result = fn({ draft: tx.objectStore(DRAFT_STORE), queue: tx.objectStore(QUEUE_STORE) });
+            return new Promise((resolve, reject) => {
+                tx.oncomplete = () => Promise.resolve(result).then(resolve);
+                tx.onerror = () => reject(tx.error);
+                tx.onabort = () => reject(tx.error);
+            });
+        });
+    }
+
+    // The saved draft and the unsynced changes, as { draft, queue }
+    load() {
+        return this.transaction('readonly', (stores) => {
+            if (!stores) {
+                return { draft: this.memory.draft, queue: Object.assign({}, this.memory.queue) };
+            }
+
+            const draft = promisify(stores.draft.get(DRAFT_KEY));
+            const keys = promisify(stores.queue.getAllKeys());
+            const values = promisify(stores.queue.getAll());
+            return Promise.all([draft, keys, values]).then(([draft, keys, values]) => {
+                const queue = {};
+                keys.forEach((key, index) => {
+                    queue[key] = values[index];
+                });
+                return { draft: draft || null, queue: queue };
+            });
+        });
+    }
+
+    saveDraft(draft) {
+        const value = Object.assign({}, draft, { updated_at: Date.now() });
+        return this.transaction('readwrite', (stores) => {
+            if (!stores) {
+                this.memory.draft = value;
+                return;
+            }
+            stores.draft.put(value, DRAFT_KEY);
+        });
+    }
+
+    // Queue field changes; a field already queued keeps only its newest value
+    enqueue(changes) {
+        return this.transaction('readwrite', (stores) => {
+            Object.keys(changes).forEach((field) => {
+                if (!stores) {
+                    this.memory.queue[field] = changes[field];
+                } else {
+                    stores.queue.put(changes[field], field);
+                }
+            });
+        });
+    }
+
+    // Drop fields from the queue, e.g. when an edit is reverted to the saved value
+    dequeue(fields) {
+        return this.transaction('readwrite', (stores) => {
+            fields.forEach((field) => {
+                if (!stores) {
+                    delete this.memory.queue[field];
+                } else {
+                    stores.queue.delete(field);
+                }
+            });
+        });
+    }
+
+    // Remove synced changes, unless the field was edited again while the sync was in flight
+    acknowledge(synced) {
+        return this.transaction('readwrite', (stores) => {
+            Object.keys(synced).forEach((field) => {
+                if (!stores) {
+                    if (this.memory.queue[field] === synced[field]) {
+                        delete this.memory.queue[field];
+                    }
+                    return;
+                }
+
+                promisify(stores.queue.get(field)).then((value) => {
+                    if (value === synced[field]) {
+                        stores.queue.delete(field);
+                    }
+                });
+            });
+        });
+    }
+
+    clear() {
+        return this.transaction('readwrite', (stores) => {
+            if (!stores) {
+                this.memory = { draft: null, queue: {} };
+                return;
+            }
+            stores.draft.clear();
+            stores.queue.clear();
+        });
+    }
+}
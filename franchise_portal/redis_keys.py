@@ -0,0 +1,51 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Raw Redis access for data structures `frappe.cache()` has no helpers for
+
+`frappe.cache()` pickles values and prefixes keys inside its own hash and set
+helpers. Hashes, sorted sets and Lua scripts go through a plain client on the
+same connection pool instead, with keys namespaced per site through `make_key`
+so they never collide with another site on the bench.
+"""
+
+import json
+
+import frappe
+from redis import Redis
+
+# Delete a lock only if it still holds our owner token, so a lock that expired
+# and was taken by another request is never released by us
+RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+	return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def client():
+	"""Plain redis-py client sharing the cache connection pool"""
+	return Redis(connection_pool=frappe.cache().connection_pool)
+
+
+def make_key(*parts):
+	"""Site-scoped key for the app, e.g. `make_key("autosave", email)`"""
+	return frappe.cache().make_key(":".join(("franchise_portal", *map(str, parts))))
+
+
+def dumps(value):
+	return json.dumps(value, default=str, separators=(",", ":"))
+
+
+def loads(raw):
+	if raw is None:
+		return None
+	return json.loads(raw)
+
+
+def decode_hash(raw):
+	"""Decode an HGETALL reply (dict or flat list) of JSON values into a dict"""
+	if isinstance(raw, list | tuple):
+		raw = dict(zip(raw[::2], raw[1::2], strict=True))
+	return {frappe.safe_decode(field): loads(value) for field, value in raw.items()}
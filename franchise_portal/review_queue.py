@@ -0,0 +1,119 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Review queue: newest applications first, paged with a keyset cursor
+
+Reviewers page through applications by `modified DESC` (the doctype's sort
+order), with `name` as the tie-breaker. Instead of `LIMIT ... OFFSET`, which
+reads and throws away every row before the page, each page continues from the
+(modified, name) of the last row of the previous one. With the composite
+indexes on (status, [primary_feedstock_category,] modified, name) from
+`on_doctype_update`, any page is a single index range read, so page 1000 costs
+the same as page 1. There is no total count, which would scan every match.
+
+Only the requested columns are selected. The default projection is what the
+queue list shows, without the chemistry columns. Cursors are opaque to clients.
+"""
+
+import base64
+import json
+
+import frappe
+from frappe.utils import cint, get_datetime
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.export import get_export_fields
+
+DEFAULT_STATUS = "Submitted"
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 200
+QUEUE_FIELDS = (
+	"name",
+	"modified",
+	"status",
+	"company_name",
+	"contact_person",
+	"email",
+	"project_name",
+	"project_state",
+	"primary_feedstock_category",
+	"specific_feedstock_type",
+)
+# also indexed in the controller's on_doctype_update
+INDEXES = (
+	("status", "modified", "name"),
+	("status", "primary_feedstock_category", "modified", "name"),
+)
+
+
+@frappe.whitelist()
+def get_review_queue(
+	status=DEFAULT_STATUS, category=None, fields=None, cursor=None, page_length=DEFAULT_PAGE_LENGTH
+):
+	"""One page of the queue, newest first, with the cursor for the next page"""
+	frappe.has_permission(APPLICATION_DOCTYPE, "read", throw=True)
+	fields = get_queue_fields(frappe.parse_json(fields) if isinstance(fields, str) else fields)
+	page_length = min(cint(page_length) or DEFAULT_PAGE_LENGTH, MAX_PAGE_LENGTH)
+	validate_option("status", status)
+	if category:
+		validate_option("primary_feedstock_category", category)
+
+	rows = get_page(fields, status, category, decode_cursor(cursor) if cursor else None, page_length)
+	has_more = len(rows) > page_length
+	rows = rows[:page_length]
+	return {
+		"results": [{field: row[field] for field in fields} for row in rows],
+		"next_cursor": encode_cursor(rows[-1]) if has_more else None,
+		"has_more": has_more,
+	}
+
+
+def get_page(fields, status, category=None, after=None, page_length=DEFAULT_PAGE_LENGTH):
+	"""Up to `page_length + 1` rows after the (modified, name) position `after`"""
+	Application = frappe.qb.DocType(APPLICATION_DOCTYPE)
+	# the cursor columns are needed for the next cursor even when not projected
+	columns = dict.fromkeys(["modified", "name", *fields])
+	query = (
+		frappe.qb.from_(Application)
+		.select(*(Application[field] for field in columns))
+		.where(Application.status == status)
+		.orderby(Application.modified, order=frappe.qb.desc)
+		.orderby(Application.name, order=frappe.qb.desc)
+		.limit(page_length + 1)
+	)
+	if category:
+		query = query.where(Application.primary_feedstock_category == category)
+	if after:
+		modified, name = after
+		# spelled out rather than as a row comparison so MariaDB reads it as index ranges
+		query = query.where(
+			(Application.modified < modified) | ((Application.modified == modified) & (Application.name < name))
+		)
+	return query.run(as_dict=True)
+
+
+def get_queue_fields(fields=None):
+	"""Validate the projection; defaults to the queue list columns"""
+	if not fields:
+		return list(QUEUE_FIELDS)
+	return get_export_fields(fields)
+
+
+def validate_option(fieldname, value):
+	options = (frappe.get_meta(APPLICATION_DOCTYPE).get_field(fieldname).options or "").split("\n")
+	if value not in options:
+		frappe.throw(f"Unknown {frappe.unscrub(fieldname).lower()}: {value}")
+
+
+def encode_cursor(row):
+	position = json.dumps([str(row["modified"]), row["name"]], separators=(",", ":"))
+	return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+	"""(modified, name) from a cursor returned by `get_review_queue`"""
+	try:
+		modified, name = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+		return get_datetime(modified), str(name)
+	except (ValueError, TypeError):
+		frappe.throw("Invalid cursor")
@@ -0,0 +1,265 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Verified signup sessions stored as Redis hashes
+
+A session is one hash per verification token. Session metadata lives under
+`_`-prefixed fields and every form field under `data:<fieldname>`, each value
+JSON encoded on its own. A step writes only the fields it sends, in one Lua
+call that also refreshes the TTL, so two tabs saving different steps at once
+no longer overwrite each other's fields, and `current_step` only moves forward.
+
+Each email has at most one live session: an email -> token index points at it,
+and a new verification request replaces (deletes) the previous session rather
+than leaving it to expire. All live tokens are kept in a sorted set scored by
+last activity, which caps the number of sessions (least recently active ones
+are evicted first) and backs the stats endpoint.
+"""
+
+import json
+import time
+import uuid
+
+import frappe
+from frappe.utils import cint, now
+
+from franchise_portal.redis_keys import client, dumps, loads, make_key
+
+SESSION_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_SESSION_LIMIT = 10000
+DATA_PREFIX = "data:"
+META_FIELDS = ("email", "current_step", "verified", "created_at", "verified_at", "last_updated")
+
+# Replace the email's previous session with a new one, then trim the live set:
+# first entries whose sessions expired on their own, then the least recently
+# active sessions above the limit. Returns the evicted tokens.
+# KEYS: session, email index, live set
+# ARGV: token, ttl, now, limit, session key prefix, then field/value pairs
+CREATE_SESSION = """
+local previous = redis.call('GET', KEYS[2])
+if previous and previous ~= ARGV[1] then
+	redis.call('DEL', ARGV[5] .. previous)
+	redis.call('ZREM', KEYS[3], previous)
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', tonumber(ARGV[3]) - tonumber(ARGV[2]))
+
+local excess = redis.call('ZCARD', KEYS[3]) - tonumber(ARGV[4])
+if excess <= 0 then
+	return {}
+end
+local evicted = redis.call('ZRANGE', KEYS[3], 0, excess - 1)
+for _, token in ipairs(evicted) do
+	redis.call('DEL', ARGV[5] .. token)
+end
+redis.call('ZREMRANGEBYRANK', KEYS[3], 0, excess - 1)
+return evicted
+"""
+
+# Write field/value pairs to an existing session only (an expired session must
+# not be resurrected with a partial form), keep the highest step seen and
+# refresh the TTLs of the session and its email index entry.
+# KEYS: session, live set
+# ARGV: ttl, step or "", now, token, email index prefix, then field/value pairs
+UPDATE_SESSION = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+	return 0
+end
+if #ARGV > 5 then
+	redis.call('HSET', KEYS[1], unpack(ARGV, 6))
+end
+if ARGV[2] ~= '' then
+	local current = tonumber(redis.call('HGET', KEYS[1], '_current_step') or '0') or 0
+	if tonumber(ARGV[2]) > current then
+		redis.call('HSET', KEYS[1], '_current_step', ARGV[2])
+	end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], 'XX', ARGV[3], ARGV[4])
+
+local email = redis.call('HGET', KEYS[1], '_email')
+if email then
+	local index = ARGV[5] .. string.lower(cjson.decode(email))
+	if redis.call('GET', index) == ARGV[4] then
+		redis.call('EXPIRE', index, ARGV[1])
+	end
+end
+return 1
+"""
+
+# KEYS: session, live set; ARGV: token, email index prefix
+DELETE_SESSION = """
+local email = redis.call('HGET', KEYS[1], '_email')
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+if email then
+	local index = ARGV[2] .. string.lower(cjson.decode(email))
+	if redis.call('GET', index) == ARGV[1] then
+		redis.call('DEL', index)
+	end
+end
+"""
+
+
+def session_key(token):
+	return make_key("signup_session", token)
+
+
+def email_index_key(email):
+	return make_key("signup_session", "email", email.lower())
+
+
+def live_sessions_key():
+	return make_key("signup_sessions")
+
+
+def get_session_limit():
+	return cint(frappe.conf.get("franchise_signup_session_limit")) or DEFAULT_SESSION_LIMIT
+
+
+def create_session(email, data):
+	"""Start an unverified session for `email` holding `data`; returns its token
+
+	Any earlier session of the same email is deleted. Its token is never handed
+	out again, since whoever asks for a new link only proves they know the email.
+	"""
+	token = str(uuid.uuid4())
+	email = email.strip()
+	_write_new(token, {"email": email, "current_step": 1, "verified": False, "created_at": now()}, data)
+	return token
+
+
+def get_token_for_email(email):
+	"""Token of the live session for `email`, if any"""
+	token = client().get(email_index_key(email.strip()))
+	return frappe.safe_decode(token) if token else None
+
+
+def get_session(token, fields=None):
+	"""Return the session as `{"email", "data", "current_step", "verified", ...}`
+
+	Pass `fields` to read only those form fields (an empty tuple reads just the
+	metadata). Returns None if the session does not exist or has expired.
+	"""
+	if not token:
+		return None
+
+	key = session_key(token)
+	if fields is None:
+		raw = client().hgetall(key) or _migrate_legacy(token)
+		if not raw:
+			return None
+		return _unpack({frappe.safe_decode(field): value for field, value in raw.items()})
+
+	names = [f"_{field}" for field in META_FIELDS] + [DATA_PREFIX + field for field in fields]
+	values = client().hmget(key, names)
+	if values[0] is None:
+		if not _migrate_legacy(token):
+			return None
+		values = client().hmget(key, names)
+	return _unpack({name: value for name, value in zip(names, values, strict=True) if value is not None})
+
+
+def update_session(token, data=None, step=None, **meta):
+	"""Write only the given form fields and metadata to the session
+
+	`step` is kept as the highest step saved so far. Returns False if the
+	session does not exist or has expired.
+	"""
+	if not token:
+		return False
+
+	args = []
+	for field, value in (data or {}).items():
+		args += [DATA_PREFIX + field, dumps(value)]
+	for field, value in meta.items():
+		args += [f"_{field}", dumps(value)]
+	if data or step:
+		args += ["_last_updated", dumps(now())]
+
+	step = "" if step is None else str(int(step))
+	keys = (session_key(token), live_sessions_key())
+	args = [SESSION_TTL_SECONDS, step, time.time(), token, email_index_key(""), *args]
+	updated = client().eval(UPDATE_SESSION, len(keys), *keys, *args)
+	if not updated and _migrate_legacy(token):
+		updated = client().eval(UPDATE_SESSION, len(keys), *keys, *args)
+	return bool(updated)
+
+
+def mark_verified(token):
+	"""Mark the session verified and return it, or None if it has expired"""
+	if not update_session(token, verified=True, verified_at=now()):
+		return None
+	return get_session(token)
+
+
+def delete_session(token):
+	client().eval(DELETE_SESSION, 2, session_key(token), live_sessions_key(), token, email_index_key(""))
+	frappe.cache().delete_value(_legacy_key(token))
+
+
+@frappe.whitelist()
+def get_session_stats():
+	"""Number of live signup sessions and the Redis memory they hold"""
+	frappe.only_for("System Manager")
+
+	redis = client()
+	live_key = live_sessions_key()
+	redis.zremrangebyscore(live_key, "-inf", time.time() - SESSION_TTL_SECONDS)
+	tokens = [frappe.safe_decode(token) for token in redis.zrange(live_key, 0, -1)]
+
+	pipe = redis.pipeline(transaction=False)
+	for token in tokens:
+		pipe.memory_usage(session_key(token))
+	usage = pipe.execute() if tokens else []
+
+	return {
+		"sessions": sum(1 for used in usage if used),
+		"bytes": sum(used or 0 for used in usage) + (redis.memory_usage(live_key) or 0),
+		"limit": get_session_limit(),
+	}
+
+
+def _write_new(token, meta, data):
+	args = [token, SESSION_TTL_SECONDS, time.time(), get_session_limit(), session_key("")]
+	for field, value in meta.items():
+		args += [f"_{field}", dumps(value)]
+	for field, value in (data or {}).items():
+		args += [DATA_PREFIX + field, dumps(value)]
+
+	keys = (session_key(token), email_index_key(meta["email"]), live_sessions_key())
+	client().eval(CREATE_SESSION, len(keys), *keys, *args)
+
+
+def _unpack(raw):
+	session = {"data": {}}
+	for field, value in raw.items():
+		if field.startswith(DATA_PREFIX):
+			session["data"][field[len(DATA_PREFIX) :]] = loads(value)
+		elif field.startswith("_"):
+			session[field[1:]] = loads(value)
+	return session
+
+
+def _legacy_key(token):
+	return f"franchise_signup_{token}"
+
+
+def _migrate_legacy(token):
+	"""Move a session stored as one JSON blob (before hashes) into a hash
+
+	Verification links sent before the switch keep working until they expire.
+	Returns the new hash, or None if there was no legacy session.
+	"""
+	blob = frappe.cache().get_value(_legacy_key(token))
+	if not blob:
+		return None
+
+	legacy = json.loads(blob)
+	data = legacy.pop("data", None) or {}
+	_write_new(token, {field: legacy[field] for field in META_FIELDS if field in legacy}, data)
+	frappe.cache().delete_value(_legacy_key(token))
+	return client().hgetall(session_key(token))
@@ -0,0 +1,67 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.admin_digest import notify_admins, send_digest
+from franchise_portal.application_store import upsert_application
+from franchise_portal.outbox import OUTBOX_DOCTYPE
+
+
+class TestAdminDigest(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		frappe.db.delete(OUTBOX_DOCTYPE, {"status": "Digest"})
+		self.applications = [
+			upsert_application(f"digest-{i}@example.com", {"company_name": f"Digest Co {i}"}, status="Submitted")
+			for i in range(2)
+		]
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_both_notification_paths_queue_one_held_row(self):
+		"""Test that the API and controller paths share a single notification per application"""
+		doc = self.applications[0]
+		frappe.db.delete(OUTBOX_DOCTYPE, {"reference_name": doc.name})
+		outbox.schedule_drain.reset_mock()
+		notify_admins(doc)
+		doc.send_notification_email()
+
+		rows = frappe.get_all(OUTBOX_DOCTYPE, filters={"reference_name": doc.name}, pluck="status")
+		self.assertEqual(rows, ["Digest"])
+		# held rows have nothing for the drain worker to send
+		outbox.schedule_drain.assert_not_called()
+
+	def test_digest_summarises_held_notifications(self):
+		"""Test that one summary mail covers every held notification"""
+		for doc in self.applications:
+			notify_admins(doc)
+
+		self.assertEqual(send_digest(), 2)
+
+		summaries = frappe.get_all(
+			OUTBOX_DOCTYPE,
+			filters={"status": "Pending", "subject": "2 New Franchise Applications"},
+			fields=["message"],
+		)
+		self.assertEqual(len(summaries), 1)
+		self.assertIn("Digest Co 1", summaries[0].message)
+		self.assertFalse(frappe.db.exists(OUTBOX_DOCTYPE, {"status": "Digest"}))
+		self.assertEqual(send_digest(), 0)
+
+	def test_immediate_mode(self):
+		"""Test that turning the digest off queues the notification for delivery right away"""
+		with patch.dict(frappe.conf, {"franchise_admin_digest": 0}):
+			notify_admins(self.applications[0])
+
+		status = frappe.db.get_value(OUTBOX_DOCTYPE, {"reference_name": self.applications[0].name}, "status")
+		self.assertEqual(status, "Pending")
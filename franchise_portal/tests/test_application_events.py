@@ -0,0 +1,79 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.realtime import get_task_progress_room
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import application_events, outbox
+from franchise_portal.application_events import (
+	EVENT,
+	append_to_stream,
+	read_status_events,
+	status_cache_key,
+	status_channel,
+)
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.redis_keys import client
+
+EMAIL = "events@example.com"
+
+
+class TestApplicationEvents(FrappeTestCase):
+	def setUp(self):
+		patcher = patch.object(outbox, "schedule_drain")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		frappe.cache().delete_value(status_cache_key(EMAIL))
+
+	def test_publishes_status_changes_only(self):
+		"""Test that only a status change is pushed, to the applicant's channel"""
+		doc = frappe.get_doc(
+			{"doctype": APPLICATION_DOCTYPE, "email": EMAIL, "company_name": "Events", "status": "Submitted"}
+		).insert(ignore_permissions=True)
+
+		with patch("frappe.publish_realtime") as publish:
+			doc.company_name = "Events Ltd"
+			doc.save(ignore_permissions=True)
+			publish.assert_not_called()
+
+			doc.status = "Approved"
+			doc.save(ignore_permissions=True)
+
+		publish.assert_called_once()
+		event, message = publish.call_args.args
+		self.assertEqual(event, EVENT)
+		self.assertEqual((message["status"], message["previous_status"]), ("Approved", "Submitted"))
+		self.assertEqual(publish.call_args.kwargs["room"], get_task_progress_room(status_channel(EMAIL)))
+
+	def test_channel_is_per_applicant(self):
+		"""Test that the channel is stable per email and reveals nothing about it"""
+		self.assertEqual(status_channel(EMAIL), status_channel(" Events@Example.com"))
+		self.assertNotEqual(status_channel(EMAIL), status_channel("other@example.com"))
+		self.assertNotIn("events", status_channel(EMAIL))
+
+	def test_stream_feeds_consumers(self):
+		"""Test that appended events can be read back after a stream id"""
+		last = client().xrevrange(application_events.stream_key(), count=1)
+		after = frappe.safe_decode(last[0][0]) if last else "0-0"
+
+		append_to_stream({"application": "FSA-1", "status": "Rejected", "previous_status": None})
+
+		events = read_status_events(after)
+		self.assertEqual(len(events), 1)
+		self.assertEqual(events[0][1], {"application": "FSA-1", "status": "Rejected", "previous_status": ""})
+
+	def test_status_lookups_are_cached(self):
+		"""Test that repeated status polls read the database once"""
+		with patch.object(
+			application_events, "get_application", return_value=frappe._dict(name="FSA-1", status="Submitted")
+		) as get_application:
+			application_events.get_application_status(EMAIL)
+			application_events.get_application_status(EMAIL)
+
+		get_application.assert_called_once()
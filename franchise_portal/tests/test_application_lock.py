@@ -0,0 +1,41 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import threading
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal.application_lock import ApplicationLockTimeout, application_lock, lock_key
+from franchise_portal.redis_keys import client
+
+EMAIL = "lock@example.com"
+
+
+class TestApplicationLock(FrappeTestCase):
+	def tearDown(self):
+		client().delete(lock_key(EMAIL))
+
+	def test_contended_writer_waits_then_proceeds(self):
+		"""Test that a second writer waits for the lock instead of failing"""
+		redis = client()
+		redis.set(lock_key(EMAIL), "another request", ex=5)
+		threading.Timer(0.2, redis.delete, (lock_key(EMAIL),)).start()
+
+		with application_lock(EMAIL, wait_seconds=5):
+			self.assertIsNotNone(redis.get(lock_key(EMAIL)))
+
+		self.assertIsNone(redis.get(lock_key(EMAIL)))
+
+	def test_times_out_and_is_reentrant(self):
+		"""Test that a held lock times out other writers but not the holder"""
+		client().set(lock_key(EMAIL), "another request", ex=5)
+		with self.assertRaises(ApplicationLockTimeout):
+			with application_lock(EMAIL, wait_seconds=0.05):
+				pass
+		client().delete(lock_key(EMAIL))
+
+		with application_lock(EMAIL):
+			with application_lock(EMAIL.upper(), wait_seconds=0):
+				pass
+			self.assertIn(EMAIL, frappe.local.franchise_application_locks)
@@ -0,0 +1,95 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import shutil
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import application_search
+from franchise_portal.application_search import ApplicationSearch, to_document
+from franchise_portal.redis_keys import client
+
+DOCUMENTS = [
+	to_document({"name": "FSA-1", "status": "Submitted", "company_name": "Green Biomass Pvt Ltd"}),
+	to_document(
+		{"name": "FSA-2", "status": "Under Review", "company_name": "Delta Agro", "project_name": "Biomass Plant"}
+	),
+	to_document({"name": "FSA-3", "status": "Submitted", "contact_person": "Meera Iyer", "source": "Mill"}),
+]
+
+
+class TestApplicationSearch(FrappeTestCase):
+	def setUp(self):
+		self.search = ApplicationSearch("franchise_applications_test")
+		self.search.build(DOCUMENTS)
+		self.addCleanup(shutil.rmtree, self.search.index_path, True)
+
+	def names(self, result):
+		return [hit["name"] for hit in result["results"]]
+
+	def test_ranks_by_field_and_tolerates_typos(self):
+		"""Test that a company name match outranks a project match, even misspelt"""
+		self.assertEqual(self.names(self.search.search("biomass")), ["FSA-1", "FSA-2"])
+		self.assertEqual(self.names(self.search.search("biomas")), ["FSA-1", "FSA-2"])
+		self.assertEqual(self.names(self.search.search("meeera")), ["FSA-3"])
+
+	def test_filters_by_status_and_paginates(self):
+		"""Test the status filter and page metadata"""
+		self.assertEqual(self.names(self.search.search("biomass", status="Under Review")), ["FSA-2"])
+
+		first = self.search.search("biomass", page_length=1)
+		second = self.search.search("biomass", page=2, page_length=1)
+		self.assertEqual((first["total"], first["has_more"], second["has_more"]), (2, True, False))
+		self.assertEqual(self.names(first) + self.names(second), ["FSA-1", "FSA-2"])
+
+	def test_updates_and_removes_documents(self):
+		"""Test that re-indexing replaces a document and removal drops it"""
+		self.search.update_index(to_document({"name": "FSA-1", "status": "Approved", "company_name": "Solar Co"}))
+		self.assertEqual(self.names(self.search.search("biomass")), ["FSA-2"])
+
+		self.search.remove_document_from_index("FSA-2")
+		self.assertEqual(self.names(self.search.search("biomass")), [])
+		self.assertEqual(self.names(self.search.search("solar")), ["FSA-1"])
+
+	def test_search_api_caches_until_the_index_changes(self):
+		"""Test that hot queries are served from cache for one index generation"""
+		with (
+			patch.object(application_search, "INDEX_NAME", self.search.index_name),
+			patch.object(ApplicationSearch, "search", autospec=True, side_effect=ApplicationSearch.search) as search,
+		):
+			application_search.search_applications("biomass")
+			application_search.search_applications("  Biomass ")
+			self.assertEqual(search.call_count, 1)
+
+			self.search.remove_document_from_index("FSA-1")
+			self.assertEqual(self.names(application_search.search_applications("biomass")), ["FSA-2"])
+
+	def test_save_during_a_running_reindex_queues_another(self):
+		"""Test that saves dedupe onto a queued re-index but not onto one that has started"""
+		name = f"FSA-{frappe.generate_hash(length=8)}"
+		self.addCleanup(client().delete, application_search.job_generation_key(name))
+
+		with patch.object(frappe, "enqueue") as enqueue:
+			application_search._enqueue_index_update(name, False)
+			application_search._enqueue_index_update(name, False)
+			with patch.object(ApplicationSearch, "remove_document_from_index") as remove:
+				application_search.update_application_index(name, remove=True)
+			remove.assert_called_once_with(name)
+			application_search._enqueue_index_update(name, False)
+
+		job_ids = [call.kwargs["job_id"] for call in enqueue.call_args_list]
+		self.assertEqual(job_ids[0], job_ids[1])
+		self.assertNotEqual(job_ids[1], job_ids[2])
+
+	def test_missing_index_is_rebuilt_in_the_background(self):
+		"""Test that searching a missing index queues a rebuild and returns no results"""
+		missing = ApplicationSearch(f"franchise_applications_missing_{frappe.generate_hash(length=8)}")
+
+		with patch.object(frappe, "enqueue") as enqueue:
+			result = missing.search("biomass")
+
+		self.assertEqual((result["results"], result["indexing"]), ([], True))
+		self.assertEqual(enqueue.call_args.kwargs["queue"], "long")
+		self.assertTrue(enqueue.call_args.kwargs["deduplicate"])
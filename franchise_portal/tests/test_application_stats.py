@@ -0,0 +1,63 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_stats import build_dashboard_stats, get_deltas, rebuild_stats
+from franchise_portal.application_store import upsert_application
+
+EMAIL = "stats@example.com"
+
+
+class TestApplicationStats(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_saves_and_deletes_update_stats(self):
+		"""Test that doc events keep the aggregates in step with the applications"""
+		before = build_dashboard_stats()
+
+		doc = upsert_application(EMAIL, {"project_state": "Stats State", "annual_volume_available": 100})
+		upsert_application(EMAIL, {"annual_volume_available": 250}, status="Submitted")
+		after_save = build_dashboard_stats()
+
+		self.assertEqual(after_save["total"]["count"], before["total"]["count"] + 1)
+		self.assertEqual(after_save["project_state"]["Stats State"], {"count": 1, "annual_volume": 250.0})
+		self.assertEqual(
+			after_save["status"]["Submitted"]["count"],
+			before["status"].get("Submitted", {}).get("count", 0) + 1,
+		)
+
+		frappe.delete_doc(doc.doctype, doc.name, ignore_permissions=True)
+		self.assertEqual(build_dashboard_stats(), before)
+
+	def test_deltas_skip_unchanged_buckets(self):
+		"""Test that a change only touches the buckets whose values changed"""
+		before = {"status": "Draft", "project_state": "A", "annual_volume_available": 10}
+		after = {**before, "status": "In Progress"}
+
+		self.assertEqual(
+			get_deltas(before, after),
+			{("status", "Draft"): (-1, -10.0), ("status", "In Progress"): (1, 10.0)},
+		)
+
+	def test_rebuild_corrects_drift(self):
+		"""Test that the rebuild fixes aggregates changed behind the controller's back"""
+		doc = upsert_application(EMAIL, {"project_state": "Drift State", "annual_volume_available": 5})
+		frappe.db.set_value(doc.doctype, doc.name, "project_state", "Other Drift State")
+
+		rebuild_stats(batch_size=2)
+
+		stats = build_dashboard_stats()
+		self.assertNotIn("Drift State", stats["project_state"])
+		self.assertEqual(stats["project_state"]["Other Drift State"]["count"], 1)
@@ -0,0 +1,88 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import autosave, outbox
+from franchise_portal.www.signup import api
+
+EMAIL = "autosave@example.com"
+
+
+class TestAutosave(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		api.save_step({"email": EMAIL, "company_name": "Autosave Co"})
+
+	def tearDown(self):
+		autosave.discard(EMAIL, autosave.peek(EMAIL))
+		frappe.db.rollback()
+
+	def test_repeated_edits_are_coalesced_into_one_write(self):
+		"""Test that only the latest buffered value of a field is written"""
+		autosave.buffer_changes(EMAIL, {"project_name": "First"})
+		autosave.buffer_changes(EMAIL, {"project_name": "Second", "source": "Mill"})
+
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			autosave.flush(EMAIL)
+
+		updates = [
+			c
+			for c in sql.call_args_list
+			if str(c.args[0]).lstrip().lower().startswith("update")
+			and "tabFranchise Signup Application" in str(c.args[0])
+		]
+		self.assertEqual(len(updates), 1)
+		self.assertEqual(
+			frappe.db.get_value("Franchise Signup Application", {"email": EMAIL}, ["project_name", "source"]),
+			("Second", "Mill"),
+		)
+		self.assertEqual(autosave.peek(EMAIL), {})
+
+	def test_unknown_and_protected_fields_are_not_buffered(self):
+		"""Test that the payload cannot buffer status or non-fields"""
+		accepted = autosave.buffer_changes(EMAIL, {"status": "Approved", "bogus": 1, "source": "Farm"})
+
+		self.assertEqual(accepted, ["source"])
+
+	def test_step_save_wins_over_stale_buffer(self):
+		"""Test that an explicit step save folds in and clears the buffer"""
+		autosave.buffer_changes(EMAIL, {"project_name": "Buffered", "source": "Buffered source"})
+
+		api.save_step({"email": EMAIL, "company_name": "Autosave Co", "project_name": "Explicit"})
+
+		self.assertEqual(
+			frappe.db.get_value("Franchise Signup Application", {"email": EMAIL}, ["project_name", "source"]),
+			("Explicit", "Buffered source"),
+		)
+		self.assertEqual(autosave.peek(EMAIL), {})
+
+	def test_buffer_is_shared_across_email_spellings(self):
+		"""Test that a step save clears a buffer written under different case and whitespace"""
+		autosave.buffer_changes(" Autosave@Example.com ", {"source": "Buffered source"})
+
+		api.save_step({"email": EMAIL, "company_name": "Autosave Co"})
+
+		self.assertEqual(frappe.db.get_value("Franchise Signup Application", {"email": EMAIL}, "source"), "Buffered source")
+		self.assertEqual(autosave.peek(" Autosave@Example.com "), {})
+		self.assertIsNone(autosave.client().zscore(autosave.dirty_key(), EMAIL))
+
+	def test_buffer_is_dropped_once_submitted(self):
+		"""Test that a late flush neither edits nor reopens a submitted application"""
+		frappe.db.set_value("Franchise Signup Application", {"email": EMAIL}, "status", "Submitted")
+		autosave.buffer_changes(EMAIL, {"project_name": "Too late"})
+
+		self.assertIsNone(autosave.flush(EMAIL))
+
+		self.assertEqual(
+			frappe.db.get_value("Franchise Signup Application", {"email": EMAIL}, ["status", "project_name"]),
+			("Submitted", None),
+		)
+		self.assertEqual(autosave.peek(EMAIL), {})
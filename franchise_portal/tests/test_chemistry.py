@@ -0,0 +1,101 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+import numpy as np
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.chemistry import (
+	FLOAT_DERIVED_FIELDS,
+	INPUT_FIELDS,
+	build_distribution,
+	derive,
+	derive_row,
+	get_chemistry_distribution,
+	refresh_derived_values,
+)
+
+# wheat straw, dry basis
+WHEAT_STRAW = {
+	"carbon_content": 45.0,
+	"hydrogen_content": 5.5,
+	"nitrogen_content": 0.5,
+	"oxygen_content": 41.0,
+	"sulfur_content": 0.1,
+	"fixed_carbon": 17.0,
+	"volatile_matter": 75.0,
+	"ash_content": 8.0,
+}
+
+
+class TestChemistry(FrappeTestCase):
+	def setUp(self):
+		patcher = patch.object(outbox, "schedule_drain")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_derives_ratios_heating_value_and_check(self):
+		"""Test the derived values of one complete analysis"""
+		derived = derive_row(WHEAT_STRAW)
+		self.assertAlmostEqual(derived["hc_molar_ratio"], 1.456, places=3)
+		self.assertAlmostEqual(derived["oc_molar_ratio"], 0.684, places=3)
+		self.assertAlmostEqual(derived["estimated_heating_value"], 17.78, places=2)
+		self.assertEqual((derived["proximate_total"], derived["chemistry_check"]), (100.0, "Consistent"))
+
+		self.assertEqual(derive_row({**WHEAT_STRAW, "volatile_matter": 0})["chemistry_check"], "Incomplete")
+		self.assertEqual(derive_row({**WHEAT_STRAW, "fixed_carbon": 30})["chemistry_check"], "Inconsistent")
+		self.assertEqual(derive_row({})["chemistry_check"], "")
+
+	def test_vectorized_matches_per_row(self):
+		"""Test that `derive` over arrays agrees with `derive_row` on every row"""
+		rng = np.random.default_rng(7)
+		values = rng.uniform(0, 60, (500, len(INPUT_FIELDS)))
+		values[rng.random(values.shape) < 0.3] = 0
+		derived = derive({field: values[:, i] for i, field in enumerate(INPUT_FIELDS)})
+
+		for i, row in enumerate(values):
+			expected = derive_row(dict(zip(INPUT_FIELDS, row, strict=True)))
+			for field in FLOAT_DERIVED_FIELDS:
+				self.assertAlmostEqual(derived[field][i], expected[field], places=9)
+			self.assertEqual(derived["chemistry_check"][i], expected["chemistry_check"])
+
+	def test_refresh_and_distribution(self):
+		"""Test that stale derived values are rewritten and summarised per category"""
+		doc = frappe.get_doc(
+			{
+				"doctype": APPLICATION_DOCTYPE,
+				"email": "chemistry@example.com",
+				"company_name": "Chemistry",
+				"primary_feedstock_category": "Agricultural Residues",
+				**WHEAT_STRAW,
+			}
+		).insert(ignore_permissions=True)
+		self.assertEqual(doc.chemistry_check, "Consistent")
+
+		with patch.object(frappe.db, "commit"):
+			refresh_derived_values()
+			frappe.db.set_value(APPLICATION_DOCTYPE, doc.name, "hc_molar_ratio", 0, update_modified=False)
+			self.assertEqual(refresh_derived_values(), 1)
+		self.assertAlmostEqual(frappe.db.get_value(APPLICATION_DOCTYPE, doc.name, "hc_molar_ratio"), 1.456, places=3)
+
+		distribution = get_chemistry_distribution("hc_molar_ratio")
+		self.assertGreaterEqual(distribution["Agricultural Residues"]["count"], 1)
+		with self.assertRaises(frappe.ValidationError):
+			get_chemistry_distribution("password")
+
+	def test_distribution_skips_blanks(self):
+		"""Test the per-category summary and that blank (0) values are left out"""
+		categories = np.array(["Forestry Thinnings", "Urban Green Waste", "Forestry Thinnings", "Forestry Thinnings"])
+		distribution = build_distribution(categories.astype(object), np.array([1.0, 4.0, 3.0, 0.0]))
+
+		self.assertEqual(set(distribution), {"Forestry Thinnings", "Urban Green Waste"})
+		self.assertEqual(distribution["Forestry Thinnings"]["count"], 2)
+		self.assertEqual(distribution["Forestry Thinnings"]["p50"], 2.0)
+		self.assertEqual(distribution["Urban Green Waste"]["max"], 4.0)
@@ -0,0 +1,57 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import csv
+import io
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import upsert_application
+from franchise_portal.export import iter_export, iter_pages
+
+EMAILS = ("export-a@example.com", "export-b@example.com", "export-c@example.com")
+
+
+class TestExport(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		for email in EMAILS:
+			upsert_application(email, {"company_name": email}, create_status="Draft")
+		upsert_application(EMAILS[0], {}, status="Submitted")
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_pages_cover_every_row_once(self):
+		"""Test that the keyset cursor returns each row exactly once across pages"""
+		rows = [row for page in iter_pages(["email"], page_size=1) for row in page]
+		emails = [email for (email,) in rows]
+
+		self.assertEqual(len(emails), len(set(emails)))
+		self.assertTrue(set(EMAILS) <= set(emails))
+
+	def test_csv_projection_and_status_filter(self):
+		"""Test that only the requested fields of matching rows are exported"""
+		output = "".join(iter_export("csv", fields=["email", "status"], status="Draft", page_size=2))
+		rows = list(csv.reader(io.StringIO(output)))
+
+		self.assertEqual(rows[0], ["email", "status"])
+		exported = {email for email, status in rows[1:]}
+		self.assertIn(EMAILS[1], exported)
+		self.assertNotIn(EMAILS[0], exported)
+
+	def test_jsonl(self):
+		"""Test that JSON Lines output has one object per row"""
+		lines = "".join(iter_export("jsonl", fields=["name", "email"])).splitlines()
+		records = [json.loads(line) for line in lines]
+
+		self.assertTrue(set(EMAILS) <= {record["email"] for record in records})
+		self.assertEqual(set(records[0]), {"name", "email"})
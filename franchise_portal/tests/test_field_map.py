@@ -0,0 +1,45 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.field_map import apply_payload, get_field_map
+
+
+class TestFieldMap(FrappeTestCase):
+	def test_coerces_to_column_types(self):
+		"""Test that string payload values are coerced to the field types"""
+		doc = frappe.new_doc(APPLICATION_DOCTYPE)
+
+		apply_payload(doc, {"carbon_content": "48.5", "current_step": "2", "ash_content": "", "project_name": 7})
+
+		self.assertEqual(doc.carbon_content, 48.5)
+		self.assertEqual(doc.current_step, 2)
+		self.assertIsNone(doc.ash_content)
+		self.assertEqual(doc.project_name, "7")
+
+	def test_rejects_unknown_and_protected_keys(self):
+		"""Test that keys outside the applicant's fields are not copied"""
+		doc = frappe.new_doc(APPLICATION_DOCTYPE)
+		doc.status = "Draft"
+
+		rejected = apply_payload(doc, {"status": "Approved", "name": "X", "bogus": 1, "source": "Mill"})
+
+		self.assertEqual(sorted(rejected), ["bogus", "name", "status"])
+		self.assertEqual(doc.status, "Draft")
+		self.assertEqual(doc.source, "Mill")
+
+	def test_project_location_from_partial_payload(self):
+		"""Test that the location combines the payload's city with the stored state"""
+		doc = frappe.new_doc(APPLICATION_DOCTYPE)
+		doc.project_state = "Gujarat"
+
+		apply_payload(doc, {"project_city": "Surat"})
+
+		self.assertEqual(doc.project_location, "Surat, Gujarat")
+
+	def test_map_is_built_once(self):
+		"""Test that the field map is reused while the meta is unchanged"""
+		self.assertIs(get_field_map(APPLICATION_DOCTYPE), get_field_map(APPLICATION_DOCTYPE))
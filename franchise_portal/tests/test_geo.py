@@ -0,0 +1,77 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.geo import (
+	bounding_box,
+	cover,
+	encode,
+	get_applications_in_bbox,
+	get_applications_nearby,
+	parse_coordinates,
+)
+
+
+class TestGeo(FrappeTestCase):
+	def setUp(self):
+		patcher = patch.object(outbox, "schedule_drain")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def make_application(self, email, gps_coordinates):
+		return frappe.get_doc(
+			{
+				"doctype": APPLICATION_DOCTYPE,
+				"email": email,
+				"company_name": email.split("@")[0],
+				"gps_coordinates": gps_coordinates,
+			}
+		).insert(ignore_permissions=True)
+
+	def test_parses_and_encodes_coordinates(self):
+		"""Test that "lat, lng" text is parsed and geohashed"""
+		self.assertEqual(parse_coordinates(" 28.613939, 77.209023 "), (28.613939, 77.209023))
+		self.assertIsNone(parse_coordinates("somewhere near Delhi"))
+		self.assertIsNone(parse_coordinates("95.0, 10.0"))
+		self.assertEqual(encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+	def test_cover_contains_every_point_in_the_box(self):
+		"""Test that the covering cells are prefixes of any geohash inside the box"""
+		box = bounding_box(28.6, 77.2, 25)
+		cells = cover(*box)
+
+		for latitude, longitude in ((box[0], box[1]), (box[2], box[3]), (28.6, 77.2), (28.8, 76.95)):
+			self.assertTrue(any(encode(latitude, longitude).startswith(cell) for cell in cells))
+
+	def test_save_keeps_geohash_in_sync(self):
+		"""Test that editing gps_coordinates re-derives the indexed columns"""
+		doc = self.make_application("geo-sync@example.com", "28.613939, 77.209023")
+		self.assertEqual(doc.geohash, encode(28.613939, 77.209023))
+
+		doc.gps_coordinates = "not a position"
+		doc.save(ignore_permissions=True)
+
+		self.assertIsNone(doc.geohash)
+
+	def test_nearby_and_bbox_queries(self):
+		"""Test that radius queries filter by distance and sort nearest first"""
+		near = self.make_application("geo-near@example.com", "28.62, 77.21")
+		nearer = self.make_application("geo-nearer@example.com", "28.614, 77.2091")
+		far = self.make_application("geo-far@example.com", "19.076, 72.8777")
+
+		nearby = [app.name for app in get_applications_nearby(28.613939, 77.209023, radius_km=5)]
+		in_box = [app.name for app in get_applications_in_bbox(18, 72, 20, 73)]
+
+		self.assertEqual(nearby[:2], [nearer.name, near.name])
+		self.assertNotIn(far.name, nearby)
+		self.assertIn(far.name, in_box)
+		self.assertNotIn(near.name, in_box)
@@ -0,0 +1,74 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import threading
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.idempotency import run_once
+from franchise_portal.redis_keys import client, dumps, make_key
+from franchise_portal.www.signup import api
+
+
+class TestIdempotency(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		self.key = frappe.generate_hash(length=16)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_replay_skips_the_database(self):
+		"""Test that a repeated key returns the first response without queries"""
+		payload = {"email": "idempotent@example.com", "company_name": "Once Co"}
+		with patch.dict(frappe.local.form_dict, {"idempotency_key": self.key}):
+			first = api.save_step(payload)
+			with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+				replay = api.save_step(payload)
+
+		self.assertTrue(first["success"])
+		self.assertEqual(replay, first)
+		sql.assert_not_called()
+
+	def test_duplicate_waits_for_the_running_request(self):
+		"""Test that a duplicate arriving mid-request gets the first request's result"""
+		redis = client()
+		lock_key = make_key("idempotency", "test", self.key, "lock")
+		result_key = make_key("idempotency", "test", self.key)
+		self.addCleanup(redis.delete, result_key)
+		redis.set(lock_key, "first request", ex=5)
+
+		def finish_first_request():
+			redis.set(result_key, dumps({"success": True, "from": "first"}), ex=60)
+			redis.delete(lock_key)
+
+		threading.Timer(0.2, finish_first_request).start()
+		calls = []
+
+		result = run_once("test", self.key, lambda: calls.append(1) or {"success": True, "from": "second"})
+
+		self.assertEqual(result, {"success": True, "from": "first"})
+		self.assertEqual(calls, [])
+
+	def test_failures_are_not_replayed(self):
+		"""Test that a retry after an error response or an exception runs the call again"""
+		self.addCleanup(client().delete, make_key("idempotency", "test", self.key))
+		calls = []
+
+		def fail():
+			calls.append(1)
+			raise frappe.ValidationError
+
+		with self.assertRaises(frappe.ValidationError):
+			run_once("test", self.key, fail)
+		self.assertEqual(run_once("test", self.key, lambda: {"success": False, "message": "Try again"})["success"], False)
+		result = run_once("test", self.key, lambda: calls.append(1) or {"success": True})
+		self.assertEqual((result, len(calls)), ({"success": True}, 2))
+		self.assertEqual(run_once("test", self.key, lambda: calls.append(1) or {"success": False}), {"success": True})
@@ -0,0 +1,65 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import instrumentation
+from franchise_portal.instrumentation import get_metrics, instrumented
+
+
+class TestInstrumentation(FrappeTestCase):
+	def test_records_queries_and_cache_commands(self):
+		"""Test that a call's queries and Redis commands land in its sample"""
+		samples = []
+
+		@instrumented
+		def probe():
+			frappe.db.sql("select 1")
+			frappe.db.sql("select 2")
+			frappe.cache().set_value("franchise_portal:instrumentation_test", 1)
+			frappe.cache().get_value("franchise_portal:instrumentation_test", use_local_cache=False)
+
+		with patch.object(instrumentation, "record", lambda endpoint, sample: samples.append((endpoint, sample))):
+			probe()
+
+		endpoint, sample = samples[0]
+		self.assertEqual(endpoint, "probe")
+		self.assertEqual(sample["db_queries"], 2)
+		self.assertGreaterEqual(sample["cache_sets"], 1)
+		self.assertGreaterEqual(sample["cache_gets"], 1)
+		self.assertNotIn("sql", frappe.db.__dict__)
+
+	def test_metrics_endpoint_merges_histograms(self):
+		"""Test that recorded samples are served as per-endpoint histograms"""
+		endpoint = f"test_{frappe.generate_hash(length=8)}"
+		for wall_ms in (3, 4, 300):
+			instrumentation.record(endpoint, {**dict.fromkeys(instrumentation.METRICS, 0), "wall_ms": wall_ms})
+
+		metrics = get_metrics(minutes=2)["endpoints"][endpoint]
+
+		self.assertEqual(metrics["calls"], 3)
+		self.assertEqual(metrics["metrics"]["wall_ms"]["buckets"], {"<=5": 2, "<=500": 1})
+		self.assertEqual(metrics["metrics"]["wall_ms"]["p50"], 5)
+		self.assertEqual(metrics["metrics"]["wall_ms"]["p99"], 500)
+
+	def test_hooks_are_removed_after_the_call(self):
+		"""Test that Redis and query hooks exist only while a measured call runs, even if it raises"""
+		execute_command = instrumentation.Redis.execute_command
+		execute_pipeline = instrumentation.Pipeline.execute
+		seen = []
+
+		@instrumented
+		def probe():
+			seen.append(instrumentation.Redis.execute_command is not execute_command)
+			raise frappe.ValidationError
+
+		with patch.object(instrumentation, "record"), self.assertRaises(frappe.ValidationError):
+			probe()
+
+		self.assertEqual(seen, [True])
+		self.assertIs(instrumentation.Redis.execute_command, execute_command)
+		self.assertIs(instrumentation.Pipeline.execute, execute_pipeline)
+		self.assertNotIn("sql", frappe.db.__dict__)
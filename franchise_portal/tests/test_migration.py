@@ -0,0 +1,82 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.migration import get_checkpoint_key, migrate_in_chunks
+from franchise_portal.patches.v1_0 import backfill_project_location, normalize_ch_ratio
+
+KEY = "test_migration"
+
+
+class TestMigration(FrappeTestCase):
+	def setUp(self):
+		for patcher in (patch.object(outbox, "schedule_drain"), patch.object(frappe.db, "commit")):
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+		frappe.db.delete(APPLICATION_DOCTYPE)
+		for i in range(5):
+			frappe.get_doc(
+				{"doctype": APPLICATION_DOCTYPE, "email": f"migrate-{i}@example.com", "company_name": f"Migrate {i}"}
+			).insert(ignore_permissions=True)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_resumes_after_the_last_committed_chunk(self):
+		"""Test that an interrupted migration continues from its checkpoint"""
+		seen = []
+
+		def fail_on_second_chunk(rows):
+			if seen:
+				raise RuntimeError("interrupted")
+			seen.append([row.name for row in rows])
+			return {row.name: {"source": "Mill"} for row in rows}
+
+		with self.assertRaises(RuntimeError):
+			migrate_in_chunks(KEY, ["source"], fail_on_second_chunk, batch_size=2, pause_seconds=0)
+		self.assertEqual(frappe.db.get_global(get_checkpoint_key(KEY)), seen[0][-1])
+
+		resumed = []
+		updated = migrate_in_chunks(
+			KEY,
+			["source"],
+			lambda rows: resumed.extend(row.name for row in rows) or {row.name: {"source": "Farm"} for row in rows},
+			batch_size=2,
+			pause_seconds=0,
+		)
+
+		self.assertEqual(updated, 3)
+		self.assertFalse(set(resumed) & set(seen[0]))
+		self.assertEqual(frappe.db.count(APPLICATION_DOCTYPE, {"source": "Mill"}), 2)
+		self.assertIsNone(frappe.db.get_global(get_checkpoint_key(KEY)))
+
+	def test_normalize_ch_ratio(self):
+		"""Test that text ratios become numbers, recomputed from C and H when unreadable"""
+		rows = [
+			frappe._dict(name="a", ch_ratio="8.18", carbon_content=45, hydrogen_content=5.5),
+			frappe._dict(name="b", ch_ratio=" 7.5 ", carbon_content=0, hydrogen_content=0),
+			frappe._dict(name="c", ch_ratio="n/a", carbon_content=45, hydrogen_content=5.5),
+			frappe._dict(name="d", ch_ratio=None, carbon_content=0, hydrogen_content=0),
+		]
+		self.assertEqual(
+			normalize_ch_ratio.get_updates(rows),
+			{"b": {"ch_ratio": "7.5"}, "c": {"ch_ratio": "8.18"}, "d": {"ch_ratio": "0.0"}},
+		)
+
+	def test_backfill_project_location(self):
+		"""Test that the location is only written where it differs"""
+		rows = [
+			frappe._dict(name="a", project_city="Surat", project_state="Gujarat", project_location=None),
+			frappe._dict(name="b", project_city="Pune", project_state="", project_location="Pune"),
+			frappe._dict(name="c", project_city=None, project_state=None, project_location=None),
+		]
+		self.assertEqual(
+			backfill_project_location.get_updates(rows), {"a": {"project_location": "Surat, Gujarat"}}
+		)
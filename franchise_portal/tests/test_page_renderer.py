@@ -0,0 +1,43 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import MagicMock, patch
+
+from frappe.tests.utils import FrappeTestCase
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from franchise_portal import page_renderer
+from franchise_portal.page_renderer import clear_page_cache, get_cached_page, is_not_modified
+
+
+class TestPageRenderer(FrappeTestCase):
+	def setUp(self):
+		self.addCleanup(clear_page_cache)
+		clear_page_cache()
+
+	def test_renders_once_per_build(self):
+		"""Test that the page is rendered once and re-rendered after a new build"""
+		render = MagicMock(return_value="<html>signup</html>")
+
+		first = get_cached_page("signup", render)
+		second = get_cached_page("signup", render)
+		with patch.object(page_renderer, "get_build_version", return_value="next-build"):
+			rebuilt = get_cached_page("signup", render)
+
+		self.assertEqual(render.call_count, 2)
+		self.assertEqual(second, first)
+		self.assertEqual(second["html"], "<html>signup</html>")
+		self.assertNotEqual(rebuilt["etag"], first["etag"])
+
+	def test_conditional_get(self):
+		"""Test that a matching ETag or a fresh If-Modified-Since is not modified"""
+		page = get_cached_page("signup", lambda: "<html>signup</html>")
+
+		def request(**headers):
+			return Request(EnvironBuilder(path="/signup", headers=headers).get_environ())
+
+		self.assertTrue(is_not_modified(request(**{"If-None-Match": f'"{page["etag"]}"'}), page))
+		self.assertFalse(is_not_modified(request(**{"If-None-Match": '"stale"'}), page))
+		self.assertTrue(is_not_modified(request(**{"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}), page))
+		self.assertFalse(is_not_modified(request(), page))
@@ -0,0 +1,71 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+from franchise_portal.review_queue import get_review_queue
+
+CATEGORY = "Forestry Thinnings"
+
+
+class TestReviewQueue(FrappeTestCase):
+	def setUp(self):
+		patcher = patch.object(outbox, "schedule_drain")
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+		frappe.db.delete(APPLICATION_DOCTYPE, {"status": "Submitted"})
+		self.names = []
+		for i in range(5):
+			doc = frappe.get_doc(
+				{
+					"doctype": APPLICATION_DOCTYPE,
+					"email": f"queue-{i}@example.com",
+					"company_name": f"Queue {i}",
+					"status": "Submitted",
+					"primary_feedstock_category": CATEGORY if i % 2 else "Urban Green Waste",
+				}
+			).insert(ignore_permissions=True)
+			self.names.append(doc.name)
+		# ties on modified must still page without skipping or repeating rows
+		frappe.db.set_value(
+			APPLICATION_DOCTYPE, {"name": ["in", self.names]}, "modified", "2024-05-01 10:00:00", update_modified=False
+		)
+		self.names.sort(reverse=True)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_pages_through_every_row_once(self):
+		"""Test that following cursors returns each application once, in queue order"""
+		seen, cursor = [], None
+		while True:
+			page = get_review_queue(cursor=cursor, page_length=2, fields=["name", "company_name"])
+			self.assertEqual(set(page["results"][0]), {"name", "company_name"})
+			seen += [row["name"] for row in page["results"]]
+			cursor = page["next_cursor"]
+			if not page["has_more"]:
+				break
+
+		self.assertEqual(seen, self.names)
+		self.assertIsNone(cursor)
+
+	def test_filters_by_category(self):
+		"""Test that the category filter narrows the queue"""
+		page = get_review_queue(category=CATEGORY)
+		self.assertEqual({row["primary_feedstock_category"] for row in page["results"]}, {CATEGORY})
+		self.assertEqual(len(page["results"]), 2)
+
+	def test_rejects_bad_input(self):
+		"""Test that unknown fields, statuses and forged cursors are rejected"""
+		with self.assertRaises(frappe.ValidationError):
+			get_review_queue(fields=["name", "password"])
+		with self.assertRaises(frappe.ValidationError):
+			get_review_queue(status="Pending")
+		with self.assertRaises(frappe.ValidationError):
+			get_review_queue(cursor="not-a-cursor")
@@ -0,0 +1,119 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_events import status_cache_key
+from franchise_portal.www.signup import api
+
+APPLICATION_TABLE = "tabFranchise Signup Application"
+
+
+class TestSignupAPI(FrappeTestCase):
+	def setUp(self):
+		# keep each test inside the test transaction and away from the mail worker
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	@contextmanager
+	def assertApplicationQueries(self, count):
+		"""Assert at most `count` statements touch the application table"""
+		queries = []
+		sql = frappe.db.sql
+
+		def counting_sql(query, *args, **kwargs):
+			if APPLICATION_TABLE in str(query):
+				queries.append(str(query))
+			return sql(query, *args, **kwargs)
+
+		with patch.object(frappe.db, "sql", counting_sql):
+			yield
+
+		self.assertLessEqual(len(queries), count, msg="\n\n".join(queries))
+
+	def make_draft(self, email):
+		return api.save_step({"email": email, "company_name": "Query Count Co"})
+
+	def test_save_step_query_count(self):
+		"""Test that a new draft costs one lookup and one insert, an update one lookup,
+		one optimistic-lock check and one update - no uniqueness query, no second load"""
+		with self.assertApplicationQueries(2):
+			response = self.make_draft("queries@example.com")
+		self.assertTrue(response["success"])
+
+		with self.assertApplicationQueries(3):
+			response = api.save_step(
+				{"email": "queries@example.com", "company_name": "Query Count Co", "project_name": "P1"}
+			)
+		self.assertTrue(response["success"])
+		self.assertEqual(
+			frappe.db.get_value("Franchise Signup Application", response["application_id"], "project_name"),
+			"P1",
+		)
+
+	def test_submit_application_query_count(self):
+		"""Test that submitting an existing application reads the row once"""
+		self.make_draft("submit-queries@example.com")
+
+		with self.assertApplicationQueries(3):
+			response = api.submit_application(
+				"submit-queries@example.com",
+				{"annual_volume_available": 100, "primary_feedstock_category": "Agricultural Residues"},
+			)
+		self.assertTrue(response["success"])
+		# an email alone doesn't earn the realtime channel
+		self.assertNotIn("status_channel", response)
+
+	def test_finalize_application_query_count(self):
+		"""Test that finalizing a verified session reads the row once"""
+		self.make_draft("finalize-queries@example.com")
+		session_data = {
+			"email": "finalize-queries@example.com",
+			"data": {
+				"company_name": "Query Count Co",
+				"annual_volume_available": 100,
+				"primary_feedstock_category": "Agricultural Residues",
+			},
+		}
+
+		with self.assertApplicationQueries(3):
+			response = api.finalize_application(session_data, "query-count-token")
+		self.assertTrue(response["success"])
+
+	def test_get_application_status_query_count(self):
+		"""Test that the status lookup is a single indexed select, then served from cache"""
+		self.make_draft("status-queries@example.com")
+		frappe.cache().delete_value(status_cache_key("status-queries@example.com"))
+
+		with self.assertApplicationQueries(1):
+			response = api.get_application_status("status-queries@example.com")
+		self.assertEqual(response["application"]["status"], "Draft")
+		self.assertNotIn("company_name", response["application"])
+
+		with self.assertApplicationQueries(0):
+			api.get_application_status("status-queries@example.com")
+		frappe.cache().delete_value(status_cache_key("status-queries@example.com"))
+
+	def test_duplicate_email_is_rejected_by_index(self):
+		"""Test that uniqueness still holds without the extra validation query"""
+		self.make_draft("dupe@example.com")
+
+		duplicate = frappe.get_doc(
+			{
+				"doctype": "Franchise Signup Application",
+				"company_name": "Duplicate Co",
+				"email": "dupe@example.com",
+			}
+		)
+		with self.assertRaises(frappe.ValidationError):
+			duplicate.insert(ignore_permissions=True)
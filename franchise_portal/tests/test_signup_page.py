@@ -0,0 +1,35 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import signup_session
+from franchise_portal.www.signup.index import get_bootstrap, get_bootstrap_json
+
+
+class TestSignupPage(FrappeTestCase):
+	def test_bootstrap_embeds_verified_session(self):
+		"""Test that a verify link renders the session without an API round trip"""
+		token = signup_session.create_session("page@example.com", {"company_name": "Page Co"})
+		self.addCleanup(signup_session.delete_session, token)
+
+		with patch.dict(frappe.conf, {"google_maps_api_key": "maps-key"}):
+			bootstrap = get_bootstrap(token)
+
+		self.assertEqual(bootstrap["maps"], {"api_key": "maps-key"})
+		self.assertTrue(bootstrap["verification"]["success"])
+		self.assertEqual(bootstrap["verification"]["session_data"]["data"]["company_name"], "Page Co")
+		self.assertTrue(signup_session.get_session(token)["verified"])
+
+	def test_bootstrap_json_cannot_close_the_script_tag(self):
+		"""Test that applicant input is escaped for embedding in a <script> block"""
+		bootstrap = {"verification": {"session_data": {"data": {"company_name": "</script><b>&"}}}}
+
+		rendered = get_bootstrap_json(bootstrap)
+
+		self.assertNotIn("</script>", rendered)
+		self.assertEqual(json.loads(rendered), bootstrap)
@@ -0,0 +1,84 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import signup_session
+from franchise_portal.redis_keys import client
+
+EMAIL = "session@example.com"
+
+
+class TestSignupSession(FrappeTestCase):
+	def setUp(self):
+		self.token = signup_session.create_session(EMAIL, {"company_name": "Session Co"})
+		self.addCleanup(signup_session.delete_session, self.token)
+
+	def test_concurrent_steps_keep_each_others_fields(self):
+		"""Test that two tabs saving different fields both keep their writes"""
+		first_tab = signup_session.get_session(self.token)
+		second_tab = signup_session.get_session(self.token)
+
+		signup_session.update_session(self.token, {"project_name": "From tab one"}, step=first_tab["current_step"] + 1)
+		signup_session.update_session(self.token, {"source": "From tab two"}, step=second_tab["current_step"])
+
+		session = signup_session.get_session(self.token)
+		self.assertEqual(
+			session["data"],
+			{"company_name": "Session Co", "project_name": "From tab one", "source": "From tab two"},
+		)
+		self.assertEqual(session["current_step"], 2)
+
+	def test_partial_read(self):
+		"""Test that a partial read returns metadata and only the requested fields"""
+		signup_session.update_session(self.token, {"project_name": "Partial"})
+
+		session = signup_session.get_session(self.token, fields=("project_name",))
+
+		self.assertEqual(session["email"], EMAIL)
+		self.assertEqual(session["data"], {"project_name": "Partial"})
+
+	def test_expired_session_is_not_recreated(self):
+		"""Test that writes to a missing session fail instead of creating a partial one"""
+		signup_session.delete_session(self.token)
+
+		self.assertFalse(signup_session.update_session(self.token, {"project_name": "Late"}, step=2))
+		self.assertFalse(client().exists(signup_session.session_key(self.token)))
+
+	def test_legacy_blob_is_migrated(self):
+		"""Test that a session stored as a JSON blob is read and moved into a hash"""
+		token = "legacy-token"
+		self.addCleanup(signup_session.delete_session, token)
+		frappe.cache().set_value(
+			f"franchise_signup_{token}",
+			json.dumps({"email": EMAIL, "data": {"company_name": "Old Co"}, "current_step": 2, "verified": True}),
+		)
+
+		session = signup_session.get_session(token)
+
+		self.assertEqual(session["data"], {"company_name": "Old Co"})
+		self.assertTrue(session["verified"])
+		self.assertIsNone(frappe.cache().get_value(f"franchise_signup_{token}"))
+
+	def test_resend_replaces_previous_session(self):
+		"""Test that a new verification request deletes the email's earlier session"""
+		token = signup_session.create_session(f" {EMAIL.upper()} ", {"company_name": "Resent Co"})
+		self.addCleanup(signup_session.delete_session, token)
+
+		self.assertIsNone(signup_session.get_session(self.token))
+		self.assertEqual(signup_session.get_token_for_email(EMAIL), token)
+
+	def test_live_sessions_are_capped(self):
+		"""Test that sessions above the limit are evicted, least recently active first"""
+		live = client().zcard(signup_session.live_sessions_key())
+		with patch.dict(frappe.conf, {"franchise_signup_session_limit": live}):
+			token = signup_session.create_session("other-session@example.com", {})
+		self.addCleanup(signup_session.delete_session, token)
+
+		self.assertEqual(client().zcard(signup_session.live_sessions_key()), live)
+		self.assertIsNone(signup_session.get_session(self.token))
+		self.assertIsNotNone(signup_session.get_session(token))
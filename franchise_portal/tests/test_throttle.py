@@ -0,0 +1,70 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal.throttle import throttle
+
+
+class TestThrottle(FrappeTestCase):
+	def setUp(self):
+		# a fresh action name per test, so buckets left by earlier runs don't count
+		self.action = f"test_{frappe.generate_hash(length=8)}"
+		limits = {
+			self.action: {
+				"ip": {"burst": 3, "per_minute": 1},
+				"email": {"burst": 2, "per_minute": 1},
+			}
+		}
+		patcher = patch.dict(frappe.conf, {"franchise_signup_rate_limits": limits})
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+		self.calls = []
+
+		@throttle(self.action)
+		def endpoint(email, data=None):
+			self.calls.append(email)
+			return {"success": True}
+
+		self.endpoint = endpoint
+
+	def test_bucket_per_email(self):
+		"""Test that an email is rejected once its burst is used up, without reaching the endpoint"""
+		results = [self.endpoint("a@example.com") for _ in range(3)]
+
+		self.assertEqual([r["success"] for r in results], [True, True, False])
+		self.assertGreater(results[-1]["retry_after"], 0)
+		self.assertEqual(len(self.calls), 2)
+		self.assertTrue(self.endpoint(email="B@example.com ")["success"])
+
+	def test_bucket_per_ip_is_charged_only_for_allowed_calls(self):
+		"""Test that rejected calls don't use up the IP's tokens"""
+		with patch.object(frappe.local, "request_ip", "203.0.113.7", create=True):
+			for _ in range(3):
+				self.endpoint("flood@example.com")
+			self.assertTrue(self.endpoint("real@example.com")["success"])
+			self.assertFalse(self.endpoint("other@example.com")["success"])
+
+	def test_email_inside_data(self):
+		"""Test that endpoints taking a JSON payload are limited by the email in it"""
+
+		@throttle(self.action)
+		def save(data):
+			return {"success": True}
+
+		payload = '{"email": "json@example.com"}'
+		self.assertEqual([save(payload)["success"] for _ in range(3)], [True, True, False])
+
+	def test_zero_limit_blocks(self):
+		"""Test that a limit of 0 rejects every call instead of failing on a zero refill rate"""
+		limits = {self.action: {"email": {"burst": 2, "per_minute": 0}}}
+		with patch.dict(frappe.conf, {"franchise_signup_rate_limits": limits}):
+			result = self.endpoint("blocked@example.com")
+
+		self.assertFalse(result["success"])
+		self.assertGreater(result["retry_after"], 0)
+		self.assertEqual(self.calls, [])
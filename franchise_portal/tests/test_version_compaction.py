@@ -0,0 +1,87 @@
+# Copyright (c) 2024, Nexchar Ventures and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from franchise_portal import outbox
+from franchise_portal.application_store import APPLICATION_DOCTYPE, upsert_application
+from franchise_portal.version_compaction import AUTOSAVE_OWNER, compact_document_versions, squash_changes
+
+EMAIL = "versions@example.com"
+
+
+class TestVersionCompaction(FrappeTestCase):
+	def setUp(self):
+		for target, attribute in ((frappe.db, "commit"), (outbox, "schedule_drain")):
+			patcher = patch.object(target, attribute)
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def count_versions(self, docname):
+		return frappe.db.count("Version", {"ref_doctype": APPLICATION_DOCTYPE, "docname": docname})
+
+	def make_legacy_versions(self, owners):
+		"""An application with one field-only version per owner, then a Submitted transition"""
+		doc = upsert_application(EMAIL, {"company_name": "Versions Co"})
+		# saves that still version every change, as autosaves used to
+		doc.flags.autosave = False
+		for i, owner in enumerate(owners):
+			doc.project_name = f"P{i}"
+			doc.save(ignore_permissions=True)
+			version = frappe.db.get_value(
+				"Version", {"ref_doctype": APPLICATION_DOCTYPE, "docname": doc.name}, order_by="creation desc"
+			)
+			frappe.db.set_value("Version", version, "owner", owner, update_modified=False)
+		doc.status = "Submitted"
+		doc.save(ignore_permissions=True)
+		return doc
+
+	def test_autosave_writes_versions_only_on_status_change(self):
+		"""Test that field-only autosaves skip Version rows and transitions keep them"""
+		doc = upsert_application(EMAIL, {"company_name": "Versions Co"})
+		doc = upsert_application(EMAIL, {"project_name": "P1"}, status="In Progress")
+		after_transition = self.count_versions(doc.name)
+
+		upsert_application(EMAIL, {"project_name": "P2"}, status="In Progress")
+		upsert_application(EMAIL, {"project_name": "P3"}, status="In Progress")
+
+		self.assertEqual(self.count_versions(doc.name), after_transition)
+
+	def test_compaction_keeps_status_transitions(self):
+		"""Test that runs of field-only autosave versions collapse into one between transitions"""
+		doc = self.make_legacy_versions([AUTOSAVE_OWNER] * 3)
+		before = self.count_versions(doc.name)
+
+		removed = compact_document_versions(doc.name)
+
+		self.assertEqual(removed, 2)
+		self.assertEqual(self.count_versions(doc.name), before - 2)
+
+	def test_compaction_keeps_versions_by_other_users(self):
+		"""Test that a reviewer's field-only edit survives and splits the autosave runs around it"""
+		doc = self.make_legacy_versions([AUTOSAVE_OWNER, AUTOSAVE_OWNER, "Administrator", AUTOSAVE_OWNER])
+		reviewer_version = frappe.db.get_value(
+			"Version", {"ref_doctype": APPLICATION_DOCTYPE, "docname": doc.name, "owner": "Administrator"}
+		)
+
+		removed = compact_document_versions(doc.name)
+
+		self.assertEqual(removed, 1)
+		self.assertTrue(frappe.db.exists("Version", reviewer_version))
+
+	def test_squash_changes(self):
+		"""Test that squashing keeps the first old and last new value per field"""
+		squashed = squash_changes(
+			[
+				[["project_name", None, "A"], ["source", "x", "y"]],
+				[["project_name", "A", "B"], ["source", "y", "x"]],
+			]
+		)
+
+		self.assertEqual(squashed, [["project_name", None, "B"]])
@@ -0,0 +1,193 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Token-bucket throttling for the guest signup endpoints
+
+Every endpoint has a bucket per client IP and, where the call names one, per
+email (or verification token). A bucket holds up to `burst` requests and
+refills at `per_minute`. A call is allowed only if every bucket it touches has
+a token left, and all of them are charged in the same Lua call. Rejected calls
+return a `success: False` dict before the endpoint does any database or mail
+work.
+
+Limits can be overridden per endpoint in site config, e.g.
+
+    "franchise_signup_rate_limits": {
+        "send_verification_email": {"ip": {"burst": 5, "per_minute": 1}},
+        "save_step": {}
+    }
+
+An empty dict turns throttling off for that endpoint. A `burst` or
+`per_minute` of 0 blocks the endpoint for that dimension; invalid limits are
+logged and ignored.
+"""
+
+import inspect
+import json
+import math
+import time
+from functools import wraps
+
+import frappe
+from frappe.utils import flt
+from redis.exceptions import RedisError
+
+from franchise_portal.redis_keys import client, make_key
+
+DEFAULT_LIMITS = {
+	"send_verification_email": {
+		"ip": {"burst": 10, "per_minute": 2},
+		"email": {"burst": 3, "per_minute": 0.2},
+	},
+	"verify_email": {"ip": {"burst": 20, "per_minute": 10}},
+	"get_session_data": {"ip": {"burst": 30, "per_minute": 30}},
+	"save_step_with_verification": {
+		"ip": {"burst": 60, "per_minute": 60},
+		"token": {"burst": 20, "per_minute": 20},
+	},
+	"save_step": {
+		"ip": {"burst": 60, "per_minute": 60},
+		"email": {"burst": 20, "per_minute": 20},
+	},
+	"submit_application": {
+		"ip": {"burst": 20, "per_minute": 10},
+		"email": {"burst": 5, "per_minute": 2},
+	},
+	"autosave_fields": {
+		"ip": {"burst": 120, "per_minute": 120},
+		"email": {"burst": 60, "per_minute": 60},
+	},
+	"flush_autosave": {
+		"ip": {"burst": 60, "per_minute": 60},
+		"email": {"burst": 20, "per_minute": 20},
+	},
+	"get_application_status": {"ip": {"burst": 30, "per_minute": 30}},
+	"get_google_maps_api_key": {"ip": {"burst": 30, "per_minute": 30}},
+}
+# what a blocked endpoint (a limit of 0) tells callers to wait
+BLOCKED_RETRY_SECONDS = 60
+
+# Refill every bucket for the time since it was last charged, then take one
+# token from each if all have one. Otherwise charge nothing and return how long
+# the caller has to wait. Returned as a string so Redis does not truncate it.
+# KEYS: buckets; ARGV: now, then burst and refill per second for each bucket
+TAKE_TOKENS = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+	local burst = tonumber(ARGV[i * 2])
+	local rate = tonumber(ARGV[i * 2 + 1])
+	local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+	local available = tonumber(bucket[1]) or burst
+	local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+	available = math.min(burst, available + elapsed * rate)
+	if available < 1 then
+		wait = math.max(wait, (1 - available) / rate)
+	end
+	tokens[i] = available
+end
+if wait > 0 then
+	return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+	local burst = tonumber(ARGV[i * 2])
+	local rate = tonumber(ARGV[i * 2 + 1])
+	redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', ARGV[1])
+	redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return '0'
+"""
+
+
+def throttle(action):
+	"""Rate limit a whitelisted endpoint; apply it below `@frappe.whitelist`"""
+
+	def decorator(fn):
+		signature = inspect.signature(fn)
+
+		@wraps(fn)
+		def wrapper(*args, **kwargs):
+			arguments = signature.bind_partial(*args, **kwargs).arguments
+			retry_after = take_token(action, get_identities(arguments))
+			if retry_after:
+				return {
+					"success": False,
+					"message": f"Too many requests. Please try again in {retry_after} seconds.",
+					"retry_after": retry_after,
+				}
+			return fn(*args, **kwargs)
+
+		return wrapper
+
+	return decorator
+
+
+def take_token(action, identities):
+	"""Charge the buckets of `action` for `identities`; returns seconds to wait, or 0"""
+	limits = get_limits(action)
+	keys, args = [], [time.time()]
+	for dimension, identity in identities.items():
+		limit = parse_limit(action, dimension, limits.get(dimension))
+		if not (limit and identity):
+			continue
+		burst, per_minute = limit
+		if not (burst and per_minute):
+			return BLOCKED_RETRY_SECONDS
+		keys.append(make_key("throttle", action, dimension, identity))
+		args += [burst, per_minute / 60]
+
+	if not keys:
+		return 0
+
+	try:
+		wait = float(client().eval(TAKE_TOKENS, len(keys), *keys, *args))
+	except RedisError:
+		# never turn applicants away because the limiter is unavailable
+		frappe.log_error("Signup throttle unavailable", "Franchise Portal Throttle Error")
+		return 0
+
+	return math.ceil(wait)
+
+
+def get_limits(action):
+	overrides = frappe.conf.get("franchise_signup_rate_limits") or {}
+	if action in overrides:
+		return overrides[action] or {}
+	return DEFAULT_LIMITS.get(action, {})
+
+
+def parse_limit(action, dimension, limit):
+	"""`(burst, per_minute)` of a configured limit, or None if it is missing or invalid"""
+	if not limit:
+		return None
+	try:
+		burst, per_minute = flt(limit["burst"]), flt(limit["per_minute"])
+	except (KeyError, TypeError):
+		burst = per_minute = -1
+	if burst < 0 or per_minute < 0:
+		frappe.log_error(
+			f"Invalid rate limit for {action} ({dimension}): {limit!r}", "Franchise Portal Throttle Error"
+		)
+		return None
+	return burst, per_minute
+
+
+def get_identities(arguments):
+	"""Client IP plus the email or token a call is made for"""
+	email = arguments.get("email")
+	data = arguments.get("data")
+	if not email and data:
+		if isinstance(data, str):
+			try:
+				data = json.loads(data)
+			except ValueError:
+				data = None
+		if isinstance(data, dict):
+			email = data.get("email")
+
+	return {
+		"ip": getattr(frappe.local, "request_ip", None),
+		"email": email.strip().lower() if isinstance(email, str) else None,
+		"token": arguments.get("token"),
+	}
@@ -0,0 +1,141 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Squash autosave Version rows of signup applications
+
+Before autosaves stopped writing Version rows, every blur of every field left one
+behind. This job walks applications in batches and, between status transitions,
+folds consecutive field-only autosave versions into a single row holding each
+field's first old and last new value. Autosaves ran as the signup page's Guest
+session; versions written by anyone else (desk edits by reviewers, say) and
+versions that change `status` are kept untouched, so the timeline still shows
+who changed what and every transition.
+"""
+
+import json
+
+import frappe
+from frappe.query_builder.functions import Count
+from frappe.utils import cint
+
+from franchise_portal.application_store import APPLICATION_DOCTYPE
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_BATCHES = 10
+CURSOR_CACHE_KEY = "franchise_portal:version_compaction_cursor"
+# the session the signup page's autosaves ran as
+AUTOSAVE_OWNER = "Guest"
+
+
+def compact_versions(batch_size=None, max_batches=DEFAULT_MAX_BATCHES):
+	"""Compact the versions of up to `batch_size * max_batches` applications
+
+	Resumes after the last application handled by the previous run and wraps
+	around once it reaches the end, so a periodic job eventually covers all rows.
+	"""
+	batch_size = cint(batch_size) or cint(frappe.conf.get("franchise_version_compaction_batch_size")) or DEFAULT_BATCH_SIZE
+	cursor = frappe.cache().get_value(CURSOR_CACHE_KEY) or ""
+	removed = 0
+
+	for _ in range(max_batches):
+		docnames = get_docnames_with_versions(cursor, batch_size)
+		for docname in docnames:
+			removed += compact_document_versions(docname)
+		frappe.db.commit()
+
+		if len(docnames) < batch_size:
+			cursor = ""
+			break
+		cursor = docnames[-1]
+
+	frappe.cache().set_value(CURSOR_CACHE_KEY, cursor)
+	return removed
+
+
+def get_docnames_with_versions(after, limit):
+	"""Applications after `after` that have more than one autosave Version row"""
+	Version = frappe.qb.DocType("Version")
+	return (
+		frappe.qb.from_(Version)
+		.select(Version.docname)
+		.where(
+			(Version.ref_doctype == APPLICATION_DOCTYPE)
+			& (Version.docname > after)
+			& (Version.owner == AUTOSAVE_OWNER)
+		)
+		.groupby(Version.docname)
+		.having(Count("*") > 1)
+		.orderby(Version.docname)
+		.limit(limit)
+		.run(pluck=True)
+	)
+
+
+def compact_document_versions(docname):
+	"""Squash runs of field-only autosave versions of one application; returns rows removed"""
+	# every version, so that one by someone else ends a run instead of being squashed across
+	versions = frappe.get_all(
+		"Version",
+		filters={"ref_doctype": APPLICATION_DOCTYPE, "docname": docname},
+		fields=["name", "owner", "data"],
+		order_by="creation asc",
+	)
+
+	removed = 0
+	run = []
+	for version in versions:
+		data = _parse(version.data) if version.owner == AUTOSAVE_OWNER else None
+		if data is not None and is_squashable(data):
+			run.append((version.name, data))
+			continue
+
+		removed += _squash_run(run)
+		run = []
+
+	removed += _squash_run(run)
+	return removed
+
+
+def is_squashable(data):
+	"""An autosave version can be squashed if it only changes plain fields and not the status"""
+	if any(data.get(key) for key in ("added", "removed", "row_changed", "creation", "comment")):
+		return False
+
+	changed = data.get("changed") or []
+	return bool(changed) and all(field != "status" for field, *_ in changed)
+
+
+def squash_changes(changes):
+	"""Fold `[[field, old, new], ...]` lists into one, dropping fields that ended unchanged"""
+	merged = {}
+	for changed in changes:
+		for field, old, new in changed:
+			if field in merged:
+				merged[field][1] = new
+			else:
+				merged[field] = [old, new]
+
+	return [[field, old, new] for field, (old, new) in merged.items() if old != new]
+
+
+def _squash_run(run):
+	if len(run) < 2:
+		return 0
+
+	*older, (keep, data) = run
+	data["changed"] = squash_changes([version_data["changed"] for _, version_data in run])
+
+	frappe.db.delete("Version", {"name": ("in", [name for name, _ in older])})
+	if data["changed"]:
+		frappe.db.set_value("Version", keep, "data", frappe.as_json(data), update_modified=False)
+		return len(older)
+
+	frappe.db.delete("Version", {"name": keep})
+	return len(run)
+
+
+def _parse(raw):
+	try:
+		return json.loads(raw)
+	except (TypeError, ValueError):
+		return None
@@ -3,12 +3,26 @@
 
 import frappe
 from frappe import _
-from frappe.utils import now
-import uuid
 import json
 
+from franchise_portal.application_store import (
+    load_application,
+    save_application,
+    upsert_application,
+)
+from franchise_portal import application_events, autosave, signup_session
+from franchise_portal.admin_digest import notify_admins
+from franchise_portal.application_lock import application_lock
+from franchise_portal.field_map import apply_payload
+from franchise_portal.idempotency import idempotent
+from franchise_portal.instrumentation import instrumented
+from franchise_portal.outbox import enqueue_mail
+from franchise_portal.throttle import throttle
+
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("send_verification_email")
 def send_verification_email(email, data):
     """Send email verification for franchise application"""
     try:
@@ -19,28 +33,16 @@ def send_verification_email(email, data):
         if isinstance(data, str):
             data = json.loads(data)
             
-        # Generate verification token
-        verification_token = str(uuid.uuid4())
-        
         # Store session data temporarily (expires in 24 hours)
-        session_key = f"franchise_signup_{verification_token}"
-        session_data = {
-            "email": email,
-            "data": data,
-            "current_step": 1,
-            "verified": False,
-            "created_at": now()
-        }
-        
-        # Store in cache for 24 hours (86400 seconds)
-        frappe.cache().set_value(session_key, json.dumps(session_data), expires_in_sec=86400)
+        verification_token = signup_session.create_session(email, data)
         
         # Create verification URL
         site_url = frappe.utils.get_url()
         verification_url = f"{site_url}/signup?verify={verification_token}"
         
-        # Send verification email
+        # Queue verification email
         send_verification_email_to_user(email, data.get("company_name", ""), verification_url)
+        frappe.db.commit()
         
         return {
             "success": True,
@@ -58,33 +60,12 @@ def send_verification_email(email, data):
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("verify_email")
 def verify_email(token):
     """Verify email and get user's current session data"""
     try:
-        if not token:
-            return {"success": False, "message": "Verification token is required"}
-            
-        session_key = f"franchise_signup_{token}"
-        session_data_str = frappe.cache().get_value(session_key)
-        
-        if not session_data_str:
-            return {"success": False, "message": "Invalid or expired verification token"}
-            
-        session_data = json.loads(session_data_str)
-        
-        # Mark as verified
-        session_data["verified"] = True
-        session_data["verified_at"] = now()
-        
-        # Update cache
-        frappe.cache().set_value(session_key, json.dumps(session_data), expires_in_sec=86400)
-        
-        return {
-            "success": True,
-            "message": "Email verified successfully",
-            "session_data": session_data,
-            "current_step": session_data.get("current_step", 1)
-        }
+        return get_verification(token)
         
     except Exception as e:
         frappe.log_error(f"Error verifying email: {str(e)}", "Franchise Portal Verification Error")
@@ -94,24 +75,43 @@ def verify_email(token):
         }
 
 
+def get_verification(token):
+    """Mark the session verified; shared by `verify_email` and the page bootstrap"""
+    if not token:
+        return {"success": False, "message": "Verification token is required"}
+        
+    session_data = signup_session.mark_verified(token)
+    
+    if not session_data:
+        return {"success": False, "message": "Invalid or expired verification token"}
+    
+    return {
+        "success": True,
+        "message": "Email verified successfully",
+        "session_data": session_data,
+        "current_step": session_data.get("current_step", 1),
+        "status_channel": application_events.status_channel(session_data.get("email"))
+    }
+
+
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("get_session_data")
 def get_session_data(token):
     """Get current session data for a user"""
     try:
         if not token:
             return {"success": False, "message": "Token is required"}
             
-        session_key = f"franchise_signup_{token}"
-        session_data_str = frappe.cache().get_value(session_key)
+        session_data = signup_session.get_session(token)
         
-        if not session_data_str:
+        if not session_data:
             return {"success": False, "message": "Session not found or expired"}
-            
-        session_data = json.loads(session_data_str)
         
         return {
             "success": True,
-            "session_data": session_data
+            "session_data": session_data,
+            "status_channel": application_events.status_channel(session_data.get("email"))
         }
         
     except Exception as e:
@@ -123,6 +123,9 @@ def get_session_data(token):
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("save_step_with_verification")
+@idempotent("save_step_with_verification")
 def save_step_with_verification(token, data, step):
     """Save step data with verification check"""
     try:
@@ -135,13 +138,11 @@ def save_step_with_verification(token, data, step):
         except (ValueError, TypeError):
             step = 1
             
-        session_key = f"franchise_signup_{token}"
-        session_data_str = frappe.cache().get_value(session_key)
+        # Read only the session metadata for the verification check
+        session_data = signup_session.get_session(token, fields=())
         
-        if not session_data_str:
+        if not session_data:
             return {"success": False, "message": "Session not found or expired"}
-            
-        session_data = json.loads(session_data_str)
         
         if not session_data.get("verified"):
             return {"success": False, "message": "Email not verified", "requires_verification": True}
@@ -150,17 +151,13 @@ def save_step_with_verification(token, data, step):
         if isinstance(data, str):
             data = json.loads(data)
         
-        # Update session data
-        session_data["data"].update(data)
-        session_data["current_step"] = step
-        session_data["last_updated"] = now()
-        
-        # Save updated session
-        frappe.cache().set_value(session_key, json.dumps(session_data), expires_in_sec=86400)
+        # Write only this step's fields (atomically, refreshing the TTL)
+        if not signup_session.update_session(token, data, step=step):
+            return {"success": False, "message": "Session not found or expired"}
         
         # If this is the final step, save to doctype
         if step >= 3:
-            return finalize_application(session_data, token)
+            return finalize_application(signup_session.get_session(token), token)
         
         return {
             "success": True,
@@ -176,6 +173,7 @@ def save_step_with_verification(token, data, step):
         }
 
 
+@instrumented
 def finalize_application(session_data, token):
     """Finalize application in doctype (update existing or create new)"""
     try:
@@ -195,75 +193,35 @@ def finalize_application(session_data, token):
         if not application_data.get('primary_feedstock_category'):
             return {"success": False, "message": "Primary Feedstock Category is required"}
         
-        # Check if application already exists for this email
-        existing_applications = frappe.get_all(
-            "Franchise Signup Application",
-            filters={"email": email},
-            fields=["name"]
-        )
-        
-        if existing_applications:
-            # Update existing application
-            doc = frappe.get_doc("Franchise Signup Application", existing_applications[0].name)
-            
-            # Update all fields with new data
-            for key, value in application_data.items():
-                if hasattr(doc, key) and key not in ['name', 'doctype']:
-                    setattr(doc, key, value)
-            
-            # Handle legacy project_location field - combine city and state if needed
-            if application_data.get('project_city') or application_data.get('project_state'):
-                city = application_data.get('project_city', '')
-                state = application_data.get('project_state', '')
-                if city and state:
-                    doc.project_location = f"{city}, {state}"
-                elif city:
-                    doc.project_location = city
-                elif state:
-                    doc.project_location = state
-            
-            # Update status to submitted
-            doc.status = "Submitted"
-            doc.current_step = 3
-            doc.save(ignore_permissions=True)
+        with application_lock(email):
+            # Fold in unflushed autosave changes, then update the existing
+            # application or create it (fallback case)
+            pending = autosave.peek(email)
+            doc = upsert_application(
+                email,
+                {**pending, **application_data, "current_step": 3},
+                status="Submitted",
+                create_status="Submitted"
+            )
             
-        else:
-            # Create new application (fallback case)
-            doc_data = {
-                "doctype": "Franchise Signup Application",
-                "status": "Submitted",
-                "naming_series": "FSA-.YYYY.-"
-            }
+            # Queue notification emails (delivered by the outbox worker after commit)
+            try:
+                send_notification_email(doc)
+                send_final_confirmation_email(doc)
+            except Exception as e:
+                frappe.log_error(f"Error sending emails: {str(e)}")
             
-            # Add all provided data
-            for key, value in application_data.items():
-                if key not in ['doctype', 'name'] and value is not None:
-                    doc_data[key] = value
+            frappe.db.commit()
+            autosave.discard(email, pending)
             
-            # Ensure required fields
-            if not doc_data.get('company_name'):
-                doc_data['company_name'] = 'Untitled Application'
-                
-            doc = frappe.get_doc(doc_data)
-            doc.insert(ignore_permissions=True)
-        
-        # Send notification emails
-        try:
-            send_notification_email(doc)
-            send_final_confirmation_email(doc)
-        except Exception as e:
-            frappe.log_error(f"Error sending emails: {str(e)}")
-        
-        frappe.db.commit()
-        
-        # Clear session data
-        session_key = f"franchise_signup_{token}"
-        frappe.cache().delete_value(session_key)
+            # Clear session data
+            signup_session.delete_session(token)
         
         return {
             "success": True,
             "message": "Application submitted successfully",
-            "application_id": doc.name
+            "application_id": doc.name,
+            "status_channel": application_events.status_channel(email)
         }
         
     except Exception as e:
@@ -275,6 +233,9 @@ def finalize_application(session_data, token):
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("save_step")
+@idempotent("save_step")
 def save_step(data):
     """Save step data for the franchise application"""
     try:
@@ -292,70 +253,15 @@ def save_step(data):
         if not data.get('company_name') or not data.get('company_name').strip():
             return {"success": False, "message": "Company name is required"}
         
-        # Check for existing application
-        existing = frappe.get_all(
-            "Franchise Signup Application",
-            filters={"email": data.email},
-            fields=["name"]
-        )
-        
-        if existing:
-            # Update existing application
-            doc = frappe.get_doc("Franchise Signup Application", existing[0].name)
-            
-            # Update fields
-            for key, value in data.items():
-                if hasattr(doc, key) and key != 'name':
-                    setattr(doc, key, value)
-            
-            # Handle legacy project_location field - combine city and state if needed
-            if data.get('project_city') or data.get('project_state'):
-                city = data.get('project_city', '')
-                state = data.get('project_state', '')
-                if city and state:
-                    doc.project_location = f"{city}, {state}"
-                elif city:
-                    doc.project_location = city
-                elif state:
-                    doc.project_location = state
-            
-            doc.status = "In Progress"
-            doc.save(ignore_permissions=True)
+        with application_lock(data.email):
+            # Fold in unflushed autosave changes, then update existing application
+            # or create a new draft
+            pending = autosave.peek(data.email)
+            doc = upsert_application(data.email, {**pending, **data}, status="In Progress", create_status="Draft")
             application_id = doc.name
             
-        else:
-            # Create new application
-            doc_data = {
-                "doctype": "Franchise Signup Application",
-                "status": "Draft",
-                "naming_series": "FSA-.YYYY.-"
-            }
-            
-            # Add all provided data, ensuring proper field mapping
-            for key, value in data.items():
-                if key not in ['doctype', 'name'] and value is not None:
-                    doc_data[key] = value
-            
-            # Handle legacy project_location field - combine city and state if needed
-            if data.get('project_city') or data.get('project_state'):
-                city = data.get('project_city', '')
-                state = data.get('project_state', '')
-                if city and state:
-                    doc_data['project_location'] = f"{city}, {state}"
-                elif city:
-                    doc_data['project_location'] = city
-                elif state:
-                    doc_data['project_location'] = state
-            
-            # Ensure company_name is set for title generation
-            if not doc_data.get('company_name'):
-                doc_data['company_name'] = 'Untitled Application'
-                
-            doc = frappe.get_doc(doc_data)
-            doc.insert(ignore_permissions=True)
-            application_id = doc.name
-        
-        frappe.db.commit()
+            frappe.db.commit()
+            autosave.discard(data.email, pending)
         
         return {
             "success": True,
@@ -391,6 +297,9 @@ def save_step(data):
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("submit_application")
+@idempotent("submit_application")
 def submit_application(email, data=None):
     """Submit the franchise application"""
     try:
@@ -402,104 +311,146 @@ def submit_application(email, data=None):
             import json
             data = json.loads(data)
         
-        # Find the application
-        applications = frappe.get_all(
-            "Franchise Signup Application",
-            filters={"email": email},
-            fields=["name"]
-        )
+        with application_lock(email):
+            # Find the application
+            doc = load_application(email)
+            
+            if not doc:
+                return {"success": False, "message": "Application not found"}
+            
+            # Update with unflushed autosave changes and final data if provided
+            pending = autosave.peek(email)
+            values = {**pending, **(data or {})}
+            if values:
+                apply_payload(doc, values)
+            
+            # Validate required fields for final submission
+            if not doc.company_name:
+                return {"success": False, "message": "Company name is required"}
+            
+            if not doc.email:
+                return {"success": False, "message": "Email is required"}
+            
+            # Validate required Step 3 fields for final submission
+            annual_volume = doc.annual_volume_available
+            try:
+                annual_volume_float = float(annual_volume) if annual_volume and str(annual_volume).strip() else 0
+            except (ValueError, TypeError):
+                annual_volume_float = 0
+            
+            if annual_volume_float <= 0:
+                return {"success": False, "message": "Annual Volume Available is required and must be greater than 0"}
+            
+            if not doc.primary_feedstock_category:
+                return {"success": False, "message": "Primary Feedstock Category is required"}
+            
+            # Update status and save (values are applied again if the save has to merge)
+            doc = save_application(doc, {**values, "current_step": 3}, status="Submitted")
+            
+            # Queue notification emails (delivered by the outbox worker after commit)
+            try:
+                send_notification_email(doc)
+                send_confirmation_email(doc)
+            except Exception as e:
+                frappe.log_error(f"Error sending emails: {str(e)}")
+            
+            frappe.db.commit()
+            autosave.discard(email, pending)
         
-        if not applications:
-            return {"success": False, "message": "Application not found"}
+        return {
+            "success": True,
+            "message": "Application submitted successfully",
+            "application_id": doc.name
+        }
         
-        doc = frappe.get_doc("Franchise Signup Application", applications[0].name)
+    except Exception as e:
+        frappe.log_error(f"Error submitting application: {str(e)}")
+        return {
+            "success": False,
+            "message": f"Error submitting application: {str(e)}"
+        }
+
+
+@frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("autosave_fields")
+def autosave_fields(email, changes):
+    """Buffer changed fields of an application; they are written in coalesced batches"""
+    try:
+        if not email or not email.strip():
+            return {"success": False, "message": "Email is required"}
         
-        # Update with final data if provided
-        if data:
-            data = frappe._dict(data)
-            for key, value in data.items():
-                if hasattr(doc, key) and key not in ['name', 'doctype']:
-                    setattr(doc, key, value)
-            
-            # Handle legacy project_location field - combine city and state if needed
-            if data.get('project_city') or data.get('project_state'):
-                city = data.get('project_city', '')
-                state = data.get('project_state', '')
-                if city and state:
-                    doc.project_location = f"{city}, {state}"
-                elif city:
-                    doc.project_location = city
-                elif state:
-                    doc.project_location = state
-        
-        # Validate required fields for final submission
-        if not doc.company_name:
-            return {"success": False, "message": "Company name is required"}
+        # Handle JSON string data from frontend
+        if isinstance(changes, str):
+            changes = json.loads(changes)
         
-        if not doc.email:
-            return {"success": False, "message": "Email is required"}
+        if not isinstance(changes, dict):
+            return {"success": False, "message": "Changes must be an object"}
         
-        # Validate required Step 3 fields for final submission
-        annual_volume = doc.annual_volume_available
-        try:
-            annual_volume_float = float(annual_volume) if annual_volume and str(annual_volume).strip() else 0
-        except (ValueError, TypeError):
-            annual_volume_float = 0
-            
-        if annual_volume_float <= 0:
-            return {"success": False, "message": "Annual Volume Available is required and must be greater than 0"}
+        accepted = autosave.buffer_changes(email.strip(), changes)
         
-        if not doc.primary_feedstock_category:
-            return {"success": False, "message": "Primary Feedstock Category is required"}
+        return {
+            "success": True,
+            "accepted": accepted
+        }
         
-        # Update status and save
-        doc.status = "Submitted"
-        doc.current_step = 3
-        doc.save(ignore_permissions=True)
+    except Exception as e:
+        frappe.log_error(f"Error buffering autosave: {str(e)}", "Franchise Portal Autosave Error")
+        return {
+            "success": False,
+            "message": f"Error saving changes: {str(e)}"
+        }
+
+
+@frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("flush_autosave")
+def flush_autosave(email, changes=None):
+    """Write buffered autosave changes, plus any sent along, now (called on step navigation)"""
+    try:
+        if not email or not email.strip():
+            return {"success": False, "message": "Email is required"}
         
-        # Send notification email
-        try:
-            send_notification_email(doc)
-            send_confirmation_email(doc)
-        except Exception as e:
-            frappe.log_error(f"Error sending emails: {str(e)}")
+        # Handle JSON string data from frontend
+        if changes and isinstance(changes, str):
+            changes = json.loads(changes)
         
-        frappe.db.commit()
+        if changes:
+            autosave.buffer_changes(email.strip(), changes)
+        
+        application_id = autosave.flush(email.strip())
         
         return {
             "success": True,
-            "message": "Application submitted successfully",
-            "application_id": doc.name
+            "application_id": application_id
         }
         
     except Exception as e:
-        frappe.log_error(f"Error submitting application: {str(e)}")
+        frappe.log_error(f"Error flushing autosave: {str(e)}", "Franchise Portal Autosave Error")
         return {
             "success": False,
-            "message": f"Error submitting application: {str(e)}"
+            "message": f"Error saving changes: {str(e)}"
         }
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("get_application_status")
 def get_application_status(email):
     """Get the current status of an application"""
     try:
         if not email:
             return {"success": False, "message": "Email is required"}
         
-        applications = frappe.get_all(
-            "Franchise Signup Application",
-            filters={"email": email},
-            fields=["name", "status", "current_step", "company_name"],
-            limit=1
-        )
+        # served from cache; status changes clear it (and are pushed to applicants in realtime)
+        application = application_events.get_application_status(email)
         
-        if not applications:
+        if not application:
             return {"success": False, "message": "Application not found"}
         
         return {
             "success": True,
-            "application": applications[0]
+            "application": application
         }
         
     except Exception as e:
@@ -511,70 +462,12 @@ def get_application_status(email):
 
 
 def send_notification_email(doc):
-    """Send notification email to administrators"""
-    subject = f"New Franchise Application: {doc.company_name}"
-    
-    message = f"""
-    <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-        <h2 style="color: #667eea;">New Franchise Application Submitted</h2>
-        
-        <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-            <h3 style="margin-top: 0; color: #495057;">Application Details</h3>
-            
-            <table style="width: 100%; border-collapse: collapse;">
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold; width: 40%;">Application ID:</td>
-                    <td style="padding: 8px 0;">{doc.name}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Company Name:</td>
-                    <td style="padding: 8px 0;">{doc.company_name or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Contact Person:</td>
-                    <td style="padding: 8px 0;">{doc.contact_person or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Email:</td>
-                    <td style="padding: 8px 0;">{doc.email}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Phone:</td>
-                    <td style="padding: 8px 0;">{doc.phone_number or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Project Name:</td>
-                    <td style="padding: 8px 0;">{doc.project_name or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Location:</td>
-                    <td style="padding: 8px 0;">{doc.project_location or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Feedstock Category:</td>
-                    <td style="padding: 8px 0;">{doc.feedstock_category or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px 0; font-weight: bold;">Annual Volume:</td>
-                    <td style="padding: 8px 0;">{doc.annual_volume_available or 'N/A'} MT</td>
-                </tr>
-            </table>
-        </div>
-        
-        <p style="color: #6c757d;">Please review this application in the ERP system and follow up with the applicant.</p>
-    </div>
-    """
-    
-    frappe.sendmail(
-        recipients=["admin@nexcharventures.com"],
-        subject=subject,
-        message=message,
-        now=True
-    )
+    """Queue notification email to administrators (sent in the next digest by default)"""
+    notify_admins(doc)
 
 
 def send_confirmation_email(doc):
-    """Send confirmation email to the applicant"""
+    """Queue confirmation email to the applicant"""
     subject = f"Application Received - {doc.company_name}"
     
     message = f"""
@@ -602,16 +495,17 @@ def send_confirmation_email(doc):
     </div>
     """
     
-    frappe.sendmail(
+    enqueue_mail(
         recipients=[doc.email],
         subject=subject,
         message=message,
-        now=True
+        reference_doctype=doc.doctype,
+        reference_name=doc.name
     )
 
 
 def send_verification_email_to_user(email, company_name, verification_url):
-    """Send verification email to the applicant"""
+    """Queue verification email to the applicant"""
     subject = f"Verify Your Email - Franchise Application"
     
     message = f"""
@@ -651,16 +545,15 @@ def send_verification_email_to_user(email, company_name, verification_url):
     </div>
     """
     
-    frappe.sendmail(
+    enqueue_mail(
         recipients=[email],
         subject=subject,
-        message=message,
-        now=True
+        message=message
     )
 
 
 def send_final_confirmation_email(doc):
-    """Send final confirmation email after application completion"""
+    """Queue final confirmation email after application completion"""
     subject = f"Application Submitted Successfully - {doc.company_name}"
     
     message = f"""
@@ -692,7 +585,7 @@ def send_final_confirmation_email(doc):
                 </tr>
                 <tr>
                     <td style="padding: 8px 0; font-weight: bold;">Location:</td>
-                    <td style="padding: 8px 0;">{doc.project_location or 'Not specified'}</td>
+                    <td style="padding: 8px 0;">{doc.get('project_location') or 'Not specified'}</td>
                 </tr>
                 <tr>
                     <td style="padding: 8px 0; font-weight: bold;">Status:</td>
@@ -722,36 +615,46 @@ def send_final_confirmation_email(doc):
     </div>
     """
     
-    frappe.sendmail(
+    enqueue_mail(
         recipients=[doc.email],
         subject=subject,
         message=message,
-        now=True
+        reference_doctype=doc.doctype,
+        reference_name=doc.name
     )
 
 
 @frappe.whitelist(allow_guest=True)
+@instrumented
+@throttle("get_google_maps_api_key")
 def get_google_maps_api_key():
     """Get Google Maps API key from site config securely"""
     try:
-        # Get the API key from site config
-        api_key = frappe.conf.get("google_maps_api_key")
+        maps_config = get_maps_config()
         
-        if not api_key:
+        if not maps_config["success"]:
             frappe.log_error("Google Maps API key not found in site config", "Maps Configuration Error")
-            return {
-                "success": False,
-                "message": "Google Maps API key not configured"
-            }
         
-        return {
-            "success": True,
-            "api_key": api_key
-        }
+        return maps_config
         
     except Exception as e:
         frappe.log_error(f"Error getting Google Maps API key: {str(e)}", "Maps Configuration Error")
         return {
             "success": False,
             "message": "Error retrieving Maps configuration"
-        } 
\ No newline at end of file
+        } 
+
+
+def get_maps_config():
+    """Google Maps settings for the signup page, from site config"""
+    api_key = frappe.conf.get("google_maps_api_key")
+    if not api_key:
+        return {
+            "success": False,
+            "message": "Google Maps API key not configured"
+        }
+    
+    return {
+        "success": True,
+        "api_key": api_key
+    }
@@ -0,0 +1,58 @@
+# Copyright (c) 2024, Nexchar Ventures and contributors
+# For license information, please see license.txt
+
+"""Server-side bootstrap for the signup page
+
+The maps configuration and, for a `?verify=` link, the verified session are
+rendered into the page as `window.franchiseSignupBootstrap`, so the first paint
+needs no API calls. It also carries the hashed URL of the map bundle, which the
+page loads only when the map modal is first opened.
+"""
+
+import json
+
+import frappe
+from frappe.utils.jinja_globals import bundled_asset
+
+from franchise_portal.throttle import take_token
+from franchise_portal.www.signup.api import get_maps_config, get_verification
+
+# Frappe's page cache is keyed on the path alone and would serve one applicant's
+# session to everyone; page_renderer.SignupPage caches the anonymous shell instead
+no_cache = 1
+
+
+def get_context(context):
+	context.no_cache = 1
+	context.bootstrap_json = get_bootstrap_json(get_bootstrap(frappe.form_dict.get("verify")))
+
+
+def get_bootstrap(token=None):
+	maps_config = get_maps_config()
+	bootstrap = {
+		"maps": {"api_key": maps_config["api_key"]} if maps_config["success"] else None,
+		"assets": {"map_bundle": bundled_asset("signup_map.bundle.js")},
+	}
+
+	if token:
+		bootstrap["verification"] = verify(token)
+
+	return bootstrap
+
+
+def verify(token):
+	"""Same checks and rate limit as the `verify_email` endpoint"""
+	retry_after = take_token("verify_email", {"ip": getattr(frappe.local, "request_ip", None), "token": token})
+	if retry_after:
+		return {"success": False, "message": f"Too many requests. Please try again in {retry_after} seconds."}
+
+	try:
+		return get_verification(token)
+	except Exception as e:
+		frappe.log_error(f"Error verifying email: {str(e)}", "Franchise Portal Verification Error")
+		return {"success": False, "message": "Error verifying email"}
+
+
+def get_bootstrap_json(bootstrap):
+	# session data is applicant input; keep it from closing the <script> tag
+	return json.dumps(bootstrap, default=str).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")